@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from benchmarks.generator import CATEGORIES, make_operations, write_operations_xlsx
+from src.batch import read_manifest, run_batch
+
+MARKET_DATA = (
+    [{"currency": "USD", "rate": 80.0}, {"currency": "EUR", "rate": 90.0}],
+    [{"stock": "AAPL", "price": 150.0}],
+)
+
+
+def write_manifest(work_dir: str, jobs: int, rows: int) -> str:
+    """Записывает выгрузки, настройки пользователей и манифест заданий; возвращает путь к манифесту."""
+    settings_path = os.path.join(work_dir, "user_settings.json")
+    with open(settings_path, "w", encoding="utf-8") as f:
+        json.dump({"user_currencies": ["USD", "EUR"], "user_stocks": ["AAPL"]}, f)
+
+    manifest_path = os.path.join(work_dir, "manifest.jsonl")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        for number in range(jobs):
+            transactions_path = f"operations_{number}.xlsx"
+            write_operations_xlsx(make_operations(rows, seed=number), os.path.join(work_dir, transactions_path))
+            job = {
+                "id": f"user-{number}",
+                "transactions": transactions_path,
+                "settings": "user_settings.json",
+                "home_dates": [f"2021-{month:02d}-15 12:00:00" for month in range(1, 13)],
+                "months": [f"2021-{month:02d}" for month in range(1, 13)],
+                "categories": [category[0] for category in CATEGORIES],
+                "category_date": "2021-12-31",
+            }
+            f.write(json.dumps(job, ensure_ascii=False) + "\n")
+    return manifest_path
+
+
+def main() -> None:
+    """Замеряет пропускную способность пакетного режима при разном числе процессов."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--jobs", type=int, default=16, help="Количество заданий (пользователей)")
+    parser.add_argument("--rows", type=int, default=5000, help="Строк в выгрузке одного пользователя")
+    parser.add_argument("--workers", default=",".join(str(2**i) for i in range((os.cpu_count() or 1).bit_length())))
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_batch_")
+    try:
+        jobs = read_manifest(write_manifest(work_dir, args.jobs, args.rows))
+        print(f"Ядер: {os.cpu_count()}, заданий: {args.jobs}, строк в выгрузке: {args.rows}")
+        print(f"{'процессов':>10} {'время, с':>9} {'заданий/с':>10} {'ускорение':>10}")
+        serial = None
+        for workers in (int(value) for value in args.workers.split(",")):
+            # Для каждого запуска свой каталог кеша, чтобы все запуски читали XLSX с нуля
+            os.environ["TRANSACTIONS_CACHE_DIR"] = os.path.join(work_dir, f"cache_{workers}")
+            with mock.patch("src.batch.fetch_market_data", return_value=MARKET_DATA):
+                started = time.perf_counter()
+                for _ in run_batch(jobs, workers):
+                    pass
+                elapsed = time.perf_counter() - started
+            serial = serial or elapsed
+            print(f"{workers:>10} {elapsed:>9.2f} {args.jobs / elapsed:>10.2f} {serial / elapsed:>9.2f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
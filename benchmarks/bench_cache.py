@@ -0,0 +1,44 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.generator import enlarge_operations, write_operations_xlsx
+from src.utils import read_excel_data
+
+
+def main() -> None:
+    """Сравнивает холодную и теплую загрузку выгрузки через read_excel_data."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Размер синтетической выгрузки")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Количество теплых загрузок")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_cache_")
+    os.environ["TRANSACTIONS_CACHE_DIR"] = os.path.join(work_dir, "cache")
+    try:
+        path = os.path.join(work_dir, "operations.xlsx")
+        started = time.perf_counter()
+        write_operations_xlsx(enlarge_operations(args.rows, args.seed), path)
+        print(f"Сгенерирован файл на {args.rows} строк за {time.perf_counter() - started:.1f} с")
+
+        started = time.perf_counter()
+        read_excel_data(path, use_cache=False)
+        print(f"Без кеша (openpyxl):      {time.perf_counter() - started:8.3f} с")
+
+        started = time.perf_counter()
+        read_excel_data(path)
+        print(f"Холодная загрузка + кеш:  {time.perf_counter() - started:8.3f} с")
+
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            read_excel_data(path)
+            print(f"Теплая загрузка из кеша:  {time.perf_counter() - started:8.3f} с")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
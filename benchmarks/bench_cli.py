@@ -0,0 +1,67 @@
+import argparse
+import io
+import json
+import time
+from typing import Any, Dict, List
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generator import CATEGORIES, make_operations
+from src.loader import normalize_transactions
+from src.main import run_queries
+from src.store import TransactionStore
+
+SETTINGS = {"user_currencies": ["USD"], "user_stocks": ["AAPL"]}
+
+
+def make_queries(count: int, kind: str, seed: int = 0) -> List[str]:
+    """Возвращает строки JSONL со случайными неповторяющимися запросами заданного типа за 2018-2021 годы."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2018-04-01").value // 10**9
+    seconds = rng.integers(start, pd.Timestamp("2021-12-31").value // 10**9, size=count)
+    moments = pd.to_datetime(seconds, unit="s")
+    categories = [c[0] for c in CATEGORIES]
+    kinds = ["home", "invest", "category"] if kind == "mixed" else [kind]
+
+    lines = []
+    for i, moment in enumerate(moments):
+        query: Dict[str, Any]
+        query_type = kinds[i % len(kinds)]
+        if query_type == "home":
+            query = {"type": "home", "date": moment.strftime("%Y-%m-%d %H:%M:%S")}
+        elif query_type == "invest":
+            query = {"type": "invest", "month": moment.strftime("%Y-%m"), "limit": int(rng.choice([10, 50, 100]))}
+        else:
+            category = categories[int(rng.integers(len(categories)))]
+            query = {"type": "category", "category": category, "date": moment.strftime("%Y-%m-%d")}
+        lines.append(json.dumps(query, ensure_ascii=False))
+    return lines
+
+
+def main() -> None:
+    """Измеряет пропускную способность режима --queries: запросов в секунду по одной загруженной выгрузке."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Строк в выгрузке")
+    parser.add_argument("--queries", type=int, default=3000, help="Запросов каждого вида")
+    args = parser.parse_args()
+
+    df = normalize_transactions(make_operations(args.rows, typed=True))
+    started = time.perf_counter()
+    store = TransactionStore(df)
+    _ = store.cube, store.top_index
+    print(f"Строк: {args.rows}, подготовка хранилища: {time.perf_counter() - started:.2f} с")
+
+    print(f"{'запросы':<10} {'число':>7} {'время, с':>9} {'запросов/с':>11}")
+    with mock.patch("src.views.fetch_market_data", return_value=([], [])):
+        for kind in ("home", "invest", "category", "mixed"):
+            lines = make_queries(args.queries, kind)
+            started = time.perf_counter()
+            run_queries(lines, store, SETTINGS, io.StringIO(), save_report=False)
+            elapsed = time.perf_counter() - started
+            print(f"{kind:<10} {len(lines):>7} {elapsed:>9.2f} {len(lines) / elapsed:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
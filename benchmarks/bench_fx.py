@@ -0,0 +1,44 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_store import _best_of
+from benchmarks.generator import CURRENCIES, make_operations
+from src.fx import FxRates, convert_transactions
+from src.loader import normalize_transactions
+
+
+def make_rates(start: str = "2017-12-01", end: str = "2021-12-31") -> FxRates:
+    """Возвращает таблицу курсов валют генератора по рабочим дням со случайными колебаниями."""
+    rng = np.random.default_rng(0)
+    days = pd.bdate_range(start, end)
+    frames = [
+        pd.DataFrame({"date": days, "currency": currency, "rate": rate * rng.uniform(0.9, 1.1, len(days))})
+        for currency, rate in CURRENCIES
+        if currency != "RUB"
+    ]
+    rates = FxRates()
+    rates.add(pd.concat(frames, ignore_index=True))
+    return rates
+
+
+def main() -> None:
+    """Измеряет скорость пересчета выгрузки в валюту отчета по курсам на дату операции."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="100000,1000000,5000000", help="Размеры таблицы через запятую")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rates = make_rates()
+    print(f"Курсов в таблице: {len(rates)}")
+    print(f"{'строк':>10} {'в RUB, мс':>10} {'в USD, мс':>10} {'млн строк/с':>12}")
+    for rows in (int(size) for size in args.sizes.split(",")):
+        df = normalize_transactions(make_operations(rows, typed=True))
+        rub_ms = _best_of(lambda: convert_transactions(df, rates, "RUB"), args.repeat)
+        usd_ms = _best_of(lambda: convert_transactions(df, rates, "USD"), args.repeat)
+        print(f"{rows:>10} {rub_ms:>10.1f} {usd_ms:>10.1f} {rows / rub_ms / 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
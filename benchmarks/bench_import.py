@@ -0,0 +1,76 @@
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+from src.utils import PROJECT_ROOT
+
+# Точки входа: модуль и код, выполняемый после импорта
+ENTRY_POINTS = {
+    "src.utils": "import src.utils",
+    "src.services": "import src.services",
+    "src.reports": "import src.reports",
+    "src.views": "import src.views",
+    "src.main": "import src.main",
+    "src.server": "import src.server",
+    "investment_bank(list)": (
+        "from src.services import investment_bank; "
+        "investment_bank('2024-01', [{'Дата операции': '2024-01-05 12:00:00', 'Сумма операции': 1712}], 50)"
+    ),
+}
+# Время импортов до перехода на отложенные импорты (лучшее из 7, мс): все точки входа загружали pandas и requests
+BASELINE_MS = {
+    "src.utils": 470.1,
+    "src.services": 497.3,
+    "src.reports": 491.9,
+    "src.views": 510.7,
+    "src.main": 513.6,
+    "src.server": 563.4,
+    "investment_bank(list)": 542.6,
+}
+HEAVY_MODULES = ("pandas", "requests", "dotenv")
+
+
+def _measure(code: str) -> Tuple[float, Dict[str, bool]]:
+    """Запускает код в новом интерпретаторе с -X importtime и возвращает суммарное время импортов в мс."""
+    probe = f"{code}; import sys; print(*[m in sys.modules for m in {HEAVY_MODULES!r}])"
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+        cwd=PROJECT_ROOT,
+    )
+
+    # В выводе importtime модули верхнего уровня имеют отступ в одну позицию после второго разделителя
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit() and not name[1:].startswith(" "):
+                total_us += int(cumulative)
+    loaded = dict(zip(HEAVY_MODULES, (flag == "True" for flag in result.stdout.split())))
+    return total_us / 1000, loaded
+
+
+def main() -> None:
+    """Измеряет время импорта точек входа и сравнивает его с замером до отложенных импортов."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'точка входа':<24} {'до, мс':>8} {'после, мс':>10} {'загружены':<24}")
+    for name, code in ENTRY_POINTS.items():
+        runs = [_measure(code) for _ in range(args.repeat)]
+        best_ms = min(ms for ms, _ in runs)
+        loaded = ", ".join(module for module, flag in runs[0][1].items() if flag) or "-"
+        baseline = BASELINE_MS.get(name)
+        before = f"{baseline:>8.1f}" if baseline is not None else f"{'-':>8}"
+        print(f"{name:<24} {before} {best_ms:>10.1f} {loaded:<24}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.generator import make_operations
+from src.ingest import IngestStore
+from src.loader import normalize_transactions
+
+
+def main() -> None:
+    """Сравнивает догрузку выгрузки с перекрытием 99% и полную перезагрузку истории."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="100000,1000000,4000000", help="Размеры истории через запятую")
+    parser.add_argument("--export-rows", type=int, default=100_000, help="Строк в новой выгрузке")
+    parser.add_argument("--new-share", type=float, default=0.01, help="Доля новых строк в выгрузке")
+    args = parser.parse_args()
+
+    new_rows = int(args.export_rows * args.new_share)
+    print(f"Выгрузка: {args.export_rows} строк, из них новых: {new_rows}")
+    print(f"{'история':>10} {'догрузка, с':>12} {'перезагрузка, с':>16} {'ускорение':>10}")
+    for rows in (int(size) for size in args.sizes.split(",")):
+        operations = make_operations(rows + new_rows, seed=rows)
+        # Выгрузка идет от новых операций к старым: первые new_rows строк — новые, остальные уже загружены
+        history, export = operations.iloc[new_rows:], operations.iloc[: args.export_rows]
+
+        work_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+        try:
+            store = IngestStore(work_dir)
+            store.ingest(history)
+
+            started = time.perf_counter()
+            result = store.ingest(export)
+            ingest_s = time.perf_counter() - started
+            assert result.new_rows == new_rows
+
+            started = time.perf_counter()
+            normalize_transactions(pd.concat([operations.iloc[:new_rows], history], ignore_index=True))
+            reload_s = time.perf_counter() - started
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        print(f"{rows:>10} {ingest_s:>12.3f} {reload_s:>16.3f} {reload_s / ingest_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import time
+from typing import Any, Callable, List, Tuple
+
+from benchmarks.generator import make_operations
+from src.loader import normalize_transactions
+from src.reports import month_end_dates, spending_by_category, spending_matrix
+from src.store import Transactions, TransactionStore
+
+
+def _timed(func: Callable[[], Any]) -> Tuple[Any, float]:
+    """Возвращает результат функции и время ее выполнения в миллисекундах."""
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _loop(transactions: Transactions, categories: List[str], dates: List[str]) -> None:
+    """Считает матрицу трат повторными вызовами spending_by_category."""
+    for category in categories:
+        for date in dates:
+            spending_by_category(transactions, category, date, save_report=False)
+
+
+def main() -> None:
+    """Сравнивает матрицу трат по категориям и концам месяцев с циклом вызовов spending_by_category."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="100000,1000000", help="Размеры таблицы через запятую")
+    args = parser.parse_args()
+
+    print(f"{'строк':>10} {'источник':<10} {'ячеек':>6} {'цикл, мс':>10} {'матрица, мс':>12} {'ускорение':>10}")
+    for rows in (int(size) for size in args.sizes.split(",")):
+        df = normalize_transactions(make_operations(rows, typed=True))
+        store = TransactionStore(df)
+        _ = store.cube
+        dates = month_end_dates(df)
+        categories = sorted(df["Категория"].dropna().unique())
+
+        for name, transactions in (("DataFrame", df), ("хранилище", store)):
+            _, loop_ms = _timed(lambda: _loop(transactions, categories, dates))
+            matrix, matrix_ms = _timed(lambda: spending_matrix(transactions, dates, categories))
+            print(
+                f"{rows:>10} {name:<10} {matrix.size:>6} {loop_ms:>10.1f} {matrix_ms:>12.1f} "
+                f"{loop_ms / matrix_ms:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
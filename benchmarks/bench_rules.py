@@ -0,0 +1,30 @@
+import argparse
+import os
+
+from benchmarks.bench_store import _best_of
+from benchmarks.generator import make_operations
+from src.loader import normalize_transactions
+from src.rules import RuleSet, discrepancies
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cashback_rules.json")
+
+
+def main() -> None:
+    """Измеряет скорость применения правил кешбэка и округлений и сверки с начислениями банка."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="100000,1000000,5000000", help="Размеры таблицы через запятую")
+    parser.add_argument("--rules", default=RULES_PATH, help="JSON-файл правил")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rules = RuleSet.from_file(args.rules)
+    print(f"{'строк':>10} {'правила, мс':>12} {'млн строк/с':>12} {'сверка, мс':>11}")
+    for rows in (int(size) for size in args.sizes.split(",")):
+        df = normalize_transactions(make_operations(rows, typed=True))
+        apply_ms = _best_of(lambda: rules.apply(df), args.repeat)
+        check_ms = _best_of(lambda: discrepancies(df, rules), args.repeat)
+        print(f"{rows:>10} {apply_ms:>12.1f} {rows / apply_ms / 1000:>12.1f} {check_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict
+from unittest import mock
+
+import pandas as pd
+
+from benchmarks.generator import make_operations
+from src.loader import normalize_transactions
+from src.shared import SharedDataset, _release_free_heap
+
+SETTINGS = {"user_currencies": ["USD"], "user_stocks": ["AAPL"]}
+# Предельное время ожидания процессов, чтобы бенчмарк не зависал, если процесс завершился с ошибкой
+WORKER_TIMEOUT = 900
+MEMORY_FIELDS = {"Rss": "rss", "Pss": "pss", "Private_Clean": "private", "Private_Dirty": "private"}
+
+
+def process_memory() -> Dict[str, float]:
+    """Возвращает RSS, PSS и собственную (private) память процесса в МБ по /proc/self/smaps_rollup."""
+    memory = {"rss": 0.0, "pss": 0.0, "private": 0.0}
+    with open("/proc/self/smaps_rollup", "r", encoding="utf-8") as f:
+        for line in f:
+            field, _, value = line.partition(":")
+            if field in MEMORY_FIELDS:
+                memory[MEMORY_FIELDS[field]] += int(value.split()[0]) / 1024
+    return memory
+
+
+def _worker(mode: str, source: str, barrier: Any, results: Any) -> None:
+    """Получает данные своим способом, считает главную, Инвесткопилку и отчет по категории и замеряет память."""
+    from src.reports import spending_by_category
+    from src.services import investment_bank
+    from src.store import TransactionStore
+    from src.views import generate_response
+
+    started = time.perf_counter()
+    if mode == "shared":
+        dataset = SharedDataset.attach(source)
+        store = dataset.store
+    else:
+        # Собственная копия строится так же, как хранилище над разделяемой памятью: с кубом и очисткой кучи
+        store = TransactionStore(pd.read_pickle(source))
+        _ = store.cube, store.top_index
+        _release_free_heap()
+    ready_s = time.perf_counter() - started
+
+    with mock.patch("src.views.fetch_market_data", return_value=([], [])):
+        for month in range(1, 13):
+            generate_response(f"2021-{month:02d}-15 12:00:00", SETTINGS, store)
+            investment_bank(f"2021-{month:02d}", store, 50)
+            spending_by_category(store, "Супермаркеты", f"2021-{month:02d}-28", save_report=False)
+
+    # Память замеряется, когда все процессы работают одновременно
+    barrier.wait(WORKER_TIMEOUT)
+    results.put({"ready_s": ready_s, **process_memory()})
+    barrier.wait(WORKER_TIMEOUT)
+
+
+def main() -> None:
+    """Сравнивает память процессов-обработчиков с собственной копией таблицы и с разделяемой памятью."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Строк в выгрузке")
+    parser.add_argument("--workers", default="1,2,4,8", help="Числа процессов через запятую")
+    args = parser.parse_args()
+
+    df = normalize_transactions(make_operations(args.rows, typed=True))
+    work_dir = tempfile.mkdtemp(prefix="bench_shared_")
+    # Процессы запускаются через spawn, чтобы не наследовать страницы родителя при fork
+    context = multiprocessing.get_context("spawn")
+    try:
+        with SharedDataset.publish(df, f"bench_shared_{os.getpid()}") as dataset:
+            pickle_path = os.path.join(work_dir, "operations.pkl")
+            dataset.frame.to_pickle(pickle_path)
+            del df
+            print(f"Строк: {args.rows}, сегмент: {dataset.segment.size / 2**20:.0f} МБ")
+            print(
+                f"{'режим':<8} {'процессов':>9} {'старт, с':>9} {'RSS/процесс':>12} "
+                f"{'private/процесс':>16} {'PSS всего':>10}"
+            )
+            for mode, source in (("copy", pickle_path), ("shared", dataset.name)):
+                for workers in (int(value) for value in args.workers.split(",")):
+                    barrier, results = context.Barrier(workers), context.Queue()
+                    processes = [
+                        context.Process(target=_worker, args=(mode, source, barrier, results)) for _ in range(workers)
+                    ]
+                    for process in processes:
+                        process.start()
+                    measured = [results.get(timeout=WORKER_TIMEOUT) for _ in processes]
+                    for process in processes:
+                        process.join()
+
+                    ready_s = max(item["ready_s"] for item in measured)
+                    rss = sum(item["rss"] for item in measured) / workers
+                    private = sum(item["private"] for item in measured) / workers
+                    pss = sum(item["pss"] for item in measured)
+                    print(f"{mode:<8} {workers:>9} {ready_s:>9.2f} {rss:>9.0f} МБ {private:>13.0f} МБ {pss:>7.0f} МБ")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
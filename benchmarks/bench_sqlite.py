@@ -0,0 +1,51 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.bench_store import _best_of
+from benchmarks.generator import make_operations
+from src.loader import normalize_transactions
+from src.services import investment_bank
+from src.sqlite_store import SQLiteStore
+from src.store import TransactionStore, window_card_totals, window_category_total, window_top_transactions
+
+
+def main() -> None:
+    """Сравнивает агрегаты отчетов по DataFrame, хранилищу в памяти и базе SQLite на разных размерах данных."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="100000,1000000,3000000", help="Размеры таблицы через запятую")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start, end = datetime(2021, 3, 1), datetime(2021, 3, 15, 12)
+    queries = {
+        "карты": lambda data: window_card_totals(data, start, end),
+        "топ-5": lambda data: window_top_transactions(data, start, end),
+        "категория 3 мес.": lambda data: window_category_total(data, "Супермаркеты", datetime(2020, 12, 15), end),
+        "Инвесткопилка": lambda data: investment_bank("2021-03", data, 50),
+    }
+    print(f"{'строк':>10} {'запрос':<18} {'DataFrame, мс':>14} {'память, мс':>11} {'SQLite, мс':>11}")
+    for rows in (int(size) for size in args.sizes.split(",")):
+        df = normalize_transactions(make_operations(rows, typed=True))
+        store = TransactionStore(df)
+        work_dir = tempfile.mkdtemp(prefix="bench_sqlite_")
+        try:
+            started = time.perf_counter()
+            database = SQLiteStore.from_frame(df, os.path.join(work_dir, "transactions.db"))
+            load_s = time.perf_counter() - started
+            size_mb = os.path.getsize(database.path) / 2**20
+            print(f"{rows:>10} {'загрузка в SQLite':<18} {load_s:>34.1f} с, {size_mb:.0f} МБ")
+
+            for name, query in queries.items():
+                timings = [_best_of(lambda: query(data), args.repeat) for data in (df, store, database)]
+                print(f"{rows:>10} {name:<18} {timings[0]:>14.2f} {timings[1]:>11.2f} {timings[2]:>11.2f}")
+            database.close()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
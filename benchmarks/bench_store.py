@@ -0,0 +1,47 @@
+import argparse
+import time
+from datetime import datetime
+from typing import Any, Callable
+
+from benchmarks.generator import make_operations
+from src.loader import normalize_transactions
+from src.store import TransactionStore, select_transactions
+
+
+def _best_of(func: Callable[[], Any], repeat: int) -> float:
+    """Возвращает лучшее время выполнения функции в миллисекундах."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    """Сравнивает выборку окна дат маской и по индексу хранилища на разных размерах данных."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="100000,1000000,10000000", help="Размеры таблицы через запятую")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start, end = datetime(2021, 3, 1), datetime(2021, 3, 15, 12)
+    print(f"{'строк':>10} {'запрос':<22} {'маска, мс':>10} {'индекс, мс':>11} {'ускорение':>10}")
+    for rows in (int(size) for size in args.sizes.split(",")):
+        df = normalize_transactions(make_operations(rows, typed=True))
+        started = time.perf_counter()
+        store = TransactionStore(df)
+        store.select(start, end, category="Супермаркеты")
+        store.select(start, end, card="*7197")
+        build_ms = (time.perf_counter() - started) * 1000
+        print(f"{rows:>10} {'построение индексов':<22} {build_ms:>22.1f}")
+
+        queries = {"окно дат": None, "окно + категория": "Супермаркеты"}
+        for name, category in queries.items():
+            mask_ms = _best_of(lambda: select_transactions(df, start, end, category), args.repeat)
+            index_ms = _best_of(lambda: select_transactions(store, start, end, category), args.repeat)
+            print(f"{rows:>10} {name:<22} {mask_ms:>10.2f} {index_ms:>11.2f} {mask_ms / index_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.generator import make_operations
+from src.cube import card_totals
+from src.loader import normalize_transactions
+from src.services import investment_bank_by_month
+from src.streaming import (
+    CardSummaryReducer,
+    CategorySpendingReducer,
+    InvestmentBankReducer,
+    iter_batches,
+    reduce_batches,
+)
+
+
+def _peak_rss_mb() -> float:
+    """Возвращает пиковый RSS текущего процесса в мегабайтах."""
+    # VmHWM сбрасывается при exec, в отличие от ru_maxrss, который наследуется от родительского процесса
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(path: str, mode: str, batch_size: int) -> None:
+    """Выполняет расчеты в отдельном процессе и печатает время и пиковый RSS."""
+    baseline = _peak_rss_mb()
+    started = time.perf_counter()
+    start, end = datetime(2021, 12, 1), datetime(2021, 12, 31, 23, 59, 59)
+    if mode == "stream":
+        reduce_batches(
+            iter_batches(path, batch_size),
+            InvestmentBankReducer(50),
+            CategorySpendingReducer("Супермаркеты", "2021-12-31"),
+            CardSummaryReducer(start, end),
+        )
+    else:
+        df = normalize_transactions(pd.read_csv(path))
+        investment_bank_by_month(df, 50)
+        card_totals(df[(df["Дата операции"] >= start) & (df["Дата операции"] <= end)])
+    print(f"{time.perf_counter() - started:.2f} {_peak_rss_mb() - baseline:.1f}")
+
+
+def main() -> None:
+    """Сравнивает пиковую память потоковой обработки и полной загрузки выгрузки в память."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="250000,1000000,4000000", help="Размеры выгрузки через запятую")
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--worker", nargs=2, metavar=("PATH", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.batch_size)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="bench_streaming_")
+    try:
+        print(f"{'строк':>10} {'режим':<16} {'время, с':>9} {'прирост RSS, МБ':>16}")
+        for rows in (int(size) for size in args.sizes.split(",")):
+            path = os.path.join(work_dir, f"operations_{rows}.csv")
+            make_operations(rows).to_csv(path, index=False)
+            for mode, title in (("stream", "потоково"), ("full", "целиком")):
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_streaming", "--batch-size", str(args.batch_size)]
+                    + ["--worker", path, mode],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout.split()
+                print(f"{rows:>10} {title:<16} {float(output[0]):>9.2f} {float(output[1]):>16.1f}")
+            os.remove(path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import time
+from datetime import datetime
+
+from benchmarks.bench_store import _best_of
+from benchmarks.generator import make_operations
+from src.loader import normalize_transactions
+from src.store import TransactionStore, select_transactions
+
+# Окна запросов: с начала месяца, произвольный диапазон и окно одной карты
+WINDOWS = {
+    "месяц до даты": (datetime(2021, 5, 1), datetime(2021, 5, 20, 15, 0), None),
+    "год": (datetime(2020, 3, 14, 9, 30), datetime(2021, 3, 14, 18, 0), None),
+    "месяц, карта": (datetime(2021, 5, 1), datetime(2021, 5, 20, 15, 0), "*5091"),
+}
+
+
+def main() -> None:
+    """Сравнивает top-5 платежей окна по строкам окна и по индексу крупнейших платежей дней."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="100000,1000000,5000000", help="Размеры таблицы через запятую")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'строк':>10} {'окно':<16} {'строки, мс':>11} {'индекс, мс':>11} {'ускорение':>10}")
+    for rows in (int(size) for size in args.sizes.split(",")):
+        df = normalize_transactions(make_operations(rows, typed=True))
+        store = TransactionStore(df)
+        started = time.perf_counter()
+        _ = store.top_index
+        print(f"{rows:>10} {'построение':<16} {(time.perf_counter() - started) * 1000:>23.1f}")
+
+        for name, (start, end, card) in WINDOWS.items():
+
+            def scan() -> None:
+                window = select_transactions(df, start, end)
+                if card is not None:
+                    window = window[window["Номер карты"] == card]
+                window.nlargest(5, "Сумма платежа")
+
+            scan_ms = _best_of(scan, args.repeat)
+            index_ms = _best_of(lambda: store.top_transactions(start, end, 5, card=card), args.repeat)
+            print(f"{rows:>10} {name:<16} {scan_ms:>11.2f} {index_ms:>11.2f} {scan_ms / index_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import time
+from datetime import datetime
+
+from benchmarks.bench_store import _best_of
+from benchmarks.generator import make_operations
+from src.loader import normalize_transactions
+from src.store import TransactionStore, select_transactions
+
+# Запросы к представлениям: окно дат с категорией или без
+QUERIES = {
+    "траты, окно": ("spend", None),
+    "траты, категория": ("spend", "Супермаркеты"),
+    "поступления": ("income", None),
+    "неуспешные": ("failed", None),
+}
+
+
+def main() -> None:
+    """Сравнивает выборку разделов выгрузки маской по статусу и знаку суммы и по представлениям хранилища."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="100000,1000000,5000000", help="Размеры таблицы через запятую")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start, end = datetime(2020, 12, 15), datetime(2021, 3, 15)
+    print(f"{'строк':>10} {'запрос':<18} {'маска, мс':>10} {'индекс, мс':>11} {'ускорение':>10}")
+    for rows in (int(size) for size in args.sizes.split(",")):
+        df = normalize_transactions(make_operations(rows, typed=True))
+        started = time.perf_counter()
+        store = TransactionStore(df)
+        for view, _ in QUERIES.values():
+            store.positions(view=view)
+        print(f"{rows:>10} {'разметка':<18} {(time.perf_counter() - started) * 1000:>22.1f}")
+
+        for name, (view, category) in QUERIES.items():
+            mask_ms = _best_of(lambda: select_transactions(df, start, end, category, view=view), args.repeat)
+            index_ms = _best_of(lambda: select_transactions(store, start, end, category, view=view), args.repeat)
+            print(f"{rows:>10} {name:<18} {mask_ms:>10.2f} {index_ms:>11.2f} {mask_ms / index_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
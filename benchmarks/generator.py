@@ -0,0 +1,151 @@
+import argparse
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+# Исходная выгрузка, строки которой размножаются для синтетических файлов
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "operations.xlsx")
+
+# Категории выгрузки: MCC, типичные описания, средний модуль суммы и признак поступления
+CATEGORIES = [
+    ("Супермаркеты", 5411.0, ["Колхоз", "Магнит", "Пятерочка", "Перекресток"], 400.0, False),
+    ("Фастфуд", 5814.0, ["Mouse Tail", "Вкусно и точка", "Теремок"], 300.0, False),
+    ("Транспорт", 4111.0, ["Метро Санкт-Петербург", "Яндекс Такси"], 150.0, False),
+    ("Каршеринг", 7512.0, ["Ситидрайв", "Делимобиль"], 600.0, False),
+    ("Различные товары", 5399.0, ["Ozon.ru", "Wildberries"], 1200.0, False),
+    ("Аптеки", 5912.0, ["Аптека Вита", "Ригла"], 500.0, False),
+    ("Рестораны", 5812.0, ["Pho Bo", "Шоколадница"], 1500.0, False),
+    ("Связь", 4814.0, ["МТС Mobile +7 921 11-22-33"], 350.0, False),
+    ("Переводы", np.nan, ["Перевод Кредитная карта", "Перевод с карты"], 3000.0, False),
+    (
+        "Пополнения",
+        np.nan,
+        ["Пополнение через Газпромбанк", "Внесение наличных через банкомат Тинькофф"],
+        5000.0,
+        True,
+    ),
+    ("Бонусы", np.nan, ["Кэшбэк за обычные покупки", "Проценты на остаток"], 200.0, True),
+]
+CARDS = ["*7197", "*5091", "*4556", "*1112", "*5507", "*6002", "*5441", None]
+CARD_WEIGHTS = [0.3, 0.25, 0.15, 0.08, 0.07, 0.05, 0.05, 0.05]
+# Валюта операции и ее курс к рублю
+CURRENCIES = [("RUB", 1.0), ("TRY", 3.1), ("EUR", 90.0), ("USD", 80.0), ("CNY", 11.5)]
+CURRENCY_WEIGHTS = [0.98, 0.01, 0.005, 0.0025, 0.0025]
+FAILED_SHARE = 0.006
+
+
+def make_operations(
+    rows: int,
+    seed: int = 0,
+    start: str = "2018-01-01",
+    end: str = "2021-12-31 23:59:59",
+    typed: bool = False,
+) -> pd.DataFrame:
+    """Возвращает синтетическую выгрузку в схеме operations.xlsx, воспроизводимую по seed.
+
+    При typed=True даты возвращаются как datetime64, иначе — строками в формате выгрузки банка.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Операции в выгрузке идут от новых к старым
+    start_s, end_s = pd.Timestamp(start).value // 10**9, pd.Timestamp(end).value // 10**9
+    seconds = np.sort(rng.integers(start_s, end_s, size=rows))[::-1]
+    operation_dates = pd.to_datetime(seconds, unit="s")
+    payment_dates = operation_dates.normalize() + pd.to_timedelta((rng.random(rows) < 0.1).astype(np.int64), unit="D")
+
+    category_idx = rng.integers(0, len(CATEGORIES), size=rows)
+    categories = np.array([c[0] for c in CATEGORIES], dtype=object)[category_idx]
+    mcc = np.array([c[1] for c in CATEGORIES])[category_idx]
+    scale = np.array([c[3] for c in CATEGORIES])[category_idx]
+    incoming = np.array([c[4] for c in CATEGORIES])[category_idx]
+    # Описания всех категорий лежат в одном массиве, категория задает смещение и число вариантов
+    flat_descriptions = np.array([d for c in CATEGORIES for d in c[2]], dtype=object)
+    counts = np.array([len(c[2]) for c in CATEGORIES])
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    descriptions = flat_descriptions[
+        offsets[category_idx] + rng.integers(0, 1 << 16, size=rows) % counts[category_idx]
+    ]
+
+    currency_idx = rng.choice(len(CURRENCIES), size=rows, p=CURRENCY_WEIGHTS)
+    rates = np.array([c[1] for c in CURRENCIES])[currency_idx]
+    magnitude = np.round(rng.lognormal(np.log(scale), 0.8), 2)
+    operation_amount = np.where(incoming, magnitude, -magnitude)
+    payment_amount = np.round(operation_amount * rates, 2)
+
+    status = np.where(rng.random(rows) < FAILED_SHARE, "FAILED", "OK").astype(object)
+    cashback = np.where((~incoming) & (rng.random(rows) < 0.05), np.round(np.abs(payment_amount) * 0.05, 0), np.nan)
+    rounding = np.where(rng.random(rows) < 0.02, np.round(np.ceil(magnitude / 50) * 50 - magnitude, 2), 0.0)
+
+    df = pd.DataFrame(
+        {
+            "Дата операции": operation_dates,
+            "Дата платежа": payment_dates,
+            "Номер карты": np.array(CARDS, dtype=object)[rng.choice(len(CARDS), size=rows, p=CARD_WEIGHTS)],
+            "Статус": status,
+            "Сумма операции": operation_amount,
+            "Валюта операции": np.array([c[0] for c in CURRENCIES], dtype=object)[currency_idx],
+            "Сумма платежа": payment_amount,
+            "Валюта платежа": "RUB",
+            "Кэшбэк": cashback,
+            "Категория": categories,
+            "MCC": mcc,
+            "Описание": descriptions,
+            "Бонусы (включая кэшбэк)": np.where(incoming, 0, np.abs(payment_amount) // 100).astype(np.int64),
+            "Округление на инвесткопилку": rounding,
+            "Сумма операции с округлением": np.round(np.abs(operation_amount) + rounding, 2),
+        }
+    )
+    if not typed:
+        df["Дата операции"] = operation_dates.strftime("%d.%m.%Y %H:%M:%S")
+        df["Дата платежа"] = payment_dates.strftime("%d.%m.%Y")
+    return df
+
+
+def enlarge_operations(rows: int, seed: int = 0, source_path: Optional[str] = None) -> pd.DataFrame:
+    """Возвращает выгрузку из rows строк, собранную случайной выборкой строк исходного файла."""
+    source = pd.read_excel(source_path or SOURCE_PATH)
+    rng = np.random.default_rng(seed)
+    df = source.iloc[rng.integers(0, len(source), size=rows)].reset_index(drop=True)
+
+    # Равномерно разносим операции по периоду исходной выгрузки, сохраняя строковый формат дат
+    dates = pd.to_datetime(source["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+    start, span = dates.min().value, dates.max().value - dates.min().value
+    seconds = np.sort(start + rng.integers(0, span, size=rows))[::-1] // 10**9
+    operation_dates = pd.to_datetime(seconds, unit="s")
+    df["Дата операции"] = operation_dates.strftime("%d.%m.%Y %H:%M:%S")
+    df["Дата платежа"] = operation_dates.strftime("%d.%m.%Y")
+    return df
+
+
+def write_operations_xlsx(df: pd.DataFrame, path: str) -> None:
+    """Записывает выгрузку в XLSX потоково, не держа лист openpyxl в памяти."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(df.columns))
+    for row in df.itertuples(index=False, name=None):
+        sheet.append([None if isinstance(value, float) and np.isnan(value) else value for value in row])
+    workbook.save(path)
+
+
+def main() -> None:
+    """Записывает синтетическую выгрузку в схеме operations.xlsx в XLSX или CSV."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("output", help="Путь к файлу .xlsx или .csv")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", default="2018-01-01")
+    parser.add_argument("--end", default="2021-12-31 23:59:59")
+    args = parser.parse_args()
+
+    df = make_operations(args.rows, args.seed, args.start, args.end)
+    if os.path.splitext(args.output)[1].lower() == ".csv":
+        df.to_csv(args.output, index=False)
+    else:
+        write_operations_xlsx(df, args.output)
+
+
+if __name__ == "__main__":
+    main()
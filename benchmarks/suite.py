@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+import pandas as pd
+
+from benchmarks.generator import make_operations, write_operations_xlsx
+from src.reports import spending_by_category
+from src.services import investment_bank
+from src.utils import read_excel_data
+from src.views import generate_response
+
+# Файл базовых замеров по умолчанию
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Допустимое замедление относительно базового замера
+DEFAULT_TOLERANCE = 0.25
+# Замедление меньше этого значения в секундах считается шумом измерения
+MIN_DELTA = 0.005
+# Параметры запросов: последний месяц синтетической выгрузки
+QUERY_DATETIME = "2021-12-20 15:30:00"
+QUERY_MONTH = "2021-12"
+QUERY_DATE = "2021-12-31"
+QUERY_CATEGORY = "Супермаркеты"
+USER_SETTINGS: Dict[str, Any] = {"user_currencies": ["USD", "EUR"], "user_stocks": ["AAPL", "AMZN", "GOOGL"]}
+
+
+def stub_market_data(currencies: List[str], stocks: List[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Возвращает фиксированные курсы валют и цены акций вместо обращения к API."""
+    return (
+        [{"currency": currency, "rate": 1.0} for currency in currencies],
+        [{"stock": stock, "price": 100.0} for stock in stocks],
+    )
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> Tuple[float, float]:
+    """Возвращает лучшее время выполнения в секундах и пиковый объем выделенной памяти в мегабайтах."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+
+    # Память измеряется отдельным прогоном: tracemalloc замедляет выполнение и исказил бы время
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak / 2**20
+
+
+def entry_points(path: str) -> Dict[str, Callable[[], Any]]:
+    """Возвращает замеряемые точки входа для файла выгрузки."""
+    df = read_excel_data(path)
+    if df is None:
+        raise ValueError(f"Не удалось прочитать выгрузку {path}.")
+    return {
+        "read_excel_data": lambda: read_excel_data(path, use_cache=False),
+        "read_excel_data (кеш)": lambda: read_excel_data(path),
+        "generate_response": lambda: generate_response(QUERY_DATETIME, USER_SETTINGS, df),
+        "investment_bank": lambda: investment_bank(QUERY_MONTH, df, 50),
+        "spending_by_category": lambda: spending_by_category(df, QUERY_CATEGORY, QUERY_DATE, save_report=False),
+    }
+
+
+def run_suite(sizes: List[int], seed: int = 0, repeat: int = 3, work_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Генерирует выгрузки заданных размеров и замеряет точки входа с подмененными рыночными данными."""
+    own_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="bench_suite_")
+    previous_cache_dir = os.environ.get("TRANSACTIONS_CACHE_DIR")
+    os.environ["TRANSACTIONS_CACHE_DIR"] = os.path.join(work_dir, "cache")
+
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        with mock.patch("src.views.fetch_market_data", side_effect=stub_market_data):
+            for rows in sizes:
+                path = os.path.join(work_dir, f"operations_{rows}.xlsx")
+                write_operations_xlsx(make_operations(rows, seed), path)
+                for name, func in entry_points(path).items():
+                    seconds, peak_mb = _measure(func, repeat)
+                    results[f"{name}@{rows}"] = {
+                        "rows": rows,
+                        "seconds": seconds,
+                        "rows_per_s": rows / seconds if seconds else float("inf"),
+                        "peak_mb": peak_mb,
+                    }
+    finally:
+        if previous_cache_dir is None:
+            os.environ.pop("TRANSACTIONS_CACHE_DIR", None)
+        else:
+            os.environ["TRANSACTIONS_CACHE_DIR"] = previous_cache_dir
+        if own_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "seed": seed,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Возвращает замеры, время которых выросло относительно базового больше чем на tolerance."""
+    regressions = []
+    for key, result in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if base and result["seconds"] > max(base["seconds"] * (1 + tolerance), base["seconds"] + MIN_DELTA):
+            regressions.append(key)
+    return regressions
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    """Читает файл базовых замеров или возвращает None, если его нет."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        baseline: Dict[str, Any] = json.load(f)
+    return baseline
+
+
+def save_baseline(report: Dict[str, Any], path: str) -> None:
+    """Сохраняет замеры как базовые для следующих запусков."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    """Печатает таблицу замеров и изменение времени относительно базовых."""
+    print(f"{'точка входа':<36} {'время, мс':>10} {'строк/с':>12} {'пик, МБ':>9} {'к базе':>8}")
+    for key, result in report["results"].items():
+        base = (baseline or {}).get("results", {}).get(key)
+        change = f"{result['seconds'] / base['seconds'] - 1:>+7.0%}" if base else f"{'-':>7}"
+        print(
+            f"{key:<36} {result['seconds'] * 1000:>10.1f} {result['rows_per_s']:>12,.0f} "
+            f"{result['peak_mb']:>9.1f} {change:>8}"
+        )
+
+
+def main() -> None:
+    """Замеряет время, пропускную способность и пиковую память точек входа на синтетических выгрузках."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Размеры выгрузки через запятую")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Файл базовых замеров")
+    parser.add_argument("--save-baseline", action="store_true", help="Сохранить замеры как базовые")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Допустимое замедление")
+    parser.add_argument("--output", help="Файл для сохранения замеров этого запуска")
+    args = parser.parse_args()
+
+    report = run_suite([int(size) for size in args.sizes.split(",")], args.seed, args.repeat)
+    baseline = load_baseline(args.baseline)
+    print_report(report, baseline)
+
+    if args.output:
+        save_baseline(report, args.output)
+    if args.save_baseline:
+        save_baseline(report, args.baseline)
+        print(f"Базовые замеры сохранены в {args.baseline}")
+    elif baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"Замедление больше {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from src.utils import fetch_market_data
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+# Процессы пула запускаются заново, а не копией родителя: к началу пакета у него уже работают потоки клиента
+# рыночных данных, пула соединений requests и записи отчетов, и их блокировки не должны достаться дочерним процессам
+POOL_START_METHOD = "spawn"
+
+MarketData = Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]
+
+
+def read_manifest(path: str) -> List[Dict[str, Any]]:
+    """Читает манифест заданий: JSON-список или JSONL с одним заданием в строке.
+
+    Задание содержит пути "transactions" и "settings" и запросы: "home_dates" (YYYY-MM-DD HH:MM:SS),
+    "months" (YYYY-MM) с лимитом "limit", "categories" с датой "category_date" (YYYY-MM-DD).
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    stripped = text.lstrip()
+    jobs = json.loads(text) if stripped.startswith("[") else [json.loads(line) for line in text.splitlines() if line]
+
+    for number, job in enumerate(jobs):
+        job.setdefault("id", str(number))
+        # Относительные пути считаются от каталога манифеста
+        for key in ("transactions", "settings"):
+            job[key] = os.path.join(base_dir, job[key])
+    return jobs
+
+
+def _read_settings(path: str) -> Dict[str, Any]:
+    """Читает настройки пользователя."""
+    with open(path, "r", encoding="utf-8") as f:
+        settings: Dict[str, Any] = json.load(f)
+    return settings
+
+
+def prefetch_market_data(settings: List[Dict[str, Any]]) -> MarketData:
+    """Получает курсы валют и цены акций один раз для объединения настроек всех пользователей."""
+    currencies = sorted({currency for item in settings for currency in item.get("user_currencies", [])})
+    stocks = sorted({stock for item in settings for stock in item.get("user_stocks", [])})
+    try:
+        return fetch_market_data(currencies, stocks)
+    except ValueError as e:
+        # Без ключей API отчеты все равно считаются, но без котировок
+        logging.error(f"Рыночные данные недоступны: {e}")
+        return [], []
+
+
+def market_data_for(settings: Dict[str, Any], market_data: MarketData) -> MarketData:
+    """Отбирает из общих рыночных данных курсы и цены, указанные в настройках пользователя."""
+    currencies, stocks = set(settings.get("user_currencies", [])), set(settings.get("user_stocks", []))
+    return (
+        [rate for rate in market_data[0] if rate.get("currency") in currencies],
+        [price for price in market_data[1] if price.get("stock") in stocks],
+    )
+
+
+def run_job(job: Dict[str, Any], market_data: MarketData) -> List[Dict[str, Any]]:
+    """Считает все запросы задания по одной загруженной выгрузке; выполняется в процессе пула."""
+    from src.fx import convert_from_settings
+    from src.loader import load_transactions
+    from src.reports import spending_by_category
+    from src.services import investment_bank
+    from src.store import TransactionStore
+    from src.views import generate_response
+
+    transactions = load_transactions(job["transactions"])
+    if transactions is None:
+        return [{"job": job["id"], "error": f"Не удалось загрузить данные о транзакциях из {job['transactions']}."}]
+    settings = _read_settings(job["settings"])
+    # Суммы пересчитываются в валюту отчета так же, как в сервере и командной строке
+    store = TransactionStore(convert_from_settings(transactions, settings))
+    user_market_data = market_data_for(settings, market_data)
+
+    results = []
+    for date in job.get("home_dates", []):
+        response = generate_response(date, settings, store, user_market_data)
+        results.append({"job": job["id"], "kind": "home", "query": date, "result": response})
+    limit = job.get("limit", 50)
+    for month in job.get("months", []):
+        saved = investment_bank(month, store, limit)
+        results.append({"job": job["id"], "kind": "invest", "query": month, "result": saved})
+    for category in job.get("categories", []):
+        report = spending_by_category(store, category, job.get("category_date"), save_report=False)
+        results.append({"job": job["id"], "kind": "category", "query": category, "result": report})
+    return results
+
+
+def _run_job_safely(job: Dict[str, Any], market_data: MarketData) -> List[Dict[str, Any]]:
+    """Выполняет задание, превращая ошибку в запись результата, чтобы она не останавливала пакет."""
+    try:
+        return run_job(job, market_data)
+    except Exception as e:
+        return [{"job": job.get("id"), "error": f"{type(e).__name__}: {e}"}]
+
+
+def run_batch(jobs: List[Dict[str, Any]], workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Распределяет задания по пулу процессов и возвращает результаты по мере готовности.
+
+    Рыночные данные получаются один раз в родительском процессе и передаются каждому заданию аргументом:
+    процессы пула к API не обращаются.
+    """
+    market_data = prefetch_market_data([_read_settings(job["settings"]) for job in jobs])
+
+    if workers == 1:
+        for job in jobs:
+            yield from _run_job_safely(job, market_data)
+        return
+
+    context = multiprocessing.get_context(POOL_START_METHOD)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [executor.submit(_run_job_safely, job, market_data) for job in jobs]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def write_jsonl(results: Iterator[Dict[str, Any]], output: IO[str]) -> int:
+    """Записывает результаты в JSONL по одному на строку и возвращает их количество."""
+    count = 0
+    for result in results:
+        output.write(json.dumps(result, ensure_ascii=False, default=float) + "\n")
+        output.flush()
+        count += 1
+    return count
+
+
+def main() -> None:
+    """Считает главную страницу, Инвесткопилку и отчеты по категориям для заданий манифеста в пуле процессов."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("manifest", help="Манифест заданий в формате JSON или JSONL")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов (по умолчанию — число ядер)")
+    parser.add_argument("--output", help="Файл JSONL для результатов (по умолчанию — стандартный вывод)")
+    args = parser.parse_args()
+
+    jobs = read_manifest(args.manifest)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            count = write_jsonl(run_batch(jobs, args.workers), f)
+    else:
+        count = write_jsonl(run_batch(jobs, args.workers), sys.stdout)
+    logging.info(f"Обработано заданий: {len(jobs)}, результатов: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+# Версия формата кеша: при изменении раскладки файлов старые записи игнорируются
+CACHE_FORMAT_VERSION = 2
+# Переменная окружения для переопределения каталога кеша
+CACHE_DIR_ENV = "TRANSACTIONS_CACHE_DIR"
+META_FILE = "meta.json"
+
+
+def default_cache_dir(file_path: str) -> str:
+    """Возвращает каталог кеша: из окружения или '.cache' рядом с исходным файлом."""
+    return os.getenv(CACHE_DIR_ENV) or os.path.join(os.path.dirname(os.path.abspath(file_path)), ".cache")
+
+
+def file_digest(file_path: str) -> str:
+    """Вычисляет хеш содержимого файла."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_columns(df: pd.DataFrame, directory: str) -> List[Dict[str, str]]:
+    """Сохраняет столбцы DataFrame в каталог в виде .npy и возвращает их описание для load_columns."""
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        if series.dtype == object:
+            codes, categories = pd.factorize(series, use_na_sentinel=True)
+            if not all(isinstance(value, str) for value in categories):
+                raise TypeError(f"столбец {name!r} содержит нестроковые значения")
+            # Словарь хранится строками фиксированной ширины, чтобы читать его без pickle
+            np.save(os.path.join(directory, f"{i}.codes.npy"), codes.astype(np.int32))
+            np.save(os.path.join(directory, f"{i}.categories.npy"), np.asarray(categories, dtype=object).astype(str))
+            kind = "object"
+        elif isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufmM":
+            np.save(os.path.join(directory, f"{i}.npy"), series.to_numpy())
+            kind = "numpy"
+        else:
+            raise TypeError(f"неподдерживаемый тип столбца {name!r}: {series.dtype}")
+        columns.append({"name": name, "kind": kind})
+    return columns
+
+
+def load_columns(directory: str, columns: List[Dict[str, str]]) -> pd.DataFrame:
+    """Загружает DataFrame из каталога, записанного save_columns; данные копируются в DataFrame."""
+    values: Dict[Any, Any] = {}
+    for i, column in enumerate(columns):
+        name, kind = column["name"], column["kind"]
+        if kind == "object":
+            # Строковые столбцы хранятся как коды и словарь уникальных значений
+            codes = np.load(os.path.join(directory, f"{i}.codes.npy"))
+            categories = np.load(os.path.join(directory, f"{i}.categories.npy"), allow_pickle=False)
+            decoded = categories.astype(object).take(codes) if len(categories) else np.empty(len(codes), dtype=object)
+            decoded[codes == -1] = np.nan
+            values[name] = decoded
+        else:
+            values[name] = np.load(os.path.join(directory, f"{i}.npy"), allow_pickle=False)
+    return pd.DataFrame(values, columns=[column["name"] for column in columns])
+
+
+def _entry_dir(file_path: str, cache_dir: Optional[str]) -> str:
+    """Возвращает каталог записи кеша для исходного файла."""
+    path = os.path.abspath(file_path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    path_key = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir or default_cache_dir(path), f"{name}-{path_key}")
+
+
+def _read_meta(entry_dir: str) -> Optional[Dict[str, Any]]:
+    """Читает метаданные записи кеша или возвращает None."""
+    try:
+        with open(os.path.join(entry_dir, META_FILE), "r", encoding="utf-8") as f:
+            meta: Dict[str, Any] = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_FORMAT_VERSION:
+        return None
+    return meta
+
+
+def _is_fresh(file_path: str, entry_dir: str, meta: Dict[str, Any]) -> bool:
+    """Проверяет, что запись кеша соответствует текущему состоянию исходного файла."""
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    if meta["path"] != path or meta["size"] != stat.st_size:
+        return False
+    if meta["mtime_ns"] == stat.st_mtime_ns:
+        return True
+
+    # Время изменения другое, но содержимое может совпадать (например, после копирования)
+    if file_digest(path) != meta["hash"]:
+        return False
+    meta["mtime_ns"] = stat.st_mtime_ns
+    with open(os.path.join(entry_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return True
+
+
+def load_cached_frame(file_path: str, cache_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Возвращает DataFrame из колоночного кеша или None, если кеш отсутствует или устарел."""
+    entry_dir = _entry_dir(file_path, cache_dir)
+    meta = _read_meta(entry_dir)
+    if meta is None:
+        return None
+
+    try:
+        if not _is_fresh(file_path, entry_dir, meta):
+            return None
+
+        return load_columns(entry_dir, meta["columns"])
+    except Exception as e:
+        logging.warning(f"Не удалось прочитать кеш {entry_dir}: {e}")
+        return None
+
+
+def store_cached_frame(file_path: str, df: pd.DataFrame, cache_dir: Optional[str] = None) -> bool:
+    """Сохраняет DataFrame в колоночный кеш для исходного файла."""
+    path = os.path.abspath(file_path)
+    entry_dir = _entry_dir(path, cache_dir)
+
+    try:
+        stat = os.stat(path)
+        meta: Dict[str, Any] = {
+            "version": CACHE_FORMAT_VERSION,
+            "path": path,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": file_digest(path),
+            "columns": [],
+        }
+
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(entry_dir))
+        try:
+            meta["columns"] = save_columns(df, tmp_dir)
+            with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+
+            # Атомарная замена старой записи новой
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logging.warning(f"Не удалось сохранить кеш для {path}: {e}")
+        return False
+
+    return True
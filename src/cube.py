@@ -0,0 +1,238 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.loader import FAILED, SPEND, normalize_transactions, partition_codes
+
+DATE_COLUMN = "Дата операции"
+# Измерения куба: день операции, карта, категория и раздел (списание, поступление, непроведенная операция)
+KEYS = ["day", "Номер карты", "Категория", "partition"]
+# Меры корзины куба
+MEASURES = ["sum", "abs_sum", "count"]
+# Столбцы, сохраняемые для самых крупных платежей дня
+TOP_COLUMNS = [DATE_COLUMN, "Номер карты", "Категория", "Описание", "Сумма платежа"]
+# Число крупнейших платежей, хранимых на каждый день
+DEFAULT_TOP_K = 10
+# Значение измерения для операций без карты или категории
+MISSING = ""
+
+# Платежи в виде массивов по столбцам: день, столбцы TOP_COLUMNS
+TopRows = Dict[str, np.ndarray]
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    """Возвращает текстовый столбец как object с заменой пропусков на MISSING."""
+    if name not in df.columns:
+        return pd.Series(MISSING, index=df.index, dtype=object)
+    return df[name].astype(object).where(df[name].notna(), MISSING)
+
+
+class AggregateCube:
+    """Агрегаты транзакций по корзинам (день, карта, категория, раздел) с обновлением только затронутых корзин."""
+
+    def __init__(self) -> None:
+        empty_index = pd.MultiIndex.from_arrays([[] for _ in KEYS], names=KEYS)
+        self.buckets = pd.DataFrame({measure: pd.Series(dtype="float64") for measure in MEASURES}, index=empty_index)
+        self._bucket_days = np.empty(0, dtype="datetime64[ns]")
+
+    @classmethod
+    def from_frame(cls, transactions: pd.DataFrame) -> "AggregateCube":
+        """Строит куб по таблице транзакций."""
+        cube = cls()
+        cube.append(transactions)
+        return cube
+
+    def append(self, transactions: pd.DataFrame) -> None:
+        """Добавляет транзакции в куб, пересчитывая только корзины, в которые они попали."""
+        df = normalize_transactions(transactions)
+        df = df[df[DATE_COLUMN].notna()]
+        if df.empty:
+            return
+
+        keys = pd.DataFrame(
+            {
+                "day": df[DATE_COLUMN].dt.floor("D"),
+                "Номер карты": _column(df, "Номер карты"),
+                "Категория": _column(df, "Категория"),
+                "partition": partition_codes(df),
+            },
+            index=df.index,
+        )
+        amounts = df["Сумма операции"]
+        measures = pd.DataFrame({"sum": amounts, "abs_sum": amounts.abs(), "count": 1.0}, index=df.index)
+        new = measures.groupby([keys[key] for key in KEYS], sort=True).sum()
+
+        # Существующие корзины дополняются на месте, новые — вставляются с сохранением порядка по дню
+        existing = new.index.isin(self.buckets.index)
+        if existing.any():
+            self.buckets.loc[new.index[existing], MEASURES] += new[existing].to_numpy()
+        if not existing.all():
+            self.buckets = pd.concat([self.buckets, new[~existing]]).sort_index(level="day", sort_remaining=True)
+            self._bucket_days = self.buckets.index.get_level_values("day").to_numpy(dtype="datetime64[ns]")
+
+    def buckets_between(self, first_day: datetime, stop_day: datetime) -> pd.DataFrame:
+        """Возвращает корзины дней из полуинтервала [first_day, stop_day)."""
+        lo, hi = self._bucket_days.searchsorted([np.datetime64(first_day, "ns"), np.datetime64(stop_day, "ns")])
+        return self.buckets.iloc[lo:hi]
+
+    def spend_between(self, first_day: datetime, stop_day: datetime) -> pd.DataFrame:
+        """Возвращает корзины проведенных списаний дней из полуинтервала [first_day, stop_day)."""
+        buckets = self.buckets_between(first_day, stop_day)
+        return buckets[buckets.index.get_level_values("partition") == SPEND]
+
+
+def _codes(df: pd.DataFrame, name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Возвращает коды значений текстового столбца (-1 — пропуск) и сами значения."""
+    if name not in df.columns:
+        return np.full(len(df), -1, dtype=np.int64), np.empty(0, dtype=object)
+    column = df[name]
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories.to_numpy(dtype=object)
+    codes, values = pd.factorize(column)
+    return codes, np.asarray(values, dtype=object)
+
+
+def top_rows(df: pd.DataFrame, positions: np.ndarray) -> TopRows:
+    """Возвращает платежи строк positions с известной датой и суммой в виде массивов по столбцам."""
+    dates = df[DATE_COLUMN].to_numpy(dtype="datetime64[ns]")[positions]
+    amounts = df["Сумма платежа"].to_numpy(dtype="float64")[positions]
+    valid = ~np.isnat(dates) & ~np.isnan(amounts)
+    positions = positions[valid]
+    rows = {"day": dates[valid].astype("datetime64[D]").astype("datetime64[ns]"), DATE_COLUMN: dates[valid]}
+    for name in ("Номер карты", "Категория", "Описание"):
+        # Значения берутся по кодам category только для выбранных строк; код -1 указывает на пропуск в конце,
+        # как в выборках из DataFrame и SQLite
+        codes, values = _codes(df, name)
+        rows[name] = np.append(values, np.nan)[codes[positions]]
+    rows["Сумма платежа"] = amounts[valid]
+    return rows
+
+
+def _head(keys: List[np.ndarray], k: int) -> np.ndarray:
+    """Возвращает маску первых k строк каждой группы; строки упорядочены по ключам групп."""
+    change = np.zeros(len(keys[0]), dtype=bool)
+    change[:1] = True
+    for key in keys:
+        change[1:] |= key[1:] != key[:-1]
+    positions = np.arange(len(change))
+    first = np.maximum.accumulate(np.where(change, positions, 0))
+    mask: np.ndarray = positions - first < k
+    return mask
+
+
+def _take(rows: TopRows, positions: Union[slice, np.ndarray]) -> TopRows:
+    """Возвращает выбранные платежи."""
+    return {name: values[positions] for name, values in rows.items()}
+
+
+def _concat(parts: List[TopRows]) -> TopRows:
+    """Объединяет наборы платежей."""
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def largest(parts: List[TopRows], n: int) -> TopRows:
+    """Возвращает n крупнейших платежей из нескольких наборов по убыванию суммы."""
+    rows = _concat(parts) if len(parts) > 1 else parts[0]
+    amounts = rows["Сумма платежа"]
+    if len(amounts) > n:
+        # Частичная сортировка: упорядочиваются только n выбранных платежей
+        positions = np.argpartition(-amounts, n - 1)[:n]
+        return _take(rows, positions[np.argsort(-amounts[positions], kind="stable")])
+    return _take(rows, np.argsort(-amounts, kind="stable"))
+
+
+class DailyTopIndex:
+    """K крупнейших проведенных платежей каждого дня по всем картам и по каждой карте отдельно.
+
+    Платежи хранятся массивами, упорядоченными по дню и по убыванию суммы внутри дня, поэтому top-N любого
+    окна целых дней (N не больше K) собирается из K платежей на день за время, пропорциональное числу дней,
+    а не строк. При дозагрузке пересчитываются только дни, в которые попали новые платежи.
+    """
+
+    def __init__(self, k: int = DEFAULT_TOP_K) -> None:
+        self.k = k
+        self.days = self._empty()
+        self.cards: Dict[str, TopRows] = {}
+
+    @staticmethod
+    def _empty() -> TopRows:
+        empty = pd.DataFrame({DATE_COLUMN: pd.Series(dtype="datetime64[ns]"), "Сумма платежа": []})
+        return top_rows(empty, np.empty(0, dtype=np.intp))
+
+    @classmethod
+    def from_frame(cls, transactions: pd.DataFrame, k: int = DEFAULT_TOP_K) -> "DailyTopIndex":
+        """Строит индекс по таблице транзакций."""
+        index = cls(k)
+        index.append(transactions)
+        return index
+
+    def append(self, transactions: pd.DataFrame) -> None:
+        """Добавляет транзакции, пересчитывая списки только затронутых дней."""
+        df = normalize_transactions(transactions)
+        if "Сумма платежа" not in df.columns:
+            return
+        dates = df[DATE_COLUMN].to_numpy(dtype="datetime64[ns]")
+        amounts = df["Сумма платежа"].to_numpy(dtype="float64")
+        # Непроведенные операции в крупнейшие платежи не попадают
+        valid = np.flatnonzero(~np.isnat(dates) & ~np.isnan(amounts) & (partition_codes(df) != FAILED))
+        if not len(valid):
+            return
+
+        # Одна сортировка по дню и убыванию суммы; до объединения со списками остаются K платежей на день
+        order = valid[np.lexsort((-amounts[valid], dates[valid].astype("datetime64[D]")))]
+        days = dates[order].astype("datetime64[D]")
+        self.days = self._merge(self.days, top_rows(df, order[_head([days], self.k)]))
+
+        # Стабильная сортировка по карте сохраняет порядок по дню и сумме внутри карты
+        codes, cards = _codes(df, "Номер карты")
+        by_card = np.argsort(codes[order], kind="stable")
+        order, days, card_codes = order[by_card], days[by_card], codes[order][by_card]
+        keep = _head([card_codes, days], self.k) & (card_codes >= 0)
+        order, card_codes = order[keep], card_codes[keep]
+        # Цикл идет по картам, а не по строкам: платежи каждой карты объединяются одним проходом
+        bounds = np.append(np.flatnonzero(np.r_[True, card_codes[1:] != card_codes[:-1]]), len(card_codes))
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if lo < hi:
+                card = str(cards[card_codes[lo]])
+                self.cards[card] = self._merge(self.cards.get(card, self._empty()), top_rows(df, order[lo:hi]))
+
+    def _merge(self, current: TopRows, new: TopRows) -> TopRows:
+        """Объединяет списки дней с новыми платежами и оставляет по K крупнейших на день."""
+        affected = np.isin(current["day"], np.unique(new["day"]))
+        candidates = _concat([_take(current, affected), new])
+        order = np.lexsort((-candidates["Сумма платежа"], candidates["day"]))
+        best = _take(candidates, order[_head([candidates["day"][order]], self.k)])
+
+        # Каждый день берется целиком из одного источника, поэтому стабильная сортировка по дню
+        # сохраняет убывание сумм внутри дня
+        merged = _concat([_take(current, ~affected), best])
+        return _take(merged, np.argsort(merged["day"], kind="stable"))
+
+    def top(self, first_day: datetime, stop_day: datetime, n: int, card: Optional[str] = None) -> TopRows:
+        """Возвращает n крупнейших платежей дней из полуинтервала [first_day, stop_day), при необходимости — карты."""
+        if n > self.k:
+            raise ValueError(f"Индекс хранит только {self.k} платежей на день, запрошено {n}.")
+        rows = self.days if card is None else self.cards.get(card, self._empty())
+        lo, hi = rows["day"].searchsorted([np.datetime64(first_day, "ns"), np.datetime64(stop_day, "ns")])
+        return largest([_take(rows, slice(lo, hi))], n)
+
+
+def card_totals(rows: pd.DataFrame) -> pd.Series:
+    """Возвращает сумму модулей операций по каждой карте."""
+    cards = _column(rows, "Номер карты")
+    totals = rows["Сумма операции"].abs().groupby(cards, sort=True).sum()
+    return totals[totals.index != MISSING]
+
+
+def format_cards(totals: pd.Series, cashback: Optional[pd.Series] = None) -> List[Dict[str, Any]]:
+    """Формирует блок карт главной страницы: потраченная сумма и кешбэк (по правилам или 1%)."""
+    return [
+        {
+            "last_digits": card,
+            "total_spent": round(float(total), 2),
+            "cashback": round(float(total) * 0.01 if cashback is None else float(cashback.get(card, 0.0)), 2),
+        }
+        for card, total in totals.items()
+    ]
@@ -0,0 +1,321 @@
+import argparse
+import logging
+import os
+import tempfile
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import span
+from src.loader import NORMALIZED_ATTR, normalize_transactions
+from src.store import DATE_COLUMN
+from src.utils import PROJECT_ROOT, get_market_data_client, read_excel_data
+
+if TYPE_CHECKING:
+    from src.market_data import MarketDataClient
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_FX_PATH = os.path.join(PROJECT_ROOT, "data", "fx_rates.csv")
+DEFAULT_BASE = "RUB"
+# Курс действует до следующей даты таблицы, но не дольше MAX_RATE_AGE дней (выходные, праздники)
+MAX_RATE_AGE = 7
+# APIlayer отдает историю не более чем за 365 дней в одном запросе
+TIMESERIES_MAX_DAYS = 365
+# Денежные столбцы выгрузки и столбец валюты, в которой они указаны
+CURRENCY_AMOUNTS = {
+    "Валюта операции": ["Сумма операции", "Сумма операции с округлением"],
+    "Валюта платежа": ["Сумма платежа", "Кэшбэк", "Округление на инвесткопилку"],
+}
+RATE_COLUMNS = ["date", "currency", "rate"]
+# Диапазоны дат, уже запрошенные из APIlayer для валюты: курсов, которых не было в ответе, нет и при повторе
+ATTEMPTED_COLUMNS = ["currency", "start", "end"]
+
+MissingRange = Tuple[date, date, List[str]]
+
+
+def _read_rates(path: str) -> pd.DataFrame:
+    """Читает курсы из CSV-файла со столбцами date, currency, rate."""
+    rates = pd.read_csv(path, usecols=RATE_COLUMNS, dtype={"currency": "object", "rate": "float64"})
+    rates["date"] = pd.to_datetime(rates["date"]).astype("datetime64[ns]")
+    return rates
+
+
+def attempted_path(path: str) -> str:
+    """Возвращает путь файла запрошенных диапазонов рядом с таблицей курсов."""
+    return os.path.splitext(path)[0] + ".attempted.csv"
+
+
+def _write_csv(df: pd.DataFrame, path: str) -> None:
+    """Атомарно записывает таблицу в CSV-файл."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".fx-", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+        df.to_csv(f, index=False, date_format="%Y-%m-%d")
+    os.replace(tmp_path, path)
+
+
+class FxRates:
+    """Локальная таблица исторических курсов: стоимость единицы валюты в базовой валюте на дату.
+
+    Таблица пополняется пакетно из файла или из APIlayer (один запрос на каждый недостающий диапазон дат)
+    и хранится в CSV-файле path. Курс на дату — последний известный курс не старше MAX_RATE_AGE дней.
+    Диапазоны, уже запрошенные из APIlayer, хранятся в соседнем файле и повторно не запрашиваются.
+    """
+
+    def __init__(self, path: Optional[str] = None, base: str = DEFAULT_BASE) -> None:
+        self.path = path
+        self.base = base
+        self.table = pd.DataFrame(
+            {
+                "date": pd.Series(dtype="datetime64[ns]"),
+                "currency": pd.Series(dtype=object),
+                "rate": pd.Series(dtype="float64"),
+            }
+        )
+        self.attempted = pd.DataFrame({name: pd.Series(dtype=object) for name in ATTEMPTED_COLUMNS})
+        self._series: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        if path is not None and os.path.exists(path):
+            self.add(_read_rates(path))
+        if path is not None and os.path.exists(attempted_path(path)):
+            attempted = pd.read_csv(attempted_path(path), usecols=ATTEMPTED_COLUMNS, dtype={"currency": "object"})
+            for name in ("start", "end"):
+                attempted[name] = [date.fromisoformat(value) for value in attempted[name]]
+            self.attempted = attempted
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def add(self, rates: pd.DataFrame) -> int:
+        """Добавляет курсы (date, currency, rate) с заменой курса на ту же дату; возвращает число новых строк."""
+        before = len(self.table)
+        rates = rates.assign(date=pd.to_datetime(rates["date"]).dt.normalize().astype("datetime64[ns]"))
+        table = pd.concat([self.table, rates[RATE_COLUMNS]], ignore_index=True)
+        table = table.dropna().drop_duplicates(subset=["currency", "date"], keep="last")
+        self.table = table.sort_values(["currency", "date"], kind="stable", ignore_index=True)
+        # Массивы поиска по валютам перестраиваются при следующем обращении
+        self._series = {}
+        return len(self.table) - before
+
+    def load_file(self, path: str) -> int:
+        """Добавляет курсы из CSV-файла со столбцами date, currency, rate."""
+        return self.add(_read_rates(path))
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Атомарно записывает таблицу курсов и запрошенные диапазоны в CSV-файлы."""
+        path = path or self.path
+        if path is None:
+            raise ValueError("Не задан файл для сохранения курсов.")
+        _write_csv(self.table, path)
+        if len(self.attempted):
+            _write_csv(self.attempted, attempted_path(path))
+
+    def mark_attempted(self, currencies: List[str], start: date, end: date) -> None:
+        """Запоминает, что курсы валют за диапазон уже запрошены.
+
+        Последние MAX_RATE_AGE дней не запоминаются: курс за них может появиться позже.
+        """
+        end = min(end, date.today() - timedelta(days=MAX_RATE_AGE))
+        if end < start:
+            return
+        rows = pd.DataFrame({"currency": currencies, "start": start, "end": end}, columns=ATTEMPTED_COLUMNS)
+        self.attempted = pd.concat([self.attempted, rows], ignore_index=True) if len(self.attempted) else rows
+
+    def _lookup(self, currency: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Возвращает отсортированные даты (datetime64[D]) и курсы валюты."""
+        if currency not in self._series:
+            rows = self.table[self.table["currency"] == currency]
+            self._series[currency] = (
+                rows["date"].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]"),
+                rows["rate"].to_numpy(dtype="float64"),
+            )
+        return self._series[currency]
+
+    def _asof(self, currency: str, days: np.ndarray) -> np.ndarray:
+        """Возвращает курс валюты на каждый день days или NaN, если подходящего курса нет."""
+        if currency == self.base:
+            return np.ones(len(days))
+        known_days, known_rates = self._lookup(currency)
+        result = np.full(len(days), np.nan)
+        if not len(known_days):
+            return result
+        # Двоичный поиск последней известной даты не позже дня; NaT сортируется в конец и не находит курс
+        position = np.searchsorted(known_days, days, side="right") - 1
+        found = (position >= 0) & (days - known_days[np.maximum(position, 0)] <= np.timedelta64(MAX_RATE_AGE, "D"))
+        result[found] = known_rates[position[found]]
+        return result
+
+    def rates_for(self, currencies: pd.Series, dates: pd.Series) -> np.ndarray:
+        """Возвращает курс валюты каждой строки на ее дату; строки без валюты считаются в базовой валюте."""
+        categorical = (
+            currencies if isinstance(currencies.dtype, pd.CategoricalDtype) else currencies.astype("category")
+        )
+        codes = categorical.cat.codes.to_numpy()
+        days = dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        result = np.ones(len(codes))
+        # Цикл идет по валютам, а не по строкам: строки каждой валюты обрабатываются одним поиском
+        for code, currency in enumerate(categorical.cat.categories):
+            rows = np.flatnonzero(codes == code)
+            if len(rows):
+                result[rows] = self._asof(str(currency), days[rows])
+        return result
+
+    def missing_ranges(self, currencies: List[str], start: date, end: date) -> List[MissingRange]:
+        """Возвращает диапазоны дат, для которых нет курса хотя бы одной из валют, и валюты без курса в них."""
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+        foreign = [currency for currency in dict.fromkeys(currencies) if currency != self.base]
+        if not len(days) or not foreign:
+            return []
+        missing = np.array([np.isnan(self._asof(currency, days)) for currency in foreign])
+        # Дни уже запрошенных диапазонов не считаются недостающими, даже если курса за них нет
+        for currency, first_day, last_day in self.attempted.itertuples(index=False):
+            if currency in foreign:
+                attempted = (days >= np.datetime64(first_day, "D")) & (days <= np.datetime64(last_day, "D"))
+                missing[foreign.index(currency)] &= ~attempted
+
+        # Непрерывные отрезки дней без курса, разбитые на части не длиннее TIMESERIES_MAX_DAYS
+        any_missing = missing.any(axis=0)
+        edges = np.flatnonzero(np.diff(np.concatenate([[False], any_missing, [False]]).astype(np.int8)))
+        ranges: List[MissingRange] = []
+        for first, stop in zip(edges[::2], edges[1::2]):
+            for chunk in range(first, stop, TIMESERIES_MAX_DAYS):
+                chunk_stop = min(chunk + TIMESERIES_MAX_DAYS, stop)
+                symbols = [currency for currency, row in zip(foreign, missing) if row[chunk:chunk_stop].any()]
+                ranges.append((days[chunk].item(), days[chunk_stop - 1].item(), symbols))
+        return ranges
+
+    def fetch_missing(self, client: "MarketDataClient", currencies: List[str], start: date, end: date) -> int:
+        """Загружает из APIlayer курсы недостающих диапазонов дат; возвращает число запросов."""
+        ranges = self.missing_ranges(currencies, start, end)
+        for first, last, symbols in ranges:
+            timeseries = client.get_timeseries(first.isoformat(), last.isoformat(), self.base, symbols)
+            if timeseries is None:
+                # Ошибка запроса может быть временной: диапазон запрашивается снова при следующей загрузке
+                continue
+            self.mark_attempted(symbols, first, last)
+            if not timeseries:
+                continue
+            # APIlayer возвращает единицы валюты за единицу базовой валюты, таблица хранит обратный курс
+            rows = [
+                (day, currency, 1.0 / float(value))
+                for day, values in timeseries.items()
+                for currency, value in values.items()
+                if value
+            ]
+            self.add(pd.DataFrame(rows, columns=RATE_COLUMNS))
+        if ranges and self.path is not None:
+            self.save()
+        return len(ranges)
+
+
+def _currencies(df: pd.DataFrame) -> List[str]:
+    """Возвращает валюты, встречающиеся в столбцах валют выгрузки."""
+    found: Dict[str, None] = {}
+    for column in CURRENCY_AMOUNTS:
+        if column in df.columns:
+            found.update(dict.fromkeys(str(value) for value in df[column].dropna().unique()))
+    return list(found)
+
+
+def _constant_currency(currency: str, rows: int) -> "pd.Categorical[str]":
+    """Возвращает столбец category из одной валюты без построения массива строк."""
+    return pd.Categorical.from_codes(np.zeros(rows, dtype=np.int8), categories=pd.Index([currency]))
+
+
+def convert_transactions(
+    transactions: pd.DataFrame,
+    rates: FxRates,
+    currency: Optional[str] = None,
+    client: Optional["MarketDataClient"] = None,
+) -> pd.DataFrame:
+    """Пересчитывает денежные столбцы выгрузки в валюту отчета по курсам на дату операции.
+
+    Если передан клиент, недостающие курсы сначала загружаются из APIlayer. Суммы без курса становятся NaN.
+    Исходный DataFrame не изменяется.
+    """
+    currency = currency or rates.base
+    df = normalize_transactions(transactions)
+    with span("convert_transactions") as stage:
+        stage.rows = len(df)
+        dates = df[DATE_COLUMN]
+        if client is not None and dates.notna().any():
+            rates.fetch_missing(client, _currencies(df) + [currency], dates.min().date(), dates.max().date())
+
+        target = rates.rates_for(pd.Series(_constant_currency(currency, len(df))), dates)
+        columns: Dict[str, Any] = {}
+        for currency_column, amount_columns in CURRENCY_AMOUNTS.items():
+            if currency_column not in df.columns:
+                continue
+            factor = rates.rates_for(df[currency_column], dates) / target
+            for name in amount_columns:
+                if name in df.columns:
+                    columns[name] = df[name].to_numpy(dtype="float64") * factor
+            unconverted = int((np.isnan(factor) & df[amount_columns[0]].notna().to_numpy()).sum())
+            if unconverted:
+                logging.warning(f"Нет курса для {unconverted} строк столбца '{amount_columns[0]}'.")
+            columns[currency_column] = _constant_currency(currency, len(df))
+
+        # Столбец разделов не пересчитывается: курс не меняет знак суммы, а строка без курса сохраняет
+        # направление исходной суммы
+        converted = df.assign(**columns)
+        converted.attrs[NORMALIZED_ATTR] = True
+        return converted
+
+
+def convert_from_settings(transactions: pd.DataFrame, user_settings: Dict[str, Any]) -> pd.DataFrame:
+    """Пересчитывает выгрузку в валюту из ключа report_currency настроек пользователя.
+
+    Курсы берутся из файла в ключе fx_rates (по умолчанию data/fx_rates.csv) и дополняются из APIlayer.
+    Клиент APIlayer создается, только если в таблице не хватает курсов, поэтому без ключей API выгрузка
+    пересчитывается по локальной таблице. Без ключа report_currency выгрузка возвращается без изменений.
+    """
+    currency = user_settings.get("report_currency")
+    if currency is None:
+        return transactions
+    rates = FxRates(user_settings.get("fx_rates", DEFAULT_FX_PATH))
+    df = normalize_transactions(transactions)
+    dates = df[DATE_COLUMN].dropna()
+    missing = not dates.empty and rates.missing_ranges(
+        _currencies(df) + [currency], dates.min().date(), dates.max().date()
+    )
+    return convert_transactions(df, rates, currency, client=get_market_data_client() if missing else None)
+
+
+def main() -> None:
+    """Пополняет локальную таблицу курсов из файла или APIlayer за период выгрузки или заданные даты."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rates", default=DEFAULT_FX_PATH, help="CSV-файл таблицы курсов")
+    parser.add_argument("--load", help="CSV-файл курсов (date, currency, rate) для пакетной загрузки")
+    parser.add_argument("--transactions", help="Файл выгрузки: загрузить курсы ее валют за ее период")
+    parser.add_argument("--currencies", default="USD,EUR", help="Валюты через запятую")
+    parser.add_argument("--start", help="Начало периода, YYYY-MM-DD")
+    parser.add_argument("--end", default=date.today().isoformat(), help="Конец периода, YYYY-MM-DD")
+    args = parser.parse_args()
+
+    rates = FxRates(args.rates)
+    if args.load:
+        logging.info(f"Загружено {rates.load_file(args.load)} курсов из {args.load}")
+        rates.save()
+
+    currencies = args.currencies.split(",")
+    start, end = date.fromisoformat(args.start) if args.start else None, date.fromisoformat(args.end)
+    if args.transactions:
+        df = read_excel_data(args.transactions)
+        if df is None:
+            raise SystemExit(f"Не удалось прочитать выгрузку {args.transactions}.")
+        dates = normalize_transactions(df)[DATE_COLUMN].dropna()
+        currencies, start, end = _currencies(df), dates.min().date(), dates.max().date()
+    elif start is None and not args.load:
+        # Без периода загружается последний год
+        start = end - timedelta(days=TIMESERIES_MAX_DAYS - 1)
+    if start is not None:
+        requests = rates.fetch_missing(get_market_data_client(), currencies, start, end)
+        logging.info(f"Запросов к APIlayer: {requests}, курсов в таблице: {len(rates)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.cache import load_columns, save_columns
+from src.cube import MISSING
+from src.loader import CATEGORY_COLUMNS, normalize_transactions
+from src.utils import read_excel_data
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+# Версия формата хранилища: при изменении раскладки файлов старые хранилища не читаются
+INGEST_FORMAT_VERSION = 2
+MANIFEST_FILE = "manifest.json"
+FINGERPRINTS_FILE = "fingerprints.npy"
+# Поля, по которым строка выгрузки считается той же операцией
+FINGERPRINT_COLUMNS = ["Дата операции", "Номер карты", "Сумма операции", "Описание", "MCC"]
+# Значение для пропусков в числовых полях отпечатка
+NA_CODE = np.iinfo(np.int64).min
+
+
+class IngestResult(NamedTuple):
+    """Итог загрузки выгрузки: добавленные строки, число повторов и затронутые диапазоны дат."""
+
+    rows: pd.DataFrame
+    duplicates: int
+    changed_ranges: List[Tuple[datetime, datetime]]
+
+    @property
+    def new_rows(self) -> int:
+        """Количество добавленных строк."""
+        return len(self.rows)
+
+
+def _text_key(df: pd.DataFrame, name: str) -> pd.Series:
+    """Возвращает текстовое поле отпечатка с заменой пропусков на MISSING."""
+    if name not in df.columns:
+        return pd.Series(MISSING, index=df.index, dtype=object)
+    return df[name].astype(object).where(df[name].notna(), MISSING).astype(str)
+
+
+def _number_key(df: pd.DataFrame, name: str, scale: int) -> np.ndarray:
+    """Возвращает числовое поле отпечатка целым числом с точностью 1/scale."""
+    if name not in df.columns:
+        return np.full(len(df), NA_CODE, dtype=np.int64)
+    values = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype="float64")
+    missing = np.isnan(values)
+    keys = np.round(np.where(missing, 0, values) * scale).astype(np.int64)
+    keys[missing] = NA_CODE
+    return keys
+
+
+def row_fingerprints(transactions: pd.DataFrame) -> np.ndarray:
+    """Вычисляет устойчивые отпечатки строк выгрузки по полям FINGERPRINT_COLUMNS.
+
+    Одинаковые операции внутри выгрузки различаются порядковым номером повтора, поэтому две покупки
+    на одну сумму в одну секунду остаются двумя строками, а повторная загрузка файла ничего не добавляет.
+    """
+    df = normalize_transactions(transactions)
+    keys = pd.DataFrame(
+        {
+            "date": df["Дата операции"].to_numpy(dtype="datetime64[ns]").view(np.int64),
+            "card": _text_key(df, "Номер карты").to_numpy(),
+            "amount": _number_key(df, "Сумма операции", 100),
+            "description": _text_key(df, "Описание").to_numpy(),
+            "mcc": _number_key(df, "MCC", 1),
+        }
+    )
+    # hash_pandas_object использует фиксированный ключ, поэтому отпечатки совпадают между запусками
+    base = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    occurrence = pd.Series(base).groupby(base, sort=False).cumcount().to_numpy(dtype=np.uint64)
+    fingerprints: np.ndarray = pd.util.hash_pandas_object(
+        pd.DataFrame({"base": base, "occurrence": occurrence}), index=False
+    ).to_numpy()
+    return fingerprints
+
+
+def changed_ranges(dates: pd.Series) -> List[Tuple[datetime, datetime]]:
+    """Сворачивает даты новых операций в диапазоны подряд идущих дней [первый день, последний день]."""
+    days = np.unique(dates.dropna().to_numpy(dtype="datetime64[D]"))
+    if not len(days):
+        return []
+    breaks = np.flatnonzero(np.diff(days) > np.timedelta64(1, "D")) + 1
+    starts, ends = days[np.concatenate([[0], breaks])], days[np.concatenate([breaks - 1, [len(days) - 1]])]
+    return [
+        (pd.Timestamp(start).to_pydatetime(), pd.Timestamp(end).to_pydatetime()) for start, end in zip(starts, ends)
+    ]
+
+
+class IngestStore:
+    """Локальное хранилище транзакций, пополняемое новыми выгрузками без повторной загрузки истории.
+
+    Каждая загрузка добавляет сегмент только с ранее не встречавшимися строками; отпечатки строк
+    сегмента хранятся отсортированными, поэтому проверка новой выгрузки стоит O(m log n) без чтения истории.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "segments"), exist_ok=True)
+        self.manifest = self._read_manifest()
+        self._remove_orphans()
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        """Читает описание сегментов хранилища."""
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {"version": INGEST_FORMAT_VERSION, "segments": [], "next_segment": 1}
+        with open(path, "r", encoding="utf-8") as f:
+            manifest: Dict[str, Any] = json.load(f)
+        if manifest.get("version") != INGEST_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия хранилища {self.directory}: {manifest.get('version')}")
+        return manifest
+
+    def _remove_orphans(self) -> None:
+        """Удаляет каталоги сегментов, которых нет в описании.
+
+        Такие каталоги остаются, если процесс завершился между публикацией сегмента и записью описания
+        или между записью описания и удалением старых сегментов при compact. Строки сегмента, не попавшего
+        в описание, не считаются сохраненными и добавляются следующей загрузкой той же выгрузки.
+        """
+        listed = {segment["name"] for segment in self.manifest["segments"]}
+        segments_dir = os.path.join(self.directory, "segments")
+        for name in os.listdir(segments_dir):
+            if name not in listed:
+                logging.warning(f"Удаляется сегмент {name}, отсутствующий в описании хранилища {self.directory}")
+                shutil.rmtree(os.path.join(segments_dir, name), ignore_errors=True)
+
+    def _write_manifest(self) -> None:
+        """Атомарно записывает описание сегментов."""
+        fd, tmp_path = tempfile.mkstemp(prefix=".manifest-", dir=self.directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(self.directory, MANIFEST_FILE))
+
+    def _segment_dir(self, name: str) -> str:
+        return os.path.join(self.directory, "segments", name)
+
+    def __len__(self) -> int:
+        return sum(segment["rows"] for segment in self.manifest["segments"])
+
+    def seen(self, fingerprints: np.ndarray) -> np.ndarray:
+        """Возвращает маску отпечатков, уже сохраненных в хранилище."""
+        mask = np.zeros(len(fingerprints), dtype=bool)
+        for segment in self.manifest["segments"]:
+            stored = np.load(os.path.join(self._segment_dir(segment["name"]), FINGERPRINTS_FILE), mmap_mode="r")
+            if not len(stored):
+                continue
+            positions = np.minimum(stored.searchsorted(fingerprints), len(stored) - 1)
+            mask |= stored[positions] == fingerprints
+        return mask
+
+    def _write_segment(self, df: pd.DataFrame, fingerprints: np.ndarray, source: Optional[str]) -> Dict[str, Any]:
+        """Записывает сегмент: столбцы строк и их отсортированные отпечатки."""
+        name = f"{self.manifest['next_segment']:06d}"
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.join(self.directory, "segments"))
+        try:
+            # Категориальные столбцы сохраняются как строки, даты и суммы — уже приведенными
+            stored = df.assign(
+                **{column: df[column].astype(object) for column in CATEGORY_COLUMNS if column in df.columns}
+            ).reset_index(drop=True)
+            columns = save_columns(stored, tmp_dir)
+            np.save(os.path.join(tmp_dir, FINGERPRINTS_FILE), np.sort(fingerprints))
+            os.replace(tmp_dir, self._segment_dir(name))
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        dates = df["Дата операции"].dropna()
+        return {
+            "name": name,
+            "rows": len(df),
+            "columns": columns,
+            "source": source,
+            "ingested_at": datetime.now().isoformat(timespec="seconds"),
+            "min_date": dates.min().isoformat() if len(dates) else None,
+            "max_date": dates.max().isoformat() if len(dates) else None,
+        }
+
+    def ingest(self, source: Union[str, pd.DataFrame]) -> IngestResult:
+        """Добавляет из выгрузки только новые строки и возвращает их вместе с затронутыми диапазонами дат."""
+        if isinstance(source, str):
+            raw = read_excel_data(source)
+            if raw is None:
+                raise ValueError(f"Не удалось прочитать выгрузку {source}.")
+            source_name: Optional[str] = os.path.abspath(source)
+        else:
+            raw, source_name = source, None
+
+        df = normalize_transactions(raw)
+        fingerprints = row_fingerprints(df)
+        new = ~self.seen(fingerprints)
+        rows = df[new]
+
+        ranges = changed_ranges(rows["Дата операции"])
+        if len(rows):
+            segment = self._write_segment(rows, fingerprints[new], source_name)
+            segment["changed_ranges"] = [[start.date().isoformat(), end.date().isoformat()] for start, end in ranges]
+            self.manifest["segments"].append(segment)
+            self.manifest["next_segment"] += 1
+            self._write_manifest()
+
+        logging.info(f"Загружено новых строк: {len(rows)}, повторов: {int((~new).sum())}")
+        return IngestResult(rows, int((~new).sum()), ranges)
+
+    def load(self) -> pd.DataFrame:
+        """Возвращает все сохраненные транзакции одной нормализованной таблицей."""
+        frames = [
+            load_columns(self._segment_dir(segment["name"]), segment["columns"])
+            for segment in self.manifest["segments"]
+        ]
+        if not frames:
+            return normalize_transactions(pd.DataFrame(columns=FINGERPRINT_COLUMNS))
+        return normalize_transactions(pd.concat(frames, ignore_index=True))
+
+    def compact(self) -> None:
+        """Объединяет все сегменты в один, чтобы проверка новых строк просматривала один массив отпечатков."""
+        segments = self.manifest["segments"]
+        if len(segments) < 2:
+            return
+        df = self.load()
+        fingerprints = np.concatenate(
+            [np.load(os.path.join(self._segment_dir(segment["name"]), FINGERPRINTS_FILE)) for segment in segments]
+        )
+        merged = self._write_segment(df, fingerprints, None)
+        self.manifest["segments"] = [merged]
+        self.manifest["next_segment"] += 1
+        self._write_manifest()
+        for segment in segments:
+            shutil.rmtree(self._segment_dir(segment["name"]), ignore_errors=True)
+
+
+def main() -> None:
+    """Добавляет новые строки выгрузок в локальное хранилище и печатает затронутые диапазоны дат."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("store", help="Каталог хранилища")
+    parser.add_argument("exports", nargs="+", help="Файлы выгрузки")
+    parser.add_argument("--compact", action="store_true", help="Объединить сегменты после загрузки")
+    args = parser.parse_args()
+
+    store = IngestStore(args.store)
+    for path in args.exports:
+        result = store.ingest(path)
+        ranges = [[start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")] for start, end in result.changed_ranges]
+        print(
+            json.dumps({"file": path, "new_rows": result.new_rows, "duplicates": result.duplicates, "changed": ranges})
+        )
+    if args.compact:
+        store.compact()
+
+
+if __name__ == "__main__":
+    main()
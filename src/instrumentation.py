@@ -0,0 +1,194 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+# Переменные окружения: включение замеров, учет памяти и файл для выгрузки метрик при завершении процесса
+INSTRUMENTATION_ENV = "INSTRUMENTATION"
+INSTRUMENTATION_MEMORY_ENV = "INSTRUMENTATION_MEMORY"
+INSTRUMENTATION_EXPORT_ENV = "INSTRUMENTATION_EXPORT"
+# Префикс имен метрик в формате Prometheus
+METRIC_PREFIX = "transactions_span"
+# Количество последних замеров, хранимых для выгрузки в JSON
+MAX_RECORDS = 10_000
+
+_enabled = False
+# Список, в который собираются замеры текущего запроса (opt-in блок timings), и путь родительского этапа
+_collector: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("instrumentation_collector", default=None)
+_parent: ContextVar[str] = ContextVar("instrumentation_parent", default="")
+
+
+class Recorder:
+    """Накопитель замеров этапов: последние записи и суммарные показатели по каждому этапу."""
+
+    def __init__(self, max_records: int = MAX_RECORDS) -> None:
+        self.records: Deque[Dict[str, Any]] = deque(maxlen=max_records)
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Добавляет замер этапа."""
+        with self._lock:
+            self.records.append(record)
+            totals = self.totals.setdefault(
+                record["span"], {"calls": 0, "seconds": 0.0, "rows": 0, "alloc_bytes_max": 0}
+            )
+            totals["calls"] += 1
+            totals["seconds"] += record["wall_ms"] / 1000
+            totals["rows"] += record.get("rows") or 0
+            totals["alloc_bytes_max"] = max(totals["alloc_bytes_max"], record.get("alloc_bytes") or 0)
+
+    def clear(self) -> None:
+        """Удаляет накопленные замеры."""
+        with self._lock:
+            self.records.clear()
+            self.totals.clear()
+
+    def to_json(self) -> str:
+        """Возвращает замеры и суммарные показатели в JSON."""
+        with self._lock:
+            payload = {"spans": self.totals, "records": list(self.records)}
+        return json.dumps(payload, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """Возвращает суммарные показатели этапов в текстовом формате Prometheus."""
+        metrics = [
+            ("calls_total", "counter", "Количество выполнений этапа", "calls"),
+            ("seconds_total", "counter", "Суммарное время выполнения этапа, с", "seconds"),
+            ("rows_total", "counter", "Суммарное число обработанных строк", "rows"),
+            (
+                "alloc_bytes_max",
+                "gauge",
+                "Наибольший прирост выделенной памяти за выполнение, байт",
+                "alloc_bytes_max",
+            ),
+        ]
+        with self._lock:
+            totals = {name: dict(values) for name, values in self.totals.items()}
+
+        lines = []
+        for suffix, kind, description, key in metrics:
+            metric = f"{METRIC_PREFIX}_{suffix}"
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {kind}"]
+            lines += [f'{metric}{{span="{name}"}} {values[key]:g}' for name, values in sorted(totals.items())]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """Записывает метрики в файл: .prom и .txt — в формате Prometheus, иначе — в JSON."""
+        text = self.to_prometheus() if os.path.splitext(path)[1] in (".prom", ".txt") else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+recorder = Recorder()
+
+
+class _NullSpan:
+    """Пустой этап, который возвращается при выключенных замерах и ничего не записывает."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Замер этапа: время, число строк и прирост выделенной памяти по tracemalloc."""
+
+    def __init__(self, name: str, collector: Optional[List[Dict[str, Any]]]) -> None:
+        self.name = name
+        self.rows: Optional[int] = None
+        self._collector = collector
+
+    def __enter__(self) -> "Span":
+        parent = _parent.get()
+        self.path = f"{parent}/{self.name}" if parent else self.name
+        self._token = _parent.set(self.path)
+        self._memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        wall_ms = (time.perf_counter() - self._started) * 1000
+        _parent.reset(self._token)
+
+        record: Dict[str, Any] = {"span": self.path, "wall_ms": round(wall_ms, 3), "rows": self.rows}
+        if self._memory is not None and tracemalloc.is_tracing():
+            record["alloc_bytes"] = tracemalloc.get_traced_memory()[0] - self._memory
+        if self._collector is not None:
+            self._collector.append(record)
+        if _enabled:
+            recorder.add(record)
+            if "/" not in self.path:
+                logging.info(json.dumps(record, ensure_ascii=False))
+
+
+def span(name: str) -> Any:
+    """Возвращает замер этапа для with; при выключенных замерах — пустой объект без накладных расходов."""
+    collector = _collector.get()
+    if not _enabled and collector is None:
+        return _NULL_SPAN
+    return Span(name, collector)
+
+
+@contextmanager
+def collect() -> Iterator[List[Dict[str, Any]]]:
+    """Собирает замеры этапов внутри блока with в список, даже если общие замеры выключены."""
+    records: List[Dict[str, Any]] = []
+    token = _collector.set(records)
+    try:
+        yield records
+    finally:
+        _collector.reset(token)
+
+
+def enable(memory: bool = False) -> None:
+    """Включает запись замеров в общий накопитель; memory=True дополнительно запускает tracemalloc."""
+    global _enabled
+    _enabled = True
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    """Выключает запись замеров и останавливает tracemalloc."""
+    global _enabled
+    _enabled = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled() -> bool:
+    """Проверяет, включена ли запись замеров в общий накопитель."""
+    return _enabled
+
+
+def _configure_from_env() -> None:
+    """Включает замеры и выгрузку метрик при завершении процесса по переменным окружения."""
+    if os.getenv(INSTRUMENTATION_ENV, "").lower() in ("1", "true", "yes"):
+        enable(memory=os.getenv(INSTRUMENTATION_MEMORY_ENV, "").lower() in ("1", "true", "yes"))
+        export_path = os.getenv(INSTRUMENTATION_EXPORT_ENV)
+        if export_path:
+            atexit.register(recorder.export, export_path)
+
+
+_configure_from_env()
@@ -0,0 +1,147 @@
+import logging
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import span
+from src.utils import read_excel_data
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+# Форматы дат в выгрузке банка
+DATE_COLUMNS = {"Дата операции": "%d.%m.%Y %H:%M:%S", "Дата платежа": "%d.%m.%Y"}
+# Денежные столбцы, которые приводятся к float64
+AMOUNT_COLUMNS = [
+    "Сумма операции",
+    "Сумма платежа",
+    "Кэшбэк",
+    "Бонусы (включая кэшбэк)",
+    "Округление на инвесткопилку",
+    "Сумма операции с округлением",
+]
+# Текстовые столбцы с небольшим числом уникальных значений хранятся как category
+CATEGORY_COLUMNS = ["Номер карты", "Статус", "Валюта операции", "Валюта платежа", "Категория", "Описание"]
+# Признак уже нормализованной таблицы
+NORMALIZED_ATTR = "normalized"
+# Столбец нормализованной таблицы с разделом строки, размеченным один раз при нормализации
+PARTITION_COLUMN = "Раздел"
+# Статус успешно проведенной операции; операции без статуса тоже считаются проведенными
+SUCCESS_STATUS = "OK"
+# Разделы выгрузки: проведенные списания, проведенные поступления, непроведенные операции
+# и проведенные операции без суммы
+SPEND, INCOME, FAILED, NO_AMOUNT = 0, 1, 2, 3
+# Представления таблицы как наборы разделов
+VIEWS: Dict[str, Tuple[int, ...]] = {
+    "spend": (SPEND,),
+    "income": (INCOME,),
+    "failed": (FAILED,),
+    "no_amount": (NO_AMOUNT,),
+    "successful": (SPEND, INCOME, NO_AMOUNT),
+}
+
+
+def _parse_dates(column: pd.Series, date_format: str) -> pd.Series:
+    """Преобразует столбец дат в datetime64[ns], допуская ISO-формат наряду с форматом выгрузки."""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.astype("datetime64[ns]")
+
+    parsed = pd.to_datetime(column, format=date_format, errors="coerce")
+    missing = parsed.isna() & column.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(column[missing], format="mixed", dayfirst=True, errors="coerce")
+    return parsed.astype("datetime64[ns]")
+
+
+def _parse_amounts(column: pd.Series) -> pd.Series:
+    """Преобразует денежный столбец в float64, учитывая запятую как десятичный разделитель."""
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype("float64")
+    text = column.astype("string").str.replace(",", ".", regex=False)
+    return pd.to_numeric(text, errors="coerce").astype("float64")
+
+
+def is_normalized(df: pd.DataFrame) -> bool:
+    """Проверяет, что таблица уже прошла нормализацию."""
+    return bool(df.attrs.get(NORMALIZED_ATTR, False))
+
+
+def normalize_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    """Возвращает типизированную таблицу транзакций; исходный DataFrame не изменяется."""
+    if is_normalized(df):
+        return df
+
+    with span("normalize_transactions") as stage:
+        stage.rows = len(df)
+        columns = {}
+        with span("parse_dates"):
+            for name, date_format in DATE_COLUMNS.items():
+                if name in df.columns:
+                    columns[name] = _parse_dates(df[name], date_format)
+        with span("parse_amounts"):
+            for name in AMOUNT_COLUMNS:
+                if name in df.columns:
+                    columns[name] = _parse_amounts(df[name])
+        with span("categories"):
+            for name in CATEGORY_COLUMNS:
+                if name in df.columns:
+                    columns[name] = df[name].astype("category")
+
+        normalized = df.assign(**columns)
+        with span("partitions"):
+            normalized[PARTITION_COLUMN] = _classify(normalized)
+        normalized.attrs[NORMALIZED_ATTR] = True
+        return normalized
+
+
+def partition_codes(df: pd.DataFrame) -> np.ndarray:
+    """Возвращает раздел каждой строки: SPEND, INCOME, FAILED или NO_AMOUNT.
+
+    Строка со статусом, отличным от 'OK', — FAILED. Проведенная строка без 'Сумма платежа' и без 'Сумма операции'
+    — NO_AMOUNT: направление у нее неизвестно, поэтому она не входит ни в траты, ни в поступления. Остальные строки
+    делятся по знаку 'Сумма платежа', а при ее отсутствии — 'Сумма операции': в выгрузке банка списания отрицательны.
+    Строка без суммы платежа и без статуса — упрощенная запись траты с суммой операции без знака, она всегда SPEND.
+    Для нормализованной таблицы разделы берутся из столбца PARTITION_COLUMN без пересчета.
+    """
+    if is_normalized(df) and PARTITION_COLUMN in df.columns:
+        codes: np.ndarray = df[PARTITION_COLUMN].to_numpy()
+        return codes
+    return _classify(df)
+
+
+def _classify(df: pd.DataFrame) -> np.ndarray:
+    """Размечает разделы строк по статусу и знаку сумм (правила — в partition_codes)."""
+    signed = np.full(len(df), np.nan)
+    for name in ("Сумма операции", "Сумма платежа"):
+        if name in df.columns:
+            amounts = df[name].to_numpy(dtype="float64")
+            signed = np.where(np.isnan(amounts), signed, amounts)
+    spend = signed < 0
+    unsigned = np.ones(len(df), dtype=bool)
+    if "Сумма платежа" in df.columns:
+        unsigned &= df["Сумма платежа"].isna().to_numpy()
+    if "Статус" in df.columns:
+        status = df["Статус"]
+        unsigned &= status.isna().to_numpy()
+    codes = np.where(spend | unsigned, SPEND, INCOME).astype(np.int8)
+    codes[np.isnan(signed)] = NO_AMOUNT
+    if "Статус" in df.columns:
+        codes[(status.notna() & (status != SUCCESS_STATUS)).to_numpy()] = FAILED
+    return codes
+
+
+def in_view(codes: np.ndarray, view: str) -> np.ndarray:
+    """Возвращает маску строк, разделы которых входят в представление view."""
+    if view not in VIEWS:
+        raise ValueError(f"Неизвестное представление {view!r}: ожидается одно из {', '.join(VIEWS)}.")
+    return np.isin(codes, VIEWS[view])
+
+
+def load_transactions(file_path: str) -> Optional[pd.DataFrame]:
+    """Читает выгрузку и возвращает нормализованную таблицу транзакций или None."""
+    with span("load_transactions"):
+        df = read_excel_data(file_path)
+        if df is None:
+            return None
+        return normalize_transactions(df)
@@ -1,125 +1,239 @@
+import argparse
 import json
+import logging
+import sys
+import time
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, TextIO, Tuple, TypeVar
 
-from dotenv import load_dotenv
+from src.utils import DEFAULT_SETTINGS_PATH, DEFAULT_TRANSACTIONS_PATH
 
-from src.reports import spending_by_category
-from src.services import investment_bank
-from src.utils import read_excel_data
-from src.views import generate_response
+# pandas и модули отчетов импортируются при запуске команды, а не при импорте src.main
+if TYPE_CHECKING:
+    from src.store import TransactionStore
 
-# Загрузка переменных окружения из файла .env
-load_dotenv()
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
 
+# Допустимые лимиты округления Инвесткопилки
+INVEST_LIMITS = (10, 50, 100)
+QUERY_TYPES = ("home", "invest", "category")
 
-def main() -> None:
-    """Основная функция для запуска приложения."""
-    transactions_file_path: str = "../data/operations.xlsx"
-    user_settings_path: str = "../user_settings.json"
+T = TypeVar("T")
 
-    # Чтение данных
-    transactions_data = read_excel_data(transactions_file_path)
 
-    if transactions_data is None:
-        print("Не удалось загрузить данные о транзакциях.")
-        return
+def _parse_datetime(value: str) -> str:
+    """Проверяет дату и время в формате YYYY-MM-DD HH:MM:SS."""
+    datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    return value
 
-    # Получение пользовательских настроек
-    with open(user_settings_path, "r", encoding="utf-8") as f:
-        user_settings: Dict[str, Any] = json.load(f)
 
-    # Ввод даты и времени
-    while True:
-        input_datetime: str = input("Введите дату и время (YYYY-MM-DD HH:MM:SS): ")
-        try:
-            # Проверка формата даты и времени
-            datetime.strptime(input_datetime, "%Y-%m-%d %H:%M:%S")
-            break  # Выход из цикла, если ввод корректен
-        except ValueError:
-            print("Некорректный формат даты и времени. Пожалуйста, попробуйте снова.")
+def _parse_month(value: str) -> str:
+    """Проверяет месяц в формате YYYY-MM."""
+    datetime.strptime(value, "%Y-%m")
+    return value
 
-    # Обработка транзакций и вывод результата в формате JSON
-    result_json: Dict[str, Any] = generate_response(input_datetime, user_settings)
 
-    print(json.dumps(result_json, ensure_ascii=False, indent=4))
+def _parse_date(value: str) -> str:
+    """Проверяет дату в формате YYYY-MM-DD."""
+    datetime.strptime(value, "%Y-%m-%d")
+    return value
 
-    # Ввод месяца и лимита округления для Инвесткопилки
-    while True:
-        input_month: str = input("Введите месяц для расчета (YYYY-MM): ")
-        try:
-            # Проверка формата месяца
-            datetime.strptime(input_month, "%Y-%m")
-            break
-        except ValueError:
-            print("Некорректный формат месяца. Пожалуйста, используйте формат YYYY-MM.")
 
-    # Проверка на допустимый лимит
-    while True:
-        try:
-            limit: int = int(input("Введите лимит округления (10, 50 или 100): "))
+def _parse_limit(value: Any) -> int:
+    """Проверяет лимит округления: 10, 50 или 100."""
+    limit = int(value)
+    if limit not in INVEST_LIMITS:
+        raise ValueError(f"Недопустимый лимит {limit}: допустимы 10, 50 или 100.")
+    return limit
+
+
+def _argument(parse: Callable[[str], T], message: str) -> Callable[[str], T]:
+    """Превращает проверку значения в тип аргумента argparse с понятным сообщением об ошибке."""
 
-            if limit in [10, 50, 100]:
-                break
-            else:
-                print("Недопустимый лимит. Пожалуйста, выберите 10, 50 или 100.")
+    def convert(value: str) -> T:
+        try:
+            return parse(value)
         except ValueError:
-            print("Недопустимый лимит. Пожалуйста, выберите 10, 50 или 100.")
-
-    # Преобразование данных о транзакциях в список словарей
-    transactions = []
-    for index, row in transactions_data.iterrows():
-        transactions.append(
-            {
-                "Дата операции": row["Дата операции"],
-                "Сумма операции": row["Сумма операции"],
-            }
-        )
+            raise argparse.ArgumentTypeError(f"{message}: {value!r}")
 
-    # Вычисление суммы отложенной в 'Инвесткопилку'
-    saved_amount = investment_bank(input_month, transactions, limit)
+    return convert
 
-    # Печать результата отложенной суммы
-    print(f"Сумма отложенная в 'Инвесткопилку' за {input_month}: {saved_amount:.2f} ₽")
 
-    # Получение отчета по категориям
-    while True:
-        category: str = input("Введите категорию для анализа расходов: ").strip()
+def load_dataset(transactions_path: str, settings_path: str) -> Tuple["TransactionStore", Dict[str, Any]]:
+    """Загружает выгрузку в хранилище с индексами и читает настройки пользователя."""
+    from dotenv import load_dotenv
 
-        # Проверка, что категория не пустая
-        if not category:
-            print("Категория не может быть пустой. Пожалуйста, введите корректную категорию.")
-            continue
+    from src.fx import convert_from_settings
+    from src.loader import load_transactions
+    from src.store import TransactionStore
 
-        # Проверка, существует ли категория в данных транзакций
-        if category not in transactions_data["Категория"].unique():
-            print(f"Категория '{category}' не найдена. Пожалуйста, введите существующую категорию.")
-        else:
-            break
+    # Загрузка переменных окружения из файла .env
+    load_dotenv()
 
-    # Ввод даты для анализа расходов
-    while True:
-        input_date: Optional[str] = input(
-            "Введите дату для анализа расходов (YYYY-MM-DD), или нажмите Enter для текущей даты: "
+    transactions = load_transactions(transactions_path)
+    if transactions is None:
+        raise SystemExit(f"Не удалось загрузить данные о транзакциях из {transactions_path}.")
+    with open(settings_path, "r", encoding="utf-8") as f:
+        user_settings: Dict[str, Any] = json.load(f)
+
+    # Таблица, отсортированная по дате, с индексами для выборок по окнам дат
+    return TransactionStore(convert_from_settings(transactions, user_settings)), user_settings
+
+
+def run_query(
+    query: Dict[str, Any], store: "TransactionStore", user_settings: Dict[str, Any], save_report: bool = True
+) -> Any:
+    """Выполняет один запрос: home (date), invest (month, limit) или category (category, date)."""
+    from src.reports import spending_by_category
+    from src.services import investment_bank
+    from src.views import generate_response
+
+    kind = query.get("type")
+    if kind == "home":
+        return generate_response(_parse_datetime(query["date"]), user_settings, store)
+    if kind == "invest":
+        month = _parse_month(query["month"])
+        return {"month": month, "investment_bank": investment_bank(month, store, _parse_limit(query.get("limit", 50)))}
+    if kind == "category":
+        date = query.get("date")
+        return spending_by_category(
+            store, query["category"], None if date is None else _parse_date(date), save_report=save_report
         )
-        # Если дата не введена, используем текущую дату
-        if not input_date.strip():
-            input_date = None
-            break
+    raise ValueError(f"Неизвестный тип запроса {kind!r}: ожидается один из {', '.join(QUERY_TYPES)}.")
 
-        try:
-            # Проверка формата даты
-            datetime.strptime(input_date, "%Y-%m-%d")
-            break
-        except ValueError:
-            print("Некорректный формат даты. Пожалуйста, используйте формат YYYY-MM-DD.")
 
-    try:
+def run_queries(
+    lines: Iterable[str], store: "TransactionStore", user_settings: Dict[str, Any], out: TextIO, save_report: bool
+) -> int:
+    """Выполняет запросы из строк JSONL по одной загруженной выгрузке и пишет результаты в out по мере готовности.
 
-        report = spending_by_category(transactions_data, category, input_date)
-        print(json.dumps(report, ensure_ascii=False, indent=4))
-    except Exception as e:
-        print(f"Ошибка при получении отчета по категории '{category}': {e}")
+    Ошибка запроса не прерывает обработку: вместо результата выводится поле error. Возвращает число запросов.
+    """
+    count = 0
+    started = time.perf_counter()
+    for line in lines:
+        if not line.strip():
+            continue
+        count += 1
+        query: Any = line.strip()
+        try:
+            query = json.loads(line)
+            record = {"query": query, "result": run_query(query, store, user_settings, save_report)}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            record = {"query": query, "error": f"{type(e).__name__}: {e}"}
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+    elapsed = time.perf_counter() - started
+    logging.info(f"Выполнено запросов: {count} за {elapsed:.2f} с ({count / max(elapsed, 1e-9):.0f} запросов/с)")
+    return count
+
+
+def _ask(prompt: str, parse: Callable[[str], T], error: str) -> T:
+    """Запрашивает значение, пока оно не пройдет проверку."""
+    while True:
+        try:
+            return parse(input(prompt))
+        except ValueError:
+            print(error)
+
+
+def interactive(store: "TransactionStore", user_settings: Dict[str, Any], save_report: bool = True) -> None:
+    """Последовательно запрашивает дату главной страницы, месяц и лимит Инвесткопилки и категорию отчета."""
+    categories = set(store.frame["Категория"].dropna().astype(str))
+
+    def parse_category(value: str) -> str:
+        category = value.strip()
+        if category not in categories:
+            raise ValueError(category)
+        return category
+
+    input_datetime = _ask(
+        "Введите дату и время (YYYY-MM-DD HH:MM:SS): ",
+        _parse_datetime,
+        "Некорректный формат даты и времени. Пожалуйста, попробуйте снова.",
+    )
+    response = run_query({"type": "home", "date": input_datetime}, store, user_settings)
+    print(json.dumps(response, ensure_ascii=False, indent=4))
+
+    input_month = _ask(
+        "Введите месяц для расчета (YYYY-MM): ",
+        _parse_month,
+        "Некорректный формат месяца. Пожалуйста, используйте формат YYYY-MM.",
+    )
+    limit = _ask(
+        "Введите лимит округления (10, 50 или 100): ",
+        _parse_limit,
+        "Недопустимый лимит. Пожалуйста, выберите 10, 50 или 100.",
+    )
+    saved = run_query({"type": "invest", "month": input_month, "limit": limit}, store, user_settings)
+    print(f"Сумма отложенная в 'Инвесткопилку' за {input_month}: {saved['investment_bank']:.2f} ₽")
+
+    category = _ask(
+        "Введите категорию для анализа расходов: ",
+        parse_category,
+        "Категория не найдена. Пожалуйста, введите существующую категорию.",
+    )
+    # Пустой ввод означает текущую дату
+    input_date = _ask(
+        "Введите дату для анализа расходов (YYYY-MM-DD), или нажмите Enter для текущей даты: ",
+        lambda value: _parse_date(value) if value.strip() else None,
+        "Некорректный формат даты. Пожалуйста, используйте формат YYYY-MM-DD.",
+    )
+    query = {"type": "category", "category": category, "date": input_date}
+    print(json.dumps(run_query(query, store, user_settings, save_report), ensure_ascii=False, indent=4))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Возвращает разбор аргументов командной строки с командами home, invest, category и interactive."""
+    parser = argparse.ArgumentParser(
+        description="Анализ транзакций: главная страница, Инвесткопилка и траты по категории.",
+        epilog="Без команды и --queries запускается интерактивный режим.",
+    )
+    parser.add_argument("--data", default=DEFAULT_TRANSACTIONS_PATH, help="Путь к выгрузке транзакций")
+    parser.add_argument("--settings", default=DEFAULT_SETTINGS_PATH, help="Путь к настройкам пользователя")
+    parser.add_argument(
+        "--queries",
+        help="JSONL-файл запросов ('-' — стандартный ввод); результаты выводятся в JSONL по мере готовности",
+    )
+    parser.add_argument("--no-reports", action="store_true", help="Не сохранять отчеты по категориям в файлы")
+    commands = parser.add_subparsers(dest="command")
+
+    home = commands.add_parser("home", help="JSON главной страницы")
+    home.add_argument("date", type=_argument(_parse_datetime, "Ожидается YYYY-MM-DD HH:MM:SS"))
+
+    invest = commands.add_parser("invest", help="Сумма, отложенная в Инвесткопилку за месяц")
+    invest.add_argument("month", type=_argument(_parse_month, "Ожидается YYYY-MM"))
+    invest.add_argument("--limit", type=int, choices=INVEST_LIMITS, default=50, help="Лимит округления")
+
+    category = commands.add_parser("category", help="Траты по категории за три месяца до даты")
+    category.add_argument("category")
+    category.add_argument("--date", type=_argument(_parse_date, "Ожидается YYYY-MM-DD"), help="По умолчанию — сегодня")
+
+    commands.add_parser("interactive", help="Последовательный ввод запросов с клавиатуры")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Основная функция для запуска приложения."""
+    args = build_parser().parse_args(argv)
+    if args.queries and args.command:
+        raise SystemExit("Команда и --queries не используются вместе.")
+
+    store, user_settings = load_dataset(args.data, args.settings)
+    save_report = not args.no_reports
+    if args.queries:
+        if args.queries == "-":
+            run_queries(sys.stdin, store, user_settings, sys.stdout, save_report)
+        else:
+            with open(args.queries, "r", encoding="utf-8") as f:
+                run_queries(f, store, user_settings, sys.stdout, save_report)
+    elif args.command in QUERY_TYPES:
+        query = {key: value for key, value in vars(args).items() if key in ("date", "month", "limit", "category")}
+        result = run_query({"type": args.command, **query}, store, user_settings, save_report)
+        print(json.dumps(result, ensure_ascii=False, indent=4))
+    else:
+        interactive(store, user_settings, save_report)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+APILAYER_URL = "https://api.apilayer.com/exchangerates_data"
+MARKETSTACK_URL = "https://api.marketstack.com/v1"
+# Время жизни закешированных котировок в секундах
+DEFAULT_TTL = 300.0
+# Таймаут одного HTTP-запроса в секундах
+DEFAULT_TIMEOUT = 10.0
+# Marketstack принимает до 100 тикеров в одном запросе
+MARKETSTACK_BATCH_SIZE = 100
+
+
+class TTLCache:
+    """Потокобезопасный кеш значений с ограниченным временем жизни."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Возвращает значение по ключу или None, если оно отсутствует или устарело."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохраняет значение по ключу."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self) -> None:
+        """Очищает кеш."""
+        with self._lock:
+            self._data.clear()
+
+
+class MarketDataClient:
+    """Клиент APIlayer и Marketstack с пулом соединений, параллельными запросами и TTL-кешем."""
+
+    def __init__(
+        self,
+        api_token: Optional[str],
+        api_key: Optional[str],
+        currency_url: str = APILAYER_URL,
+        stock_url: str = MARKETSTACK_URL,
+        ttl: float = DEFAULT_TTL,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_workers: int = 8,
+        batch_size: int = MARKETSTACK_BATCH_SIZE,
+    ) -> None:
+        self.api_token = api_token
+        self.api_key = api_key
+        self.currency_url = currency_url.rstrip("/")
+        self.stock_url = stock_url.rstrip("/")
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.cache = TTLCache(ttl)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-data")
+
+    def close(self) -> None:
+        """Освобождает пул потоков и соединений."""
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    def _latest_rates(self) -> Optional[Dict[str, Any]]:
+        """Возвращает таблицу последних курсов валют из кеша или из APIlayer."""
+        rates: Optional[Dict[str, Any]] = self.cache.get("rates")
+        if rates is not None:
+            return rates
+
+        try:
+            response = self.session.get(
+                f"{self.currency_url}/latest", headers={"apikey": self.api_token or ""}, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            logging.error(f"Ошибка при получении курсов валют: {e}")
+            return None
+
+        if response.status_code != 200:
+            logging.error("Ошибка при получении курсов валют.")
+            return None
+
+        rates = response.json()["rates"]
+        self.cache.set("rates", rates)
+        return rates
+
+    def get_currency_rates(self, currencies: List[str]) -> List[Dict[str, Any]]:
+        """Получает курсы валют через APIlayer."""
+        rates = self._latest_rates()
+        if rates is None:
+            return []
+        return [{"currency": currency, "rate": rates[currency]} for currency in currencies if currency in rates]
+
+    def get_timeseries(
+        self, start_date: str, end_date: str, base: str, symbols: List[str]
+    ) -> Optional[Dict[str, Dict[str, float]]]:
+        """Получает исторические курсы за период одним запросом к APIlayer: {дата: {валюта: курс}}.
+
+        Курс — количество единиц валюты за одну единицу base. Результат не кешируется: историю хранит FxRates.
+        """
+        querystring = {"start_date": start_date, "end_date": end_date, "base": base, "symbols": ",".join(symbols)}
+        try:
+            response = self.session.get(
+                f"{self.currency_url}/timeseries",
+                params=querystring,
+                headers={"apikey": self.api_token or ""},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logging.error(f"Ошибка при получении истории курсов валют за {start_date} - {end_date}: {e}")
+            return None
+        rates: Dict[str, Dict[str, float]] = response.json().get("rates") or {}
+        return rates
+
+    def _fetch_stock_batch(self, symbols: List[str]) -> Dict[str, float]:
+        """Запрашивает последние цены для группы тикеров одним запросом к Marketstack."""
+        # /intraday/latest отдает по одной последней записи на тикер; limit не дает обрезать ответ по умолчанию
+        querystring = {"access_key": self.api_key or "", "symbols": ",".join(symbols), "limit": str(len(symbols))}
+
+        try:
+            response = self.session.get(f"{self.stock_url}/intraday/latest", params=querystring, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logging.error(f"Ошибка при получении данных для {', '.join(symbols)}: {e}")
+            return {}
+
+        prices: Dict[str, float] = {}
+        # Повторные записи тикера пропускаются
+        for item in response.json().get("data") or []:
+            symbol = item.get("symbol", symbols[0] if len(symbols) == 1 else None)
+            if symbol in prices or symbol not in symbols:
+                continue
+            if item.get("last") is None:
+                logging.error(f"Цена для акции {symbol} равна None.")
+                continue
+            prices[symbol] = float(item["last"])
+            self.cache.set(("stock", symbol), prices[symbol])
+        return prices
+
+    def get_stock_prices(self, stocks: List[str]) -> List[Dict[str, Any]]:
+        """Получает цены акций с использованием Marketstack."""
+        prices: Dict[str, float] = {}
+        missing: List[str] = []
+        for stock in dict.fromkeys(stocks):
+            cached = self.cache.get(("stock", stock))
+            if cached is None:
+                missing.append(stock)
+            else:
+                prices[stock] = cached
+
+        # Недостающие тикеры запрашиваются пакетами, пакеты — параллельно
+        batches = [missing[i : i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        for batch_prices in self._executor.map(self._fetch_stock_batch, batches):
+            prices.update(batch_prices)
+
+        stock_prices = []
+        for stock in stocks:
+            if stock in prices:
+                stock_prices.append({"stock": stock, "price": prices[stock]})
+            elif stock in missing:
+                logging.error(f"Нет данных для акции {stock}.")
+        return stock_prices
+
+    def fetch(self, currencies: List[str], stocks: List[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Параллельно получает курсы валют и цены акций."""
+        rates = self._executor.submit(self.get_currency_rates, currencies)
+        stock_prices = self.get_stock_prices(stocks)
+        return rates.result(), stock_prices
@@ -0,0 +1,113 @@
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from src.sqlite_store import SQLiteStore
+from src.store import TransactionStore
+
+# Переменные окружения: размер кеша результатов и время жизни блоков рыночных данных в секундах
+MEMO_MAX_ENTRIES_ENV = "MEMO_MAX_ENTRIES"
+MEMO_MARKET_TTL_ENV = "MEMO_MARKET_TTL"
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MARKET_TTL = 60.0
+
+
+class LRUCache:
+    """Потокобезопасный кеш результатов ограниченного размера с вытеснением давно не использованных записей."""
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Возвращает признак попадания и значение; устаревшие по TTL записи считаются промахом."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and (self.ttl is None or item[0] + self.ttl >= time.monotonic()):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, item[1]
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохраняет значение, вытесняя самые давно использованные записи сверх max_entries."""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Очищает кеш и счетчики."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает счетчики попаданий, промахов и вытеснений."""
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Блоки, вычисляемые по транзакциям, устаревают только со сменой версии данных, рыночные данные — по времени
+transaction_cache = LRUCache(int(os.getenv(MEMO_MAX_ENTRIES_ENV, DEFAULT_MAX_ENTRIES)))
+market_cache = LRUCache(64, ttl=float(os.getenv(MEMO_MARKET_TTL_ENV, DEFAULT_MARKET_TTL)))
+
+
+def dataset_key(transactions: Any) -> Optional[Hashable]:
+    """Возвращает ключ версии данных или None, если результаты по этим данным не кешируются.
+
+    Кешируются только расчеты по хранилищам: их версия меняется при каждом добавлении строк,
+    а у DataFrame нет дешевого признака изменения, и отпечаток стоил бы столько же, сколько сам расчет.
+    """
+    if isinstance(transactions, TransactionStore):
+        return transactions.uid, transactions.version
+    if isinstance(transactions, SQLiteStore):
+        # Версия хранится в самой базе, поэтому ключ верен и для нескольких объектов одного файла
+        return "sqlite", transactions.path, transactions.version
+    return None
+
+
+def memoize(cache: LRUCache, key: Optional[Hashable], compute: Callable[[], Any]) -> Any:
+    """Возвращает копию результата из кеша или вычисляет и сохраняет его; key=None отключает кеш."""
+    if key is None:
+        return compute()
+    hit, value = cache.get(key)
+    if not hit:
+        value = compute()
+        cache.set(key, value)
+    # Копия защищает сохраненный результат от изменения вызывающим кодом
+    return copy.deepcopy(value)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Возвращает счетчики кеша блоков по транзакциям и кеша рыночных данных."""
+    return {"transactions": transaction_cache.stats(), "market": market_cache.stats()}
+
+
+def clear_caches() -> None:
+    """Очищает оба кеша результатов."""
+    transaction_cache.clear()
+    market_cache.clear()
@@ -0,0 +1,122 @@
+import atexit
+import gzip
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+# Переменные окружения для настройки сохранения отчетов по умолчанию
+REPORTS_DIR_ENV = "REPORTS_DIR"
+REPORTS_COMPRESS_ENV = "REPORTS_COMPRESS"
+
+
+class ReportSink:
+    """Фоновая запись отчетов в файлы: очередь, пакетная запись и уникальные имена файлов."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        compress: bool = False,
+        indent: Optional[int] = None,
+        batch_size: int = 64,
+    ) -> None:
+        self.directory = directory
+        self.compress = compress
+        self.indent = indent
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Optional[Tuple[str, Any]]]" = queue.Queue()
+        self._counter = itertools.count(1)
+        self._thread = threading.Thread(target=self._run, name="report-sink", daemon=True)
+        self._thread.start()
+
+    def _filename(self, prefix: str) -> str:
+        """Формирует уникальное имя файла: время с микросекундами, PID процесса и порядковый номер."""
+        stamp = datetime.now().strftime("%d%m%Y_%H%M%S_%f")
+        extension = ".json.gz" if self.compress else ".json"
+        filename = f"{prefix}_{stamp}_{os.getpid()}_{next(self._counter):06d}{extension}"
+        return os.path.join(self.directory, filename) if self.directory else filename
+
+    def submit(self, report: Any, prefix: str = "spending_report") -> str:
+        """Ставит отчет в очередь на запись и сразу возвращает имя будущего файла."""
+        filename = self._filename(prefix)
+        self._queue.put((filename, report))
+        return filename
+
+    def _write(self, filename: str, report: Any) -> None:
+        """Записывает один отчет в файл."""
+        separators = (",", ":") if self.indent is None else None
+        payload = json.dumps(report, ensure_ascii=False, indent=self.indent, separators=separators, default=float)
+        if self.compress:
+            with gzip.open(filename, "wt", encoding="utf-8") as f:
+                f.write(payload)
+        else:
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(payload)
+
+    def _run(self) -> None:
+        """Забирает отчеты из очереди пакетами и записывает их."""
+        while True:
+            batch: List[Optional[Tuple[str, Any]]] = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+            for item in batch:
+                if item is not None:
+                    try:
+                        self._write(*item)
+                        logging.info(f"Отчет сохранен в файл: {item[0]}")
+                    except Exception as e:
+                        logging.error(f"Ошибка при сохранении отчета: {e}")
+            for _ in batch:
+                self._queue.task_done()
+            if None in batch:
+                return
+
+    def flush(self) -> None:
+        """Ожидает записи всех поставленных в очередь отчетов."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Записывает оставшиеся отчеты и останавливает фоновый поток."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+_default_sink: Optional[ReportSink] = None
+_default_sink_lock = threading.Lock()
+
+
+def get_report_sink() -> ReportSink:
+    """Возвращает общий приемник отчетов, создавая его по переменным окружения при первом обращении."""
+    global _default_sink
+    with _default_sink_lock:
+        if _default_sink is None:
+            _default_sink = ReportSink(
+                directory=os.getenv(REPORTS_DIR_ENV) or None,
+                compress=os.getenv(REPORTS_COMPRESS_ENV, "").lower() in ("1", "true", "yes"),
+            )
+            atexit.register(_default_sink.close)
+        return _default_sink
+
+
+def set_report_sink(sink: ReportSink) -> None:
+    """Заменяет общий приемник отчетов, дописав отчеты предыдущего."""
+    global _default_sink
+    with _default_sink_lock:
+        previous, _default_sink = _default_sink, sink
+    atexit.register(sink.close)
+    if previous is not None:
+        previous.close()
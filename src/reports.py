@@ -1,36 +1,79 @@
-import json
+import functools
 import logging
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
+import numpy as np
 import pandas as pd
 
+from src.instrumentation import collect, span
+from src.loader import SPEND, partition_codes
+from src.memo import dataset_key, memoize, transaction_cache
+from src.report_sink import get_report_sink
+from src.store import Transactions, TransactionStore, as_frame, window_category_total
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 
 
 def report_decorator(func: Callable[..., Any]) -> Callable[..., Any]:
-    """Декоратор для записи отчета в файл с названием по умолчанию."""
+    """Декоратор для записи отчета в файл с названием по умолчанию.
+
+    Запись выполняется в фоне и не задерживает возврат результата;
+    аргумент save_report=False отключает сохранение для конкретного вызова.
+    """
 
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
+    @functools.wraps(func)
+    def wrapper(*args: Any, save_report: bool = True, **kwargs: Any) -> Any:
         result = func(*args, **kwargs)
-        # Генерация имени файла на основе текущей даты и времени
-        filename = f"spending_report_{datetime.now().strftime('%d%m%Y_%H%M%S')}.json"
-        # Запись результата в файл
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(result, f, ensure_ascii=False, indent=4)
-            logging.info(f"Отчет сохранен в файл: {filename}")
-        except Exception as e:
-            logging.error(f"Ошибка при сохранении отчета: {e}")
+        if save_report:
+            get_report_sink().submit(result)
         return result
 
     return wrapper
 
 
+def spending_by_category(
+    transactions: Transactions,
+    category: str,
+    date: Optional[str] = None,
+    timings: bool = False,
+    save_report: bool = True,
+) -> Dict[str, Any]:
+    """Возвращает траты по заданной категории за последние три месяца от заданной даты.
+
+    Повторный запрос по той же версии хранилища берется из кеша результатов без записи нового файла отчета.
+    При timings=True в отчет добавляется блок timings с замерами этапов.
+    """
+    # Установка текущей даты, если дата не передана: ключ кеша строится по фактической дате отчета
+    if date is None:
+        date = datetime.now().strftime("%Y-%m-%d")
+
+    dataset = dataset_key(transactions)
+    key = None if dataset is None or timings else ("category", dataset, category, date)
+    report_data: Dict[str, Any] = memoize(
+        transaction_cache,
+        key,
+        lambda: _spending_by_category(transactions, category, date, timings, save_report=save_report),
+    )
+    return report_data
+
+
 @report_decorator
-def spending_by_category(transactions: pd.DataFrame, category: str, date: Optional[str] = None) -> Dict[str, Any]:
-    """Возвращает траты по заданной категории за последние три месяца от заданной даты."""
+def _spending_by_category(
+    transactions: Transactions, category: str, date: Optional[str] = None, timings: bool = False
+) -> Dict[str, Any]:
+    """Формирует отчет по категории с замерами этапов и сохраняет его в файл."""
+    with collect() if timings else nullcontext() as records, span("spending_by_category"):
+        report_data = _category_report(transactions, category, date)
+    if records is not None:
+        report_data["timings"] = records
+    return report_data
+
+
+def _category_report(transactions: Transactions, category: str, date: Optional[str]) -> Dict[str, Any]:
+    """Формирует отчет о тратах по категории за три месяца до даты."""
 
     # Установка текущей даты, если дата не передана
     if date is None:
@@ -39,37 +82,15 @@ def spending_by_category(transactions: pd.DataFrame, category: str, date: Option
     # Преобразование строки даты в объект datetime
     current_date = datetime.strptime(date, "%Y-%m-%d")
 
-    # Преобразование столбца 'Дата операции' в формат datetime
-    transactions["Дата операции"] = pd.to_datetime(
-        transactions["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce"
-    )
-
     # Определение даты начала периода (3 месяца назад от переданной даты)
     start_date = current_date - timedelta(days=90)
 
-    # Фильтрация транзакций по категории и дате
-    filtered_transactions = transactions[
-        (transactions["Категория"] == category)
-        & (transactions["Дата операции"] >= start_date)
-        & (transactions["Дата операции"] <= current_date)
-    ]
-
     # Логирование информации о фильтрации
     logging.info(f"Фильтрация по категории: {category}, диапазон дат: {start_date} - {current_date}")
 
-    # Проверка на наличие отфильтрованных транзакций
-    if filtered_transactions.empty:
-        return {
-            "category": category,
-            "total_spent": 0.0,
-            "date_range": {
-                "start_date": start_date.strftime("%d.%m.%Y"),
-                "end_date": current_date.strftime("%d.%m.%Y"),
-            },
-        }
-
-    # Подсчет сумм по тратам
-    total_spent = filtered_transactions["Сумма операции"].replace(",", ".", regex=True).astype(float).abs().sum()
+    # Подсчет сумм по тратам: для хранилища — из куба агрегатов и граничных строк окна
+    with span("window_category_total"):
+        total_spent = window_category_total(transactions, category, start_date, current_date)
 
     # Формирование результата в формате словаря
     report_data = {
@@ -79,3 +100,56 @@ def spending_by_category(transactions: pd.DataFrame, category: str, date: Option
     }
 
     return report_data
+
+
+def month_end_dates(transactions: Transactions) -> List[str]:
+    """Возвращает последние дни месяцев периода выгрузки в формате 'YYYY-MM-DD'."""
+    dates = as_frame(transactions)["Дата операции"].dropna()
+    if dates.empty:
+        return []
+    month_ends = pd.date_range(dates.min().floor("D"), dates.max() + pd.offsets.MonthEnd(0), freq="ME")
+    return list(month_ends.strftime("%Y-%m-%d"))
+
+
+def spending_matrix(
+    transactions: Transactions, dates: Optional[Iterable[str]] = None, categories: Optional[Iterable[str]] = None
+) -> pd.DataFrame:
+    """Возвращает траты по категориям за три месяца до каждой даты: строки — категории, столбцы — даты.
+
+    Каждая ячейка совпадает с total_spent отчета spending_by_category для той же категории и даты,
+    но вся матрица считается за один проход по префиксным суммам вместо повторного отбора строк.
+    """
+    df = as_frame(transactions)
+    end_labels = month_end_dates(df) if dates is None else list(dates)
+    ends = pd.to_datetime(end_labels, format="%Y-%m-%d").to_numpy(dtype="datetime64[ns]")
+    starts = ends - np.timedelta64(90, "D")
+
+    valid_mask = df["Дата операции"].notna() & df["Категория"].notna()
+    valid = df[valid_mask]
+    codes, uniques = pd.factorize(valid["Категория"].astype(object), sort=True)
+    operation_dates = valid["Дата операции"].to_numpy(dtype="datetime64[ns]")
+
+    # Строки упорядочиваются по категории, внутри категории — по дате; префиксные суммы модулей общие
+    order = np.lexsort((operation_dates, codes))
+    codes, operation_dates = codes[order], operation_dates[order]
+    amounts = np.nan_to_num(np.abs(valid["Сумма операции"].to_numpy(dtype="float64")[order]))
+    # Как и в отчете по категории, учитываются только проведенные списания; категории без трат остаются нулевыми.
+    # Разделы хранилища размечены при загрузке и повторно не вычисляются
+    partitions = transactions.partitions if isinstance(transactions, TransactionStore) else partition_codes(df)
+    amounts[partitions[valid_mask.to_numpy()][order] != SPEND] = 0.0
+    prefix = np.concatenate([[0.0], np.cumsum(amounts)])
+    bounds = np.searchsorted(codes, np.arange(len(uniques) + 1))
+
+    totals = {}
+    for code, category in enumerate(uniques):
+        group_start, group_stop = bounds[code], bounds[code + 1]
+        group_dates = operation_dates[group_start:group_stop]
+        lo = group_start + group_dates.searchsorted(starts, side="left")
+        hi = group_start + group_dates.searchsorted(ends, side="right")
+        totals[category] = np.round(prefix[hi] - prefix[lo], 2)
+
+    index = sorted(totals) if categories is None else list(categories)
+    rows = [totals.get(category, np.zeros(len(ends))) for category in index]
+    return pd.DataFrame(
+        np.array(rows, dtype="float64").reshape(len(index), len(ends)), index=index, columns=end_labels
+    )
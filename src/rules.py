@@ -0,0 +1,217 @@
+import argparse
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import span
+from src.loader import SPEND, normalize_transactions, partition_codes
+from src.utils import read_excel_data
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+# Ставка кешбэка по умолчанию: 1% от суммы покупки, как на главной странице без правил
+DEFAULT_CASHBACK_RATE = 0.01
+# Кешбэк начисляется кратно шагу с округлением вниз; банк начисляет целые рубли
+DEFAULT_CASHBACK_STEP = 1.0
+# Коды MCC четырехзначные, поэтому таблица поиска по MCC — массив из 10000 элементов
+MCC_CODES = 10_000
+# Столбцы результата применения правил
+CASHBACK_COLUMN = "Расчетный кэшбэк"
+ROUNDING_COLUMN = "Расчетное округление"
+
+
+class RuleSet:
+    """Правила кешбэка, лимитов и округлений в Инвесткопилку, скомпилированные в массивы поиска.
+
+    Правило строки выбирается по MCC, если для него задано правило, иначе — по категории, иначе
+    действует правило по умолчанию. Незаданные поля правил категорий и MCC берутся из правила по умолчанию.
+    """
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        self.config = config
+        default = {
+            "cashback_rate": DEFAULT_CASHBACK_RATE,
+            "cap": None,
+            "rounding_limit": 0,
+            **config.get("default", {}),
+        }
+        categories: Dict[str, Dict[str, Any]] = config.get("categories", {})
+        mcc: Dict[str, Dict[str, Any]] = config.get("mcc", {})
+        self.cashback_step = float(config.get("cashback_step", DEFAULT_CASHBACK_STEP))
+
+        # Правило 0 — по умолчанию, за ним правила категорий и правила MCC
+        rules = [default] + [{**default, **rule} for rule in categories.values()]
+        rules += [{**default, **rule} for rule in mcc.values()]
+        self.names = ["default"] + list(categories) + [f"MCC {code}" for code in mcc]
+        self.rates = np.array([float(rule["cashback_rate"]) for rule in rules])
+        self.caps = np.array([np.inf if rule["cap"] is None else float(rule["cap"]) for rule in rules])
+        self.rounding_limits = np.array([float(rule["rounding_limit"]) for rule in rules])
+
+        self.category_rules = {category: number for number, category in enumerate(categories, start=1)}
+        self.mcc_rules = np.full(MCC_CODES, -1, dtype=np.int64)
+        for number, code in enumerate(mcc, start=1 + len(categories)):
+            self.mcc_rules[int(code)] = number
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleSet":
+        """Читает правила из JSON-файла."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @property
+    def key(self) -> str:
+        """Ключ правил для кеша результатов."""
+        return json.dumps(self.config, sort_keys=True, ensure_ascii=False)
+
+    def rule_numbers(self, df: pd.DataFrame) -> np.ndarray:
+        """Возвращает номер действующего правила для каждой строки нормализованной таблицы."""
+        numbers = np.zeros(len(df), dtype=np.int64)
+        if "Категория" in df.columns:
+            categories = df["Категория"].astype("category").cat
+            # Поиск идет по кодам категорий: словарь правил просматривается по уникальным значениям, а не по строкам
+            lookup = np.array([self.category_rules.get(name, 0) for name in categories.categories] + [0])
+            numbers = lookup[categories.codes]
+        if "MCC" in df.columns and len(self.mcc_rules):
+            codes = pd.to_numeric(df["MCC"], errors="coerce").to_numpy(dtype="float64")
+            valid = (codes >= 0) & (codes < MCC_CODES)
+            by_mcc = np.full(len(df), -1, dtype=np.int64)
+            by_mcc[valid] = self.mcc_rules[codes[valid].astype(np.int64)]
+            numbers = np.where(by_mcc >= 0, by_mcc, numbers)
+        return numbers
+
+    def apply(self, transactions: pd.DataFrame) -> pd.DataFrame:
+        """Рассчитывает кешбэк и округление в Инвесткопилку для всех строк таблицы за один векторный проход.
+
+        Кешбэк и округление начисляются только по строкам раздела проведенных списаний, как и суммы трат
+        по картам (src.loader.partition_codes). Лимит правила ограничивает
+        кешбэк по карте за календарный месяц: операции месяца учитываются в порядке дат.
+        """
+        df = normalize_transactions(transactions)
+        with span("rules") as stage:
+            stage.rows = len(df)
+            numbers = self.rule_numbers(df)
+            amounts = df["Сумма операции"].to_numpy(dtype="float64")
+            base_column = "Сумма платежа" if "Сумма платежа" in df.columns else "Сумма операции"
+            base = np.abs(df[base_column].to_numpy(dtype="float64"))
+            eligible = partition_codes(df) == SPEND
+
+            cashback = np.floor(base * self.rates[numbers] / self.cashback_step) * self.cashback_step
+            cashback = np.where(eligible & ~np.isnan(cashback), cashback, 0.0)
+            if np.isfinite(self.caps).any():
+                cashback = self._apply_caps(df, numbers, cashback)
+
+            limits = self.rounding_limits[numbers]
+            magnitude = np.abs(amounts)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rounding = np.ceil(magnitude / limits) * limits - magnitude
+            rounding = np.where(eligible & (limits > 0), np.round(rounding, 2), 0.0)
+
+        return pd.DataFrame({CASHBACK_COLUMN: np.round(cashback, 2), ROUNDING_COLUMN: rounding}, index=df.index)
+
+    def _apply_caps(self, df: pd.DataFrame, numbers: np.ndarray, cashback: np.ndarray) -> np.ndarray:
+        """Ограничивает накопленный кешбэк лимитом правила в группах (карта, месяц, правило)."""
+        # Сортируются только строки с лимитом и ненулевым кешбэком, остальные от лимитов не зависят
+        rows = np.flatnonzero(np.isfinite(self.caps[numbers]) & (cashback > 0))
+        if not len(rows):
+            return cashback
+        cards = df["Номер карты"].cat.codes.to_numpy()[rows].astype(np.int64) + 1 if "Номер карты" in df else 0
+        dates = df["Дата операции"].to_numpy(dtype="datetime64[ns]")[rows]
+        months = dates.astype("datetime64[M]").view(np.int64)
+        group = ((cards * len(self.rates) + numbers[rows]) << 20) + (months - months.min())
+
+        # Внутри группы строки идут по дате; накопленная сумма считается одной cumsum с вычетом сумм прошлых групп
+        order = np.lexsort((dates, group))
+        sorted_cashback = cashback[rows][order]
+        totals = np.cumsum(sorted_cashback)
+        sorted_group = group[order]
+        starts = np.flatnonzero(np.concatenate([[True], sorted_group[1:] != sorted_group[:-1]]))
+        before_group = np.repeat(totals[starts] - sorted_cashback[starts], np.diff(np.append(starts, len(order))))
+        running = totals - before_group
+
+        caps = self.caps[numbers[rows][order]]
+        result = cashback.copy()
+        result[rows[order]] = np.minimum(running, caps) - np.minimum(running - sorted_cashback, caps)
+        return result
+
+
+def rules_from_settings(user_settings: Dict[str, Any]) -> Optional[RuleSet]:
+    """Возвращает правила из настроек пользователя: словарь или путь к JSON-файлу в ключе cashback_rules."""
+    config = user_settings.get("cashback_rules")
+    if config is None:
+        return None
+    return RuleSet.from_file(config) if isinstance(config, str) else RuleSet(config)
+
+
+def _reported(df: pd.DataFrame, name: str) -> pd.Series:
+    """Возвращает начисление из выгрузки банка; пропуски и отсутствующий столбец считаются нулем."""
+    if name not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return df[name].fillna(0.0)
+
+
+def discrepancies(transactions: pd.DataFrame, rules: RuleSet, tolerance: float = 0.01) -> pd.DataFrame:
+    """Возвращает строки, в которых расчетный кешбэк или округление расходятся с данными банка."""
+    df = normalize_transactions(transactions)
+    result = rules.apply(df).assign(
+        **{
+            "Кэшбэк": _reported(df, "Кэшбэк"),
+            "Округление на инвесткопилку": _reported(df, "Округление на инвесткопилку"),
+        }
+    )
+    mismatch = ((result[CASHBACK_COLUMN] - result["Кэшбэк"]).abs() > tolerance) | (
+        (result[ROUNDING_COLUMN] - result["Округление на инвесткопилку"]).abs() > tolerance
+    )
+    columns = [name for name in ("Дата операции", "Номер карты", "Категория", "MCC", "Описание") if name in df]
+    return pd.concat([df.loc[mismatch, columns], result[mismatch]], axis=1)
+
+
+def discrepancy_summary(transactions: pd.DataFrame, rules: RuleSet, tolerance: float = 0.01) -> List[Dict[str, Any]]:
+    """Сводит расхождения по категориям: число строк и суммы расчетного и начисленного банком кешбэка."""
+    rows = discrepancies(transactions, rules, tolerance)
+    if rows.empty:
+        return []
+    rows = rows.assign(Категория=rows["Категория"].astype(object).fillna("")) if "Категория" in rows else rows
+    summary = rows.groupby("Категория", sort=True).agg(
+        rows=(CASHBACK_COLUMN, "size"),
+        computed_cashback=(CASHBACK_COLUMN, "sum"),
+        reported_cashback=("Кэшбэк", "sum"),
+        computed_rounding=(ROUNDING_COLUMN, "sum"),
+        reported_rounding=("Округление на инвесткопилку", "sum"),
+    )
+    return [
+        {
+            "category": category,
+            "rows": int(row["rows"]),
+            **{str(name): round(float(value), 2) for name, value in row[1:].items()},
+        }
+        for category, row in summary.iterrows()
+    ]
+
+
+def card_cashback(transactions: pd.DataFrame, rules: RuleSet) -> pd.Series:
+    """Возвращает расчетный кешбэк по картам."""
+    df = normalize_transactions(transactions)
+    return rules.apply(df)[CASHBACK_COLUMN].groupby(df["Номер карты"].astype(object), sort=True).sum()
+
+
+def main() -> None:
+    """Сверяет кешбэк и округления выгрузки с правилами и печатает сводку расхождений по категориям."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("rules", help="JSON-файл правил")
+    parser.add_argument("transactions", help="Файл выгрузки")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Допустимое расхождение в рублях")
+    args = parser.parse_args()
+
+    df = read_excel_data(args.transactions)
+    if df is None:
+        raise SystemExit(f"Не удалось прочитать выгрузку {args.transactions}.")
+    summary = discrepancy_summary(df, RuleSet.from_file(args.rules), args.tolerance)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
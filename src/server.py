@@ -0,0 +1,279 @@
+import argparse
+import json
+import logging
+import os
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.fx import convert_from_settings
+from src.instrumentation import collect, recorder
+from src.loader import load_transactions
+from src.main import INVEST_LIMITS
+from src.memo import cache_stats
+from src.reports import spending_by_category
+from src.services import investment_bank, investment_bank_by_month
+from src.store import TransactionStore
+from src.utils import DEFAULT_SETTINGS_PATH, DEFAULT_TRANSACTIONS_PATH, fetch_market_data
+from src.views import generate_response
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+MarketData = Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]
+
+
+class Dataset:
+    """Загруженные в память транзакции и настройки с перезагрузкой при изменении файлов."""
+
+    def __init__(self, transactions_path: str, settings_path: str) -> None:
+        self.transactions_path = transactions_path
+        self.settings_path = settings_path
+        self.store: Optional[TransactionStore] = None
+        self.settings: Dict[str, Any] = {}
+        self.loaded_at: Optional[datetime] = None
+        self.version = 0
+        self._signature: Tuple[int, ...] = ()
+        self._reload_lock = threading.Lock()
+
+    def _current_signature(self) -> Tuple[int, ...]:
+        """Возвращает время изменения и размер файла транзакций и файла настроек."""
+        transactions, settings = os.stat(self.transactions_path), os.stat(self.settings_path)
+        return transactions.st_mtime_ns, transactions.st_size, settings.st_mtime_ns, settings.st_size
+
+    def load(self) -> None:
+        """Загружает транзакции и настройки и атомарно подменяет текущий набор данных."""
+        signature = self._current_signature()
+        transactions = load_transactions(self.transactions_path)
+        if transactions is None:
+            raise ValueError(f"Не удалось загрузить данные о транзакциях из {self.transactions_path}.")
+        with open(self.settings_path, "r", encoding="utf-8") as f:
+            settings: Dict[str, Any] = json.load(f)
+
+        # Суммы пересчитываются в валюту отчета один раз при загрузке, а не при каждом запросе
+        transactions = convert_from_settings(transactions, settings)
+        # Индексы, куб и списки крупнейших платежей строятся до подмены, чтобы запросы не ждали их построения
+        store = TransactionStore(transactions)
+        _ = store.cube, store.top_index
+
+        self.store, self.settings, self._signature = store, settings, signature
+        self.loaded_at = datetime.now()
+        self.version += 1
+        logging.info(f"Загружено {len(store)} транзакций из {self.transactions_path}")
+
+    def reload_if_changed(self) -> bool:
+        """Перезагружает данные, если файлы изменились; возвращает True при перезагрузке."""
+        with self._reload_lock:
+            try:
+                if self._current_signature() == self._signature:
+                    return False
+                self.load()
+                return True
+            except Exception as e:
+                # При ошибке продолжаем обслуживать запросы по ранее загруженным данным
+                logging.error(f"Ошибка при перезагрузке данных: {e}")
+                return False
+
+
+class MarketDataRefresher:
+    """Фоновое обновление курсов валют и цен акций, чтобы запросы не ждали внешних API."""
+
+    def __init__(self, dataset: Dataset, interval: float) -> None:
+        self.dataset = dataset
+        self.interval = interval
+        self.snapshot: MarketData = ([], [])
+        self._stop = threading.Event()
+
+    def refresh(self) -> None:
+        """Получает свежие рыночные данные по настройкам пользователя."""
+        settings = self.dataset.settings
+        self.snapshot = fetch_market_data(settings.get("user_currencies", []), settings.get("user_stocks", []))
+
+    def run(self) -> None:
+        """Обновляет рыночные данные с заданным интервалом до остановки."""
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Ошибка при обновлении рыночных данных: {e}")
+            self._stop.wait(self.interval)
+
+    def stop(self) -> None:
+        """Останавливает фоновое обновление."""
+        self._stop.set()
+
+
+class TransactionsApp:
+    """JSON-эндпоинты главной страницы, Инвесткопилки и отчета по категории."""
+
+    def __init__(self, dataset: Dataset, refresher: MarketDataRefresher, save_reports: bool = False) -> None:
+        self.dataset = dataset
+        self.refresher = refresher
+        # Запись JSON-отчетов по каждому запросу /category включается явно
+        self.save_reports = save_reports
+
+    def handle(self, path: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        """Обрабатывает запрос и возвращает HTTP-статус и JSON-ответ (для /metrics — текст Prometheus)."""
+        if path == "/metrics":
+            return 200, recorder.to_prometheus()
+
+        store = self.dataset.store
+        if store is None:
+            return 503, {"error": "Данные о транзакциях недоступны."}
+
+        # Замеры этапов добавляются в ответ только по запросу: ?timings=1
+        timings = query.get("timings", "").lower() in ("1", "true", "yes")
+        try:
+            if path == "/home":
+                date = query.get("date") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+                return 200, generate_response(
+                    date, self.dataset.settings, store, self.refresher.snapshot, timings=timings
+                )
+            if path == "/invest":
+                limit = int(query.get("limit", "50"))
+                if limit not in INVEST_LIMITS:
+                    return 400, {"error": f"Недопустимый лимит {limit}: допустимы 10, 50 или 100."}
+                if "month" in query:
+                    datetime.strptime(query["month"], "%Y-%m")
+                with collect() if timings else nullcontext() as records:
+                    if "month" not in query:
+                        payload: Dict[str, Any] = {"limit": limit, "months": investment_bank_by_month(store, limit)}
+                    else:
+                        month = query["month"]
+                        payload = {"month": month, "limit": limit, "saved": investment_bank(month, store, limit)}
+                if records is not None:
+                    payload["timings"] = records
+                return 200, payload
+            if path == "/category":
+                if not query.get("category"):
+                    return 400, {"error": "Не указана категория."}
+                if query.get("date"):
+                    datetime.strptime(query["date"], "%Y-%m-%d")
+                return 200, spending_by_category(
+                    store, query["category"], query.get("date"), timings=timings, save_report=self.save_reports
+                )
+            if path == "/health":
+                loaded_at = self.dataset.loaded_at.isoformat() if self.dataset.loaded_at else None
+                return 200, {
+                    "rows": len(store),
+                    "version": self.dataset.version,
+                    "loaded_at": loaded_at,
+                    "cache": cache_stats(),
+                }
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            logging.exception(f"Ошибка при обработке запроса {path}: {e}")
+            return 500, {"error": "Внутренняя ошибка сервера."}
+
+        return 404, {"error": f"Неизвестный адрес: {path}"}
+
+
+class AppRequestHandler(BaseHTTPRequestHandler):
+    """HTTP-обработчик, передающий GET-запросы приложению."""
+
+    server: Any
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        status, payload = self.server.app.handle(url.path, query)
+
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload, ensure_ascii=False, default=float).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.info(f"{self.address_string()} {format % args}")
+
+
+class TransactionsServer(ThreadingHTTPServer):
+    """Многопоточный HTTP-сервер с приложением и фоновыми потоками обновления данных."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], app: TransactionsApp, poll_interval: float) -> None:
+        super().__init__(address, AppRequestHandler)
+        self.app = app
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+
+    def _watch(self) -> None:
+        """Проверяет изменения файлов данных с заданным интервалом до остановки."""
+        while not self._stop.wait(self.poll_interval):
+            self.app.dataset.reload_if_changed()
+
+    def start_background(self) -> None:
+        """Запускает фоновое обновление рыночных данных и отслеживание изменений файлов."""
+        threading.Thread(target=self.app.refresher.run, name="market-data-refresher", daemon=True).start()
+        threading.Thread(target=self._watch, name="dataset-watcher", daemon=True).start()
+
+    def stop_background(self) -> None:
+        """Останавливает фоновые потоки."""
+        self._stop.set()
+        self.app.refresher.stop()
+
+
+def create_server(
+    host: str,
+    port: int,
+    transactions_path: str = DEFAULT_TRANSACTIONS_PATH,
+    settings_path: str = DEFAULT_SETTINGS_PATH,
+    poll_interval: float = 2.0,
+    market_interval: float = 60.0,
+    save_reports: bool = False,
+) -> TransactionsServer:
+    """Загружает данные, запускает фоновые потоки и возвращает HTTP-сервер."""
+    dataset = Dataset(transactions_path, settings_path)
+    dataset.load()
+
+    app = TransactionsApp(dataset, MarketDataRefresher(dataset, market_interval), save_reports)
+    server = TransactionsServer((host, port), app, poll_interval)
+    server.start_background()
+    return server
+
+
+def main() -> None:
+    """Запускает HTTP-сервер с загруженными в память данными."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data", default=DEFAULT_TRANSACTIONS_PATH, help="Путь к выгрузке транзакций")
+    parser.add_argument("--settings", default=DEFAULT_SETTINGS_PATH, help="Путь к настройкам пользователя")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Период проверки изменений файлов, с")
+    parser.add_argument("--market-interval", type=float, default=60.0, help="Период обновления котировок, с")
+    parser.add_argument("--save-reports", action="store_true", help="Сохранять отчеты /category в JSON-файлы")
+    args = parser.parse_args()
+
+    server = create_server(
+        args.host,
+        args.port,
+        args.data,
+        args.settings,
+        args.poll_interval,
+        args.market_interval,
+        args.save_reports,
+    )
+    logging.info(f"Сервер запущен на http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop_background()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
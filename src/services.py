@@ -1,38 +1,144 @@
 import logging
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Union
 
-import pandas as pd
+from src.instrumentation import span
+
+# numpy и pandas нужны только для таблиц и хранилища: список транзакций-словарей обрабатывается без них
+if TYPE_CHECKING:
+    import numpy as np
+
+    from src.store import Transactions
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 
+# Форматы даты операции в списке транзакций-словарей
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%d.%m.%Y %H:%M:%S", "%Y-%m-%d", "%d.%m.%Y")
+# Статус проведенной операции, как src.loader.SUCCESS_STATUS: src.loader здесь не импортируется, он загружает pandas
+SUCCESS_STATUS = "OK"
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    """Разбирает дату операции из строки или datetime; для пустых и нераспознанных значений возвращает None."""
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_amount(value: Any) -> Optional[float]:
+    """Разбирает сумму операции из числа или строки с запятой; для пустых значений возвращает None."""
+    try:
+        amount = float(value.replace(",", ".")) if isinstance(value, str) else float(value)
+    except (TypeError, ValueError):
+        return None
+    # NaN не равен самому себе
+    return amount if amount == amount else None
+
+
+def _is_spend(transaction: Dict[str, Any], amount: Optional[float]) -> bool:
+    """Проверяет, что запись — проведенное списание, по тем же правилам, что и src.loader.partition_codes."""
+    status = transaction.get("Статус")
+    # Пропуск статуса в записи из DataFrame — NaN, он не равен самому себе
+    if status is not None and status == status and status != SUCCESS_STATUS:
+        return False
+    payment = _parse_amount(transaction.get("Сумма платежа"))
+    signed = amount if payment is None else payment
+    unsigned = payment is None and (status is None or status != status)
+    return unsigned or (signed is not None and signed < 0)
+
+
+def _iter_operations(transactions: List[Dict[str, Any]]) -> Iterator[Tuple[datetime, float]]:
+    """Возвращает даты и модули сумм проведенных списаний списка, пропуская записи без даты или суммы."""
+    for transaction in transactions:
+        date = _parse_date(transaction.get("Дата операции"))
+        amount = _parse_amount(transaction.get("Сумма операции"))
+        if date is not None and amount is not None and _is_spend(transaction, amount):
+            yield date, abs(amount)
+
+
+def _next_month(month_start: datetime) -> datetime:
+    """Возвращает первый день следующего месяца."""
+    if month_start.month == 12:
+        return month_start.replace(year=month_start.year + 1, month=1)
+    return month_start.replace(month=month_start.month + 1)
+
 
-def investment_bank(month: str, transactions: List[Dict[str, Any]], limit: int) -> float:
-    """Вычисляет сумму, отложенную в 'Инвесткопилку' за указанный месяц."""
-    total_saved = 0.0
+def rounding_savings(amounts: "np.ndarray", limit: int) -> "np.ndarray":
+    """Возвращает для модуля каждой суммы разницу до следующего кратного limit значения."""
+    magnitudes = abs(amounts)
+    savings: np.ndarray = (magnitudes // limit + 1) * limit - magnitudes
+    return savings
 
+
+def investment_bank(month: str, transactions: Union[List[Dict[str, Any]], "Transactions"], limit: int) -> float:
+    """Вычисляет сумму, отложенную в 'Инвесткопилку' за указанный месяц: округляются только проведенные списания."""
     # Преобразуем строку месяца в объект datetime для проверки
     month_start = datetime.strptime(month, "%Y-%m")
-    next_month = (month_start.replace(day=1) + pd.DateOffset(months=1)).replace(day=1)
+    next_month = _next_month(month_start)
 
     logging.info(f"Округляем транзакции до {limit} в Инвесткопилку")
 
-    for transaction in transactions:
-        transaction_date_str = transaction.get("Дата операции")
-        transaction_amount = transaction.get("Сумма операции")
-
-        if transaction_date_str and transaction_amount is not None:
-            # Попробуем разобрать дату в обоих форматах
-            try:
-                transaction_date = datetime.strptime(transaction_date_str, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                transaction_date = datetime.strptime(transaction_date_str, "%d.%m.%Y %H:%M:%S")
-
-            # Проверяем, попадает ли транзакция в указанный месяц
-            if month_start <= transaction_date < next_month:
-                rounded_amount = ((transaction_amount // limit) + 1) * limit
-                saved_amount = rounded_amount - transaction_amount
-                total_saved += saved_amount
-
-    return total_saved
+    with span("investment_bank") as stage:
+        # Список транзакций-словарей считается простым циклом без загрузки pandas
+        if isinstance(transactions, list):
+            stage.rows = len(transactions)
+            return float(
+                sum(
+                    (amount // limit + 1) * limit - amount
+                    for date, amount in _iter_operations(transactions)
+                    if month_start <= date < next_month
+                )
+            )
+
+        from src.sqlite_store import SQLiteStore
+        from src.store import select_transactions
+
+        # В базе SQLite округления суммируются запросом по индексу даты, без выборки строк
+        if isinstance(transactions, SQLiteStore):
+            return transactions.rounding_savings(month_start, next_month, limit)
+
+        # Отбираем списания месяца по представлению spend и округляем их суммы векторно
+        with span("select") as select_stage:
+            spend = select_transactions(transactions, month_start, next_month, include_end=False, view="spend")
+            amounts = spend["Сумма операции"]
+            select_stage.rows = len(amounts)
+
+        with span("rounding"):
+            return float(rounding_savings(amounts.dropna().to_numpy(), limit).sum())
+
+
+def investment_bank_by_month(
+    transactions: Union[List[Dict[str, Any]], "Transactions"], limit: int
+) -> Dict[str, float]:
+    """Вычисляет суммы, отложенные в 'Инвесткопилку', для всех месяцев за один проход."""
+    logging.info(f"Округляем транзакции до {limit} в Инвесткопилку по всем месяцам")
+
+    if isinstance(transactions, list):
+        saved: Dict[str, float] = {}
+        for date, amount in _iter_operations(transactions):
+            month = date.strftime("%Y-%m")
+            saved[month] = saved.get(month, 0.0) + (amount // limit + 1) * limit - amount
+        return dict(sorted(saved.items()))
+
+    import pandas as pd
+
+    from src.sqlite_store import SQLiteStore
+    from src.store import select_transactions
+
+    if isinstance(transactions, SQLiteStore):
+        return transactions.monthly_rounding_savings(limit)
+
+    spend = select_transactions(transactions, view="spend")
+    valid = spend[spend["Сумма операции"].notna()]
+    savings = pd.Series(rounding_savings(valid["Сумма операции"].to_numpy(), limit), index=valid.index)
+    by_month = savings.groupby(valid["Дата операции"].dt.to_period("M")).sum()
+
+    return {str(period): float(saved) for period, saved in by_month.items()}
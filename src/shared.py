@@ -0,0 +1,235 @@
+import argparse
+import ctypes
+import json
+import logging
+import mmap
+import os
+import signal
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+import numpy as np
+import pandas as pd
+
+from src.loader import NORMALIZED_ATTR, load_transactions, normalize_transactions
+from src.store import DATE_COLUMN, TransactionStore
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+# Версия раскладки сегмента: заголовок с описанием столбцов, затем буферы столбцов
+SHARED_FORMAT_VERSION = 1
+DEFAULT_SHARED_NAME = "transactions"
+# Длина заголовка записывается в первые 8 байт, буферы выравниваются по 64 байтам
+HEADER_LENGTH = struct.Struct("<Q")
+ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    """Округляет смещение вверх до границы ALIGNMENT."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _data_start(header_length: int) -> int:
+    """Возвращает смещение начала буферов столбцов для заголовка заданной длины."""
+    return _align(HEADER_LENGTH.size + header_length)
+
+
+def _untrack(segment: shared_memory.SharedMemory) -> None:
+    """Снимает сегмент с учета resource_tracker, чтобы завершение процесса не удаляло общие данные.
+
+    Временем жизни сегмента управляет опубликовавший его процесс через unlink.
+    """
+    if os.name == "posix":
+        resource_tracker.unregister(segment._name, "shared_memory")  # type: ignore[attr-defined]
+
+
+class _Segment(shared_memory.SharedMemory):
+    """Сегмент, который не закрывается, пока на его память ссылаются массивы столбцов."""
+
+    def close(self) -> None:
+        # Массивы держат отображение памяти: оно закроется само, когда исчезнет последний из них
+        try:
+            super().close()
+        except BufferError:
+            pass
+
+    def __del__(self) -> None:
+        self.close()
+
+    @property
+    def memory(self) -> memoryview:
+        """Память сегмента."""
+        if self.buf is None:
+            raise ValueError(f"Сегмент {self.name} закрыт.")
+        return self.buf
+
+    @property
+    def mapping(self) -> mmap.mmap:
+        """Отображение памяти сегмента, на которое ссылаются массивы столбцов."""
+        return cast(mmap.mmap, self.memory.obj)
+
+
+def _release_free_heap() -> None:
+    """Возвращает системе освобожденную память кучи glibc; на других платформах ничего не делает."""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _column_buffers(df: pd.DataFrame) -> List[Tuple[Dict[str, Any], np.ndarray]]:
+    """Возвращает описание и массив каждого столбца; текстовые столбцы хранятся кодами и словарем значений."""
+    columns: List[Tuple[Dict[str, Any], np.ndarray]] = []
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            values = series.to_numpy()
+            columns.append(({"name": name, "kind": "numpy", "dtype": values.dtype.str}, values))
+            continue
+        categorical = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+        codes = categorical.cat.codes.to_numpy()
+        categories = categorical.cat.categories.tolist()
+        columns.append(({"name": name, "kind": "category", "dtype": codes.dtype.str, "categories": categories}, codes))
+    return columns
+
+
+class SharedDataset:
+    """Нормализованные столбцы транзакций в одном сегменте разделяемой памяти.
+
+    Публикующий процесс записывает столбцы один раз, остальные процессы подключаются по имени сегмента
+    и получают DataFrame, столбцы которого ссылаются на общую память без копирования и доступны только
+    для чтения. Строки упорядочены по дате операции, поэтому TransactionStore над ними тоже не копирует данные.
+    """
+
+    def __init__(self, segment: _Segment, owner: bool) -> None:
+        self.segment = segment
+        self.owner = owner
+        (length,) = HEADER_LENGTH.unpack_from(segment.memory)
+        self.header: Dict[str, Any] = json.loads(
+            bytes(segment.memory[HEADER_LENGTH.size : HEADER_LENGTH.size + length])
+        )
+        self._data_start = _data_start(length)
+        if self.header.get("version") != SHARED_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия сегмента {segment.name}: {self.header.get('version')}")
+        self._frame: Optional[pd.DataFrame] = None
+        self._store: Optional[TransactionStore] = None
+
+    @property
+    def name(self) -> str:
+        """Имя сегмента для подключения других процессов."""
+        return str(self.segment.name)
+
+    @classmethod
+    def publish(cls, transactions: pd.DataFrame, name: Optional[str] = None) -> "SharedDataset":
+        """Записывает нормализованную и упорядоченную по дате таблицу в новый сегмент разделяемой памяти."""
+        df = normalize_transactions(transactions)
+        dates = df[DATE_COLUMN].to_numpy(dtype="datetime64[ns]")
+        df = df.take(np.argsort(dates, kind="stable"))
+        columns = _column_buffers(df)
+
+        # Смещения буферов считаются от начала данных, которые идут за заголовком с выравниванием
+        header: Dict[str, Any] = {"version": SHARED_FORMAT_VERSION, "rows": len(df), "columns": []}
+        size = 0
+        for meta, values in columns:
+            header["columns"].append({**meta, "offset": size})
+            size = _align(size + values.nbytes)
+        encoded = json.dumps(header, ensure_ascii=False, default=str).encode("utf-8")
+        data_start = _data_start(len(encoded))
+
+        segment = _Segment(name=name, create=True, size=data_start + max(size, 1))
+        _untrack(segment)
+        HEADER_LENGTH.pack_into(segment.memory, 0, len(encoded))
+        segment.memory[HEADER_LENGTH.size : HEADER_LENGTH.size + len(encoded)] = encoded
+        for column, (_, values) in zip(header["columns"], columns):
+            offset = data_start + column["offset"]
+            np.ndarray(values.shape, dtype=values.dtype, buffer=segment.memory, offset=offset)[:] = values
+        logging.info(
+            f"Опубликовано {len(df)} транзакций в разделяемой памяти {segment.name} ({segment.size >> 20} МБ)"
+        )
+        return cls(segment, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_SHARED_NAME) -> "SharedDataset":
+        """Подключается к сегменту, опубликованному другим процессом."""
+        segment = _Segment(name=name)
+        _untrack(segment)
+        return cls(segment, owner=False)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Нормализованная таблица транзакций, столбцы которой ссылаются на разделяемую память."""
+        if self._frame is None:
+            rows = self.header["rows"]
+            values: Dict[str, Any] = {}
+            for column in self.header["columns"]:
+                offset = self._data_start + column["offset"]
+                # Массив ссылается на само отображение памяти, а не на memoryview сегмента, поэтому
+                # отображение не может быть закрыто, пока массив или его срезы живы
+                array: np.ndarray = np.frombuffer(
+                    self.segment.mapping, dtype=np.dtype(column["dtype"]), count=rows, offset=offset
+                )
+                array.flags.writeable = False
+                if column["kind"] == "category":
+                    values[column["name"]] = pd.Categorical.from_codes(array, categories=column["categories"])
+                else:
+                    values[column["name"]] = array
+            # copy=False сохраняет по блоку на столбец, не объединяя их в новый массив
+            frame = pd.DataFrame(values, copy=False)
+            frame.attrs[NORMALIZED_ATTR] = True
+            self._frame = frame
+        return self._frame
+
+    @property
+    def store(self) -> TransactionStore:
+        """Хранилище с индексами над общей таблицей; собственную память занимают только индексы и куб."""
+        if self._store is None:
+            store = TransactionStore(self.frame)
+            # Куб и индекс крупнейших платежей строятся сразу, а временная память их построения возвращается системе
+            _ = store.cube, store.top_index
+            _release_free_heap()
+            self._store = store
+        return self._store
+
+    def close(self) -> None:
+        """Отключается от сегмента; память освобождается, когда исчезнут последние ссылки на его столбцы."""
+        self._frame = self._store = None
+        self.segment.close()
+
+    def unlink(self) -> None:
+        """Удаляет сегмент из системы; подключенные процессы сохраняют доступ до своего close."""
+        if os.name == "posix":
+            resource_tracker.register(self.segment._name, "shared_memory")  # type: ignore[attr-defined]
+        self.segment.unlink()
+
+    def __enter__(self) -> "SharedDataset":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self.owner:
+            self.unlink()
+        self.close()
+
+
+def main() -> None:
+    """Публикует выгрузку в разделяемой памяти и держит ее до завершения процесса (Ctrl+C или SIGTERM)."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("transactions", help="Файл выгрузки")
+    parser.add_argument("--name", default=DEFAULT_SHARED_NAME, help="Имя сегмента разделяемой памяти")
+    args = parser.parse_args()
+
+    transactions = load_transactions(args.transactions)
+    if transactions is None:
+        raise SystemExit(f"Не удалось загрузить данные о транзакциях из {args.transactions}.")
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with SharedDataset.publish(transactions, args.name) as dataset:
+        print(dataset.name, flush=True)
+        try:
+            signal.pause()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.loader import SUCCESS_STATUS, VIEWS, normalize_transactions
+
+# Столбцы выгрузки и их имена и типы в таблице SQLite
+COLUMNS = {
+    "Дата операции": ("operation_date", "INTEGER"),
+    "Дата платежа": ("payment_date", "INTEGER"),
+    "Номер карты": ("card", "TEXT"),
+    "Статус": ("status", "TEXT"),
+    "Сумма операции": ("amount", "REAL"),
+    "Валюта операции": ("currency", "TEXT"),
+    "Сумма платежа": ("payment_amount", "REAL"),
+    "Валюта платежа": ("payment_currency", "TEXT"),
+    "Кэшбэк": ("cashback", "REAL"),
+    "Категория": ("category", "TEXT"),
+    "MCC": ("mcc", "REAL"),
+    "Описание": ("description", "TEXT"),
+    "Бонусы (включая кэшбэк)": ("bonuses", "REAL"),
+    "Округление на инвесткопилку": ("rounding", "REAL"),
+    "Сумма операции с округлением": ("rounded_amount", "REAL"),
+}
+# Индексы под выборки отчетов: окно дат, категория в окне дат, карта в окне дат
+INDEXES = {
+    "idx_operation_date": "operation_date",
+    "idx_category_date": "category, operation_date",
+    "idx_card_date": "card, operation_date",
+}
+# Условия SQL разделов выгрузки, как в src.loader.partition_codes: знак суммы платежа, а без нее — суммы операции;
+# строка без суммы платежа и без статуса — трата, строка без обеих сумм не входит ни в траты, ни в поступления
+SUCCESSFUL_SQL = f"(status IS NULL OR status = '{SUCCESS_STATUS}')"
+AMOUNT_SQL = "(payment_amount IS NOT NULL OR amount IS NOT NULL)"
+DEBIT_SQL = "(COALESCE(payment_amount, amount) < 0 OR (payment_amount IS NULL AND status IS NULL))"
+VIEW_SQL = {
+    "spend": f"{SUCCESSFUL_SQL} AND {AMOUNT_SQL} AND {DEBIT_SQL}",
+    "income": f"{SUCCESSFUL_SQL} AND {AMOUNT_SQL} AND NOT {DEBIT_SQL}",
+    "failed": f"NOT {SUCCESSFUL_SQL}",
+    "no_amount": f"{SUCCESSFUL_SQL} AND NOT {AMOUNT_SQL}",
+    "successful": SUCCESSFUL_SQL,
+}
+# Разница модуля суммы до следующего кратного :lim значения; для неотрицательных чисел CAST округляет вниз, как //
+SAVINGS_SQL = "(CAST(ABS(amount) / :lim AS INTEGER) + 1) * :lim - ABS(amount)"
+
+
+def _to_ns(value: datetime) -> int:
+    """Переводит дату в наносекунды от начала эпохи, как она хранится в таблице."""
+    return int(pd.Timestamp(value).value)
+
+
+def _bounds(
+    start: Optional[datetime], end: Optional[datetime], include_end: bool, view: Optional[str] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """Возвращает условие SQL на окно дат операции и представление view и его параметры."""
+    conditions, params = ["operation_date IS NOT NULL"], {}
+    if view is not None:
+        if view not in VIEWS:
+            raise ValueError(f"Неизвестное представление {view!r}: ожидается одно из {', '.join(VIEWS)}.")
+        conditions.append(VIEW_SQL[view])
+    if start is not None:
+        conditions.append("operation_date >= :start")
+        params["start"] = _to_ns(start)
+    if end is not None:
+        conditions.append("operation_date <= :end" if include_end else "operation_date < :end")
+        params["end"] = _to_ns(end)
+    return " AND ".join(conditions), params
+
+
+class SQLiteStore:
+    """Транзакции во встроенной базе SQLite с индексами; агрегаты отчетов считаются запросами SQL."""
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.abspath(path)
+        self._local = threading.local()
+        columns = ", ".join(f"{name} {kind}" for name, kind in COLUMNS.values())
+        with self._connection() as connection:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS transactions ({columns})")
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+            connection.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)")
+
+    @classmethod
+    def from_frame(cls, transactions: pd.DataFrame, path: str) -> "SQLiteStore":
+        """Создает базу по таблице транзакций."""
+        store = cls(path)
+        store.append(transactions)
+        return store
+
+    def _connection(self) -> sqlite3.Connection:
+        """Возвращает соединение текущего потока: соединения SQLite нельзя разделять между потоками."""
+        connection: Optional[sqlite3.Connection] = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _query(self, sql: str, params: Dict[str, Any]) -> List[Tuple[Any, ...]]:
+        """Выполняет запрос и возвращает все строки результата."""
+        return self._connection().execute(sql, params).fetchall()
+
+    def __len__(self) -> int:
+        return int(self._query("SELECT COUNT(*) FROM transactions", {})[0][0])
+
+    @property
+    def version(self) -> int:
+        """Номер версии данных, увеличивается при каждом добавлении строк."""
+        return int(self._query("SELECT value FROM meta WHERE key = 'version'", {})[0][0])
+
+    def append(self, transactions: pd.DataFrame) -> None:
+        """Добавляет транзакции в базу одной транзакцией SQLite."""
+        df = normalize_transactions(transactions)
+        values: List[Iterable[Any]] = []
+        for name in COLUMNS:
+            if name not in df.columns:
+                values.append([None] * len(df))
+            elif pd.api.types.is_datetime64_any_dtype(df[name]):
+                dates = df[name].to_numpy(dtype="datetime64[ns]")
+                ns = dates.view(np.int64).astype(object)
+                ns[np.isnat(dates)] = None
+                values.append(ns)
+            else:
+                column = df[name].astype(object)
+                values.append(column.where(df[name].notna(), None).to_numpy())
+
+        names = [name for name, _ in COLUMNS.values()]
+        sql = f"INSERT INTO transactions ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        with self._connection() as connection:
+            connection.executemany(sql, zip(*values))
+            # Индексы строятся после первой загрузки: так быстрее, чем обновлять их на каждой вставке
+            for index, indexed in INDEXES.items():
+                connection.execute(f"CREATE INDEX IF NOT EXISTS {index} ON transactions ({indexed})")
+            connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def select(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        category: Optional[str] = None,
+        card: Optional[str] = None,
+        include_end: bool = True,
+        view: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Возвращает транзакции окна дат, при необходимости — только по категории, карте или представлению."""
+        where, params = _bounds(start, end, include_end, view)
+        if category is not None:
+            where += " AND category = :category"
+            params["category"] = category
+        if card is not None:
+            where += " AND card = :card"
+            params["card"] = card
+        names = ", ".join(name for name, _ in COLUMNS.values())
+        rows = self._query(f"SELECT {names} FROM transactions WHERE {where} ORDER BY operation_date", params)
+        return self._frame(rows, list(COLUMNS))
+
+    @staticmethod
+    def _frame(rows: List[Tuple[Any, ...]], columns: List[str]) -> pd.DataFrame:
+        """Собирает нормализованную таблицу из строк результата запроса."""
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        for name in ("Дата операции", "Дата платежа"):
+            if name in df.columns:
+                df[name] = pd.to_datetime(df[name].astype("float64"), unit="ns")
+        return normalize_transactions(df)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Все транзакции базы, включая операции без даты, отсортированные по дате операции."""
+        names = ", ".join(name for name, _ in COLUMNS.values())
+        rows = self._query(f"SELECT {names} FROM transactions ORDER BY operation_date IS NULL, operation_date", {})
+        return self._frame(rows, list(COLUMNS))
+
+    def card_totals(self, start: datetime, end: datetime, include_end: bool = True) -> pd.Series:
+        """Возвращает сумму модулей списаний по картам за окно."""
+        where, params = _bounds(start, end, include_end, "spend")
+        rows = self._query(
+            f"SELECT card, TOTAL(ABS(amount)) FROM transactions WHERE {where} AND card IS NOT NULL "
+            "GROUP BY card ORDER BY card",
+            params,
+        )
+        return pd.Series(dict(rows), dtype="float64")
+
+    def category_total(self, category: str, start: datetime, end: datetime, include_end: bool = True) -> float:
+        """Возвращает сумму модулей списаний категории за окно."""
+        where, params = _bounds(start, end, include_end, "spend")
+        params["category"] = category
+        rows = self._query(
+            f"SELECT TOTAL(ABS(amount)) FROM transactions WHERE {where} AND category = :category", params
+        )
+        return float(rows[0][0])
+
+    def top_transactions(self, start: datetime, end: datetime, n: int = 5, include_end: bool = True) -> pd.DataFrame:
+        """Возвращает n крупнейших проведенных платежей окна по столбцу 'Сумма платежа'."""
+        where, params = _bounds(start, end, include_end, "successful")
+        params["n"] = n
+        rows = self._query(
+            "SELECT operation_date, card, category, description, payment_amount FROM transactions "
+            f"WHERE {where} AND payment_amount IS NOT NULL ORDER BY payment_amount DESC LIMIT :n",
+            params,
+        )
+        return self._frame(rows, ["Дата операции", "Номер карты", "Категория", "Описание", "Сумма платежа"])
+
+    def rounding_savings(self, start: datetime, end: datetime, limit: int) -> float:
+        """Возвращает сумму округлений до limit для списаний полуинтервала [start, end)."""
+        where, params = _bounds(start, end, include_end=False, view="spend")
+        params["lim"] = limit
+        rows = self._query(
+            f"SELECT TOTAL({SAVINGS_SQL}) FROM transactions WHERE {where} AND amount IS NOT NULL", params
+        )
+        return float(rows[0][0])
+
+    def monthly_rounding_savings(self, limit: int) -> Dict[str, float]:
+        """Возвращает суммы округлений до limit для списаний по месяцам."""
+        where, params = _bounds(None, None, include_end=True, view="spend")
+        params["lim"] = limit
+        rows = self._query(
+            "SELECT strftime('%Y-%m', operation_date / 1000000000, 'unixepoch') AS month, "
+            f"TOTAL({SAVINGS_SQL}) FROM transactions "
+            f"WHERE {where} AND amount IS NOT NULL GROUP BY month ORDER BY month",
+            params,
+        )
+        return {month: float(saved) for month, saved in rows}
+
+    def close(self) -> None:
+        """Закрывает соединение текущего потока."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
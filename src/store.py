@@ -0,0 +1,334 @@
+import itertools
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.cube import (
+    DEFAULT_TOP_K,
+    MISSING,
+    TOP_COLUMNS,
+    AggregateCube,
+    DailyTopIndex,
+    TopRows,
+    card_totals,
+    largest,
+    top_rows,
+)
+from src.loader import CATEGORY_COLUMNS, NORMALIZED_ATTR, in_view, normalize_transactions, partition_codes
+from src.sqlite_store import SQLiteStore
+
+DATE_COLUMN = "Дата операции"
+_store_ids = itertools.count(1)
+
+
+def _is_sorted(dates: np.ndarray, valid: np.ndarray, count: int) -> bool:
+    """Проверяет, что даты идут по возрастанию, а операции без даты стоят в конце."""
+    return bool(valid[:count].all() and (np.diff(dates[:count]) >= np.timedelta64(0, "ns")).all())
+
+
+class TransactionStore:
+    """Таблица транзакций, отсортированная по дате операции, с индексами для выборок по окну дат."""
+
+    def __init__(self, transactions: pd.DataFrame, top_k: int = DEFAULT_TOP_K) -> None:
+        # Идентификатор хранилища и версия его данных вместе однозначно задают содержимое таблицы
+        self.uid = next(_store_ids)
+        self.version = 0
+        self.top_k = top_k
+        self._cube: Optional[AggregateCube] = None
+        self._top_index: Optional[DailyTopIndex] = None
+        self._set_frame(normalize_transactions(transactions))
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def _set_frame(self, df: pd.DataFrame) -> None:
+        """Сортирует таблицу по дате операции, размечает разделы строк и сбрасывает вторичные индексы."""
+        dates = df[DATE_COLUMN].to_numpy(dtype="datetime64[ns]")
+
+        # Стабильная сортировка: операции без даты (NaT) оказываются в конце таблицы
+        valid = ~np.isnat(dates)
+        self._valid = int(np.count_nonzero(valid))
+        if _is_sorted(dates, valid, self._valid) and df.index.equals(pd.RangeIndex(len(df))):
+            # Уже упорядоченная таблица (например, из разделяемой памяти) используется без копирования
+            self.frame: pd.DataFrame = df
+            self._dates: np.ndarray = dates
+        else:
+            order = np.argsort(dates, kind="stable")
+            self.frame = df.take(order).reset_index(drop=True)
+            self._dates = dates[order]
+        self._indexes: Dict[str, Dict[Any, Tuple[np.ndarray, np.ndarray]]] = {}
+        # Разделы строк размечаются один раз при загрузке: выборки и агрегаты не сканируют статус и знак суммы
+        self._partitions = partition_codes(self.frame)
+        self._views: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def append(self, transactions: pd.DataFrame) -> None:
+        """Добавляет транзакции; куб агрегатов и индекс крупнейших платежей обновляются только в затронутых днях."""
+        new = normalize_transactions(transactions)
+        # Пустая таблица не участвует в объединении, чтобы не влиять на типы столбцов
+        combined = pd.concat([self.frame, new], ignore_index=True) if len(self.frame) else new.reset_index(drop=True)
+        for column in CATEGORY_COLUMNS:
+            if column in combined.columns and not isinstance(combined[column].dtype, pd.CategoricalDtype):
+                combined[column] = combined[column].astype("category")
+        combined.attrs[NORMALIZED_ATTR] = True
+
+        self._set_frame(combined)
+        if self._cube is not None:
+            self._cube.append(new)
+        if self._top_index is not None:
+            self._top_index.append(new)
+        self.version += 1
+
+    @property
+    def partitions(self) -> np.ndarray:
+        """Разделы строк таблицы (SPEND, INCOME, FAILED, NO_AMOUNT), размеченные при загрузке."""
+        return self._partitions
+
+    @property
+    def cube(self) -> AggregateCube:
+        """Куб агрегатов по дням, картам и категориям, строится при первом обращении."""
+        if self._cube is None:
+            self._cube = AggregateCube.from_frame(self.frame)
+        return self._cube
+
+    @property
+    def top_index(self) -> DailyTopIndex:
+        """Индекс top_k крупнейших платежей каждого дня, строится при первом обращении."""
+        if self._top_index is None:
+            self._top_index = DailyTopIndex.from_frame(self.frame, self.top_k)
+        return self._top_index
+
+    @staticmethod
+    def _full_days(start: datetime, end: datetime, include_end: bool) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Возвращает полуинтервал целых дней [first, stop) внутри окна или None, если таких дней нет."""
+        first = pd.Timestamp(start).ceil("D")
+        stop = (pd.Timestamp(end) + pd.Timedelta(1, "ns")).floor("D") if include_end else pd.Timestamp(end).floor("D")
+        if stop <= first:
+            return None
+        return first, stop
+
+    def _edges(
+        self, start: datetime, end: datetime, include_end: bool, first: datetime, stop: datetime, **kwargs: Any
+    ) -> pd.DataFrame:
+        """Возвращает строки неполных дней на границах окна."""
+        return pd.concat(
+            [
+                self.select(start, first, include_end=False, **kwargs),
+                self.select(stop, end, include_end=include_end, **kwargs),
+            ]
+        )
+
+    def card_totals(self, start: datetime, end: datetime, include_end: bool = True) -> pd.Series:
+        """Возвращает сумму модулей списаний по картам за окно: целые дни из куба, границы — из строк."""
+        full_days = self._full_days(start, end, include_end)
+        if full_days is None:
+            return card_totals(self.select(start, end, include_end=include_end, view="spend"))
+
+        first, stop = full_days
+        buckets = self.cube.spend_between(first, stop)
+        totals = buckets["abs_sum"].groupby(level="Номер карты").sum()
+        totals = totals.add(card_totals(self._edges(start, end, include_end, first, stop, view="spend")), fill_value=0)
+        return totals[totals.index != MISSING].sort_index()
+
+    def category_total(self, category: str, start: datetime, end: datetime, include_end: bool = True) -> float:
+        """Возвращает сумму модулей списаний категории за окно."""
+        full_days = self._full_days(start, end, include_end)
+        if full_days is None:
+            rows = self.select(start, end, category=category, include_end=include_end, view="spend")
+            return float(rows["Сумма операции"].abs().sum())
+
+        first, stop = full_days
+        buckets = self.cube.spend_between(first, stop)
+        in_category = buckets.index.get_level_values("Категория") == category
+        edges = self._edges(start, end, include_end, first, stop, category=category, view="spend")
+        return float(buckets["abs_sum"][in_category].sum() + edges["Сумма операции"].abs().sum())
+
+    def top_transactions(
+        self, start: datetime, end: datetime, n: int = 5, include_end: bool = True, card: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Возвращает n крупнейших проведенных платежей окна по столбцу 'Сумма платежа', при необходимости — по карте.
+
+        Целые дни берутся из индекса крупнейших платежей, неполные граничные дни — из строк.
+        """
+        full_days = self._full_days(start, end, include_end)
+        if full_days is None or n > self.top_k:
+            rows = self.select(start, end, card=card, include_end=include_end, view="successful")
+            return rows.nlargest(n, "Сумма платежа")
+
+        first, stop = full_days
+        parts = [self.top_index.top(first, stop, n, card)]
+        for edge_start, edge_end, edge_include in ((start, first, False), (stop, end, include_end)):
+            positions = self.positions(edge_start, edge_end, card=card, include_end=edge_include, view="successful")
+            parts.append(self._top_rows(positions, n))
+        best = largest(parts, n)
+        return pd.DataFrame({name: best[name] for name in TOP_COLUMNS})
+
+    def _top_rows(self, positions: Union[slice, np.ndarray], n: int) -> TopRows:
+        """Возвращает n крупнейших платежей среди строк с заданными позициями."""
+        amounts = self.frame["Сумма платежа"].to_numpy(dtype="float64")[positions]
+        if isinstance(positions, slice):
+            positions = np.arange(*positions.indices(len(self.frame)))
+        # Столбцы собираются только для n кандидатов, а не для всего граничного дня
+        candidates = positions[np.argsort(-np.nan_to_num(amounts, nan=-np.inf), kind="stable")[:n]]
+        return top_rows(self.frame, candidates)
+
+    def _index(self, column: str) -> Dict[Any, Tuple[np.ndarray, np.ndarray]]:
+        """Возвращает индекс значения столбца: позиции строк и их даты, упорядоченные по дате."""
+        index = self._indexes.get(column)
+        if index is None:
+            index = {}
+            for value, group in self.frame.groupby(column, observed=True, sort=False).indices.items():
+                positions = np.asarray(group)
+                positions = positions[positions < self._valid]
+                index[value] = (positions, self._dates[positions])
+            self._indexes[column] = index
+        return index
+
+    def _view(self, view: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Возвращает индекс представления: позиции его строк с известной датой и их даты, упорядоченные по дате."""
+        index = self._views.get(view)
+        if index is None:
+            positions = np.flatnonzero(in_view(self._partitions[: self._valid], view))
+            index = self._views[view] = (positions, self._dates[positions])
+        return index
+
+    @staticmethod
+    def _window(
+        dates: np.ndarray,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        include_end: bool,
+    ) -> Tuple[int, int]:
+        """Находит границы окна дат в отсортированном массиве двоичным поиском."""
+        lo = 0 if start is None else int(dates.searchsorted(np.datetime64(start, "ns"), side="left"))
+        hi = len(dates)
+        if end is not None:
+            hi = int(dates.searchsorted(np.datetime64(end, "ns"), side="right" if include_end else "left"))
+        return lo, max(lo, hi)
+
+    def _indexed_positions(
+        self,
+        column: str,
+        value: Any,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        include_end: bool,
+    ) -> np.ndarray:
+        """Возвращает позиции строк со значением столбца внутри окна дат."""
+        positions, dates = self._index(column).get(value, (np.empty(0, dtype=np.intp), self._dates[:0]))
+        lo, hi = self._window(dates, start, end, include_end)
+        selected: np.ndarray = positions[lo:hi]
+        return selected
+
+    def positions(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        category: Optional[str] = None,
+        card: Optional[str] = None,
+        include_end: bool = True,
+        view: Optional[str] = None,
+    ) -> Union[slice, np.ndarray]:
+        """Возвращает позиции строк окна [start, end] двоичным поиском по отсортированным датам.
+
+        view ограничивает выборку представлением: spend, income, failed или successful.
+        """
+        if category is None and card is None:
+            if view is None:
+                lo, hi = self._window(self._dates[: self._valid], start, end, include_end)
+                return slice(lo, hi)
+            positions, dates = self._view(view)
+            lo, hi = self._window(dates, start, end, include_end)
+            return positions[lo:hi]
+
+        if card is None:
+            selected = self._indexed_positions("Категория", category, start, end, include_end)
+        elif category is None:
+            selected = self._indexed_positions("Номер карты", card, start, end, include_end)
+        else:
+            # Пересечение категории и карты внутри окна: оба массива позиций уже отсортированы
+            selected = np.intersect1d(
+                self._indexed_positions("Категория", category, start, end, include_end),
+                self._indexed_positions("Номер карты", card, start, end, include_end),
+                assume_unique=True,
+            )
+        if view is not None:
+            # Позиций категории или карты в окне немного: раздел проверяется по готовой разметке строк
+            selected = selected[in_view(self._partitions[selected], view)]
+        return selected
+
+    def select(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        category: Optional[str] = None,
+        card: Optional[str] = None,
+        include_end: bool = True,
+        view: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Возвращает транзакции окна дат, при необходимости — только по категории, карте или представлению."""
+        return self.frame.iloc[self.positions(start, end, category, card, include_end, view)]
+
+
+Transactions = Union[pd.DataFrame, TransactionStore, SQLiteStore]
+# Хранилища с индексами: выборки и агрегаты окна считаются ими самими, без полной таблицы
+INDEXED_STORES = (TransactionStore, SQLiteStore)
+
+
+def as_frame(transactions: Transactions) -> pd.DataFrame:
+    """Возвращает нормализованную таблицу транзакций из DataFrame или хранилища."""
+    if isinstance(transactions, INDEXED_STORES):
+        return transactions.frame
+    return normalize_transactions(transactions)
+
+
+def select_transactions(
+    transactions: Transactions,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    category: Optional[str] = None,
+    include_end: bool = True,
+    view: Optional[str] = None,
+) -> pd.DataFrame:
+    """Отбирает транзакции окна дат: для хранилища — по индексу, для DataFrame — маской.
+
+    view ограничивает выборку представлением: spend, income, failed или successful.
+    """
+    if isinstance(transactions, INDEXED_STORES):
+        return transactions.select(start, end, category=category, include_end=include_end, view=view)
+
+    df = normalize_transactions(transactions)
+    dates = df[DATE_COLUMN]
+    mask = dates.notna()
+    if start is not None:
+        mask &= dates >= start
+    if end is not None:
+        mask &= (dates <= end) if include_end else (dates < end)
+    if category is not None:
+        mask &= df["Категория"] == category
+    if view is not None:
+        mask &= in_view(partition_codes(df), view)
+    return df[mask]
+
+
+def window_card_totals(transactions: Transactions, start: datetime, end: datetime) -> pd.Series:
+    """Возвращает сумму модулей списаний по картам за окно [start, end]."""
+    if isinstance(transactions, INDEXED_STORES):
+        return transactions.card_totals(start, end)
+    return card_totals(select_transactions(transactions, start, end, view="spend"))
+
+
+def window_category_total(transactions: Transactions, category: str, start: datetime, end: datetime) -> float:
+    """Возвращает сумму модулей списаний категории за окно [start, end]."""
+    if isinstance(transactions, INDEXED_STORES):
+        return transactions.category_total(category, start, end)
+    rows = select_transactions(transactions, start, end, category=category, view="spend")
+    return float(rows["Сумма операции"].abs().sum())
+
+
+def window_top_transactions(transactions: Transactions, start: datetime, end: datetime, n: int = 5) -> pd.DataFrame:
+    """Возвращает n крупнейших проведенных платежей окна [start, end] по столбцу 'Сумма платежа'."""
+    if isinstance(transactions, INDEXED_STORES):
+        return transactions.top_transactions(start, end, n)
+    return select_transactions(transactions, start, end, view="successful").nlargest(n, "Сумма платежа")
@@ -0,0 +1,125 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from src.cube import card_totals, format_cards
+from src.loader import SPEND, normalize_transactions, partition_codes
+from src.services import rounding_savings
+
+# Размер пакета строк по умолчанию
+DEFAULT_BATCH_SIZE = 50_000
+
+
+def iter_excel_batches(file_path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """Построчно читает XLSX в режиме read_only и возвращает нормализованные пакеты транзакций."""
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        batch: List[Any] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield normalize_transactions(pd.DataFrame(batch, columns=header))
+                batch = []
+        if batch:
+            yield normalize_transactions(pd.DataFrame(batch, columns=header))
+    finally:
+        workbook.close()
+
+
+def iter_csv_batches(
+    file_path: str, batch_size: int = DEFAULT_BATCH_SIZE, **read_csv_kwargs: Any
+) -> Iterator[pd.DataFrame]:
+    """Читает CSV частями и возвращает нормализованные пакеты транзакций."""
+    for chunk in pd.read_csv(file_path, chunksize=batch_size, **read_csv_kwargs):
+        yield normalize_transactions(chunk)
+
+
+def iter_batches(file_path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """Возвращает пакеты транзакций из XLSX или CSV в зависимости от расширения файла."""
+    if os.path.splitext(file_path)[1].lower() == ".csv":
+        return iter_csv_batches(file_path, batch_size)
+    return iter_excel_batches(file_path, batch_size)
+
+
+class InvestmentBankReducer:
+    """Потоковый расчет сумм 'Инвесткопилки' по месяцам."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._by_month = pd.Series(dtype="float64")
+
+    def update(self, batch: pd.DataFrame) -> None:
+        """Добавляет пакет транзакций."""
+        valid = batch[
+            batch["Дата операции"].notna() & batch["Сумма операции"].notna() & (partition_codes(batch) == SPEND)
+        ]
+        savings = pd.Series(rounding_savings(valid["Сумма операции"].to_numpy(), self.limit), index=valid.index)
+        by_month = savings.groupby(valid["Дата операции"].dt.to_period("M")).sum()
+        self._by_month = self._by_month.add(by_month, fill_value=0)
+
+    def result(self) -> Dict[str, float]:
+        """Возвращает суммы, отложенные в 'Инвесткопилку', по месяцам."""
+        return {str(period): float(saved) for period, saved in self._by_month.sort_index().items()}
+
+
+class CategorySpendingReducer:
+    """Потоковый расчет трат по категории за три месяца до заданной даты."""
+
+    def __init__(self, category: str, date: Optional[str] = None) -> None:
+        self.category = category
+        self.end_date = datetime.strptime(date or datetime.now().strftime("%Y-%m-%d"), "%Y-%m-%d")
+        self.start_date = self.end_date - timedelta(days=90)
+        self._total = 0.0
+
+    def update(self, batch: pd.DataFrame) -> None:
+        """Добавляет пакет транзакций."""
+        dates = batch["Дата операции"]
+        mask = (batch["Категория"] == self.category) & (dates >= self.start_date) & (dates <= self.end_date)
+        mask &= partition_codes(batch) == SPEND
+        self._total += float(batch.loc[mask, "Сумма операции"].abs().sum())
+
+    def result(self) -> Dict[str, Any]:
+        """Возвращает отчет в формате spending_by_category."""
+        return {
+            "category": self.category,
+            "total_spent": round(self._total, 2),
+            "date_range": {
+                "start_date": self.start_date.strftime("%d.%m.%Y"),
+                "end_date": self.end_date.strftime("%d.%m.%Y"),
+            },
+        }
+
+
+class CardSummaryReducer:
+    """Потоковый расчет блока карт главной страницы за окно дат."""
+
+    def __init__(self, start: datetime, end: datetime) -> None:
+        self.start = start
+        self.end = end
+        self._totals = pd.Series(dtype="float64")
+
+    def update(self, batch: pd.DataFrame) -> None:
+        """Добавляет пакет транзакций."""
+        dates = batch["Дата операции"]
+        mask = (dates >= self.start) & (dates <= self.end) & (partition_codes(batch) == SPEND)
+        self._totals = self._totals.add(card_totals(batch[mask]), fill_value=0)
+
+    def result(self) -> List[Dict[str, Any]]:
+        """Возвращает суммы и кешбэк по картам."""
+        return format_cards(self._totals.sort_index())
+
+
+def reduce_batches(batches: Iterable[pd.DataFrame], *reducers: Any) -> List[Any]:
+    """Пропускает пакеты через все редьюсеры за один проход и возвращает их результаты."""
+    for batch in batches:
+        for reducer in reducers:
+            reducer.update(batch)
+    return [reducer.result() for reducer in reducers]
@@ -1,79 +1,104 @@
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-import pandas as pd
-import requests
-from dotenv import load_dotenv
+from src.instrumentation import span
+
+# pandas, requests и dotenv импортируются при первом использовании, чтобы импорт модуля оставался быстрым
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from src.market_data import MarketDataClient
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 
-# Загрузка переменных окружения из файла .env
-load_dotenv()
-API_TOKEN: Optional[str] = os.getenv("API_TOKEN")  # Получаем API токен для валют
-API_KEY: Optional[str] = os.getenv("API_KEY")  # Получаем API ключ для акций
+# Пути по умолчанию считаются от корня проекта, а не от текущего каталога
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TRANSACTIONS_PATH = os.path.join(PROJECT_ROOT, "data", "operations.xlsx")
+DEFAULT_SETTINGS_PATH = os.path.join(PROJECT_ROOT, "user_settings.json")
 
-# Проверка наличия токена
-if API_TOKEN is None:
-    raise ValueError("API_TOKEN не установлен. Проверьте файл .env.")
+# Общий клиент рыночных данных: его TTL-кеш и пул соединений переиспользуются между вызовами
+_market_data_client: Optional["MarketDataClient"] = None
+_market_data_lock = threading.Lock()
 
-if API_KEY is None:
-    raise ValueError("API_KEY не установлен. Проверьте файл .env.")
 
-
-def read_excel_data(file_path: str) -> Optional[pd.DataFrame]:
+def read_excel_data(file_path: str, use_cache: bool = True) -> Optional["pd.DataFrame"]:
     """Читает данные из XLSX файла и возвращает DataFrame или None."""
+    import pandas as pd
+
+    from src.cache import load_cached_frame, store_cached_frame
+
     try:
-        df = pd.read_excel(file_path)
-        return df
+        with span("read_excel_data") as stage:
+            # Повторные чтения обслуживаются из колоночного кеша без разбора XLSX
+            if use_cache:
+                with span("cache_load"):
+                    cached = load_cached_frame(file_path)
+                if cached is not None:
+                    stage.rows = len(cached)
+                    return cached
+
+            with span("read_excel"):
+                df = pd.read_excel(file_path)
+            stage.rows = len(df)
+            if use_cache:
+                with span("cache_store"):
+                    store_cached_frame(file_path, df)
+            return df
     except Exception as e:
         logging.error(f"Ошибка при чтении файла: {e}")
         return None
 
 
-def get_currency_rates(user_currencies: List[str]) -> List[Dict[str, Any]]:
-    """Получает курсы валют через APIlayer."""
-    rates = []
-    api_url = "https://api.apilayer.com/exchangerates_data/latest"
-    headers = {"apikey": API_TOKEN}
+def get_api_credentials() -> Tuple[str, str]:
+    """Загружает переменные окружения из файла .env и возвращает токен APIlayer и ключ Marketstack."""
+    from dotenv import load_dotenv
 
-    response = requests.get(api_url, headers=headers)
-    if response.status_code == 200:
-        data = response.json()
-        for currency in user_currencies:
-            if currency in data["rates"]:
-                rates.append({"currency": currency, "rate": data["rates"][currency]})
-    else:
-        logging.error("Ошибка при получении курсов валют.")
+    load_dotenv()
+    api_token = os.getenv("API_TOKEN")  # Получаем API токен для валют
+    api_key = os.getenv("API_KEY")  # Получаем API ключ для акций
 
-    return rates
+    # Проверка наличия токена: только при обращении к рыночным данным, а не при импорте модуля
+    if api_token is None:
+        raise ValueError("API_TOKEN не установлен. Проверьте файл .env.")
 
+    if api_key is None:
+        raise ValueError("API_KEY не установлен. Проверьте файл .env.")
 
-def get_stock_prices(stocks: List[str]) -> List[Dict[str, Any]]:
-    """Получает цены акций с использованием Marketstack."""
-    stock_prices = []
+    return api_token, api_key
+
+
+def get_market_data_client() -> "MarketDataClient":
+    """Возвращает общий клиент рыночных данных, создавая его при первом обращении."""
+    from src.market_data import APILAYER_URL, MARKETSTACK_URL, MarketDataClient
+
+    global _market_data_client
+    with _market_data_lock:
+        if _market_data_client is None:
+            api_token, api_key = get_api_credentials()
+            _market_data_client = MarketDataClient(
+                api_token,
+                api_key,
+                currency_url=os.getenv("APILAYER_URL", APILAYER_URL),
+                stock_url=os.getenv("MARKETSTACK_URL", MARKETSTACK_URL),
+            )
+        return _market_data_client
 
-    url = "https://api.marketstack.com/v1/intraday"
 
-    for stock in stocks:
-        querystring = {"access_key": API_KEY, "symbols": stock}
+def get_currency_rates(user_currencies: List[str]) -> List[Dict[str, Any]]:
+    """Получает курсы валют через APIlayer."""
+    return get_market_data_client().get_currency_rates(user_currencies)
 
-        try:
-            response = requests.get(url, params=querystring)
-            response.raise_for_status()
 
-            stock_data = response.json()
-            if "data" in stock_data and len(stock_data["data"]) > 0:
-                last_price = stock_data["data"][0]["last"]
-                if last_price is not None:
-                    stock_prices.append({"stock": stock, "price": float(last_price)})
-                else:
-                    logging.error(f"Цена для акции {stock} равна None.")
-            else:
-                logging.error(f"Нет данных для акции {stock}.")
+def get_stock_prices(stocks: List[str]) -> List[Dict[str, Any]]:
+    """Получает цены акций с использованием Marketstack."""
+    return get_market_data_client().get_stock_prices(stocks)
 
-        except requests.RequestException as e:
-            logging.error(f"Ошибка при получении данных для {stock}: {e}")
 
-    return stock_prices
+def fetch_market_data(
+    user_currencies: List[str], stocks: List[str]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Параллельно получает курсы валют и цены акций."""
+    return get_market_data_client().fetch(user_currencies, stocks)
@@ -1,13 +1,41 @@
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 
-import pandas as pd
+from src.cube import format_cards
+from src.instrumentation import collect, span
+from src.memo import dataset_key, market_cache, memoize, transaction_cache
+from src.rules import RuleSet, card_cashback, rules_from_settings
+from src.store import Transactions, select_transactions, window_card_totals, window_top_transactions
+from src.utils import DEFAULT_TRANSACTIONS_PATH, fetch_market_data, read_excel_data
 
-from src.utils import get_currency_rates, get_stock_prices, read_excel_data
 
+def generate_response(
+    date_str: str,
+    user_settings: Dict[str, Any],
+    transactions: Optional[Transactions] = None,
+    market_data: Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]] = None,
+    timings: bool = False,
+) -> Dict[str, Any]:
+    """Генерирует JSON-ответ на основе входной даты.
 
-def generate_response(date_str: str, user_settings: Dict[str, Any]) -> Dict[str, Any]:
-    """Генерирует JSON-ответ на основе входной даты."""
+    Если market_data передан, курсы валют и цены акций берутся из него без обращения к API.
+    При timings=True в ответ добавляется блок timings с замерами этапов.
+    """
+    with collect() if timings else nullcontext() as records, span("generate_response"):
+        response_json = _build_response(date_str, user_settings, transactions, market_data)
+    if records is not None:
+        response_json["timings"] = records
+    return response_json
+
+
+def _build_response(
+    date_str: str,
+    user_settings: Dict[str, Any],
+    transactions: Optional[Transactions],
+    market_data: Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]],
+) -> Dict[str, Any]:
+    """Формирует ответ главной страницы по этапам: карты, топ транзакций, рыночные данные."""
     current_time: datetime = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
 
     # Приветствие
@@ -20,49 +48,40 @@ def generate_response(date_str: str, user_settings: Dict[str, Any]) -> Dict[str,
     else:
         greeting = "Добрый вечер"
 
-    # Чтение данных из XLSX файла
-    df = read_excel_data("../data/operations.xlsx")
+    # Чтение данных из XLSX файла, если загруженная таблица не передана
+    df = transactions if transactions is not None else read_excel_data(DEFAULT_TRANSACTIONS_PATH)
 
     # Обработка данных
     if df is not None:
         start_date: datetime = current_time.replace(day=1)
         end_date: datetime = current_time
 
-        filtered_df = df[
-            (pd.to_datetime(df["Дата операции"], dayfirst=True) >= start_date)
-            & (pd.to_datetime(df["Дата операции"], dayfirst=True) <= end_date)
-        ]
-
-        # Обработка карт и кешбэка
-        cards_summary = (
-            filtered_df.groupby("Номер карты")
-            .agg(
-                last_digits=("Номер карты", "first"),
-                total_spent=("Сумма операции", lambda x: round(x.abs().sum(), 2)),
-                cashback=("Сумма операции", lambda x: round(x.abs().sum() * 0.01, 2)),
-            )
-            .reset_index()
-        )
+        # Правила кешбэка из настроек; без них кешбэк считается как 1% от суммы операций
+        rules = rules_from_settings(user_settings)
 
-        cards_summary = cards_summary[["last_digits", "total_spent", "cashback"]]
-
-        # Топ-5 транзакций с заданием ключей изначально
-        top_transactions = filtered_df.nlargest(5, "Сумма платежа").assign(
-            date=lambda temp_df: pd.to_datetime(temp_df["Дата операции"], dayfirst=True).dt.strftime("%d.%m.%Y"),
-            amount=lambda temp_df: abs(temp_df["Сумма платежа"]),
-            category=lambda temp_df: temp_df["Категория"],
-            description=lambda temp_df: temp_df["Описание"],
-        )[["date", "amount", "category", "description"]]
+        # Блоки по транзакциям кешируются по версии хранилища, окну дат и правилам кешбэка
+        cards_summary, top_transactions = memoize(
+            transaction_cache,
+            _home_key(dataset_key(df), start_date, end_date, rules),
+            lambda: _transaction_blocks(df, start_date, end_date, rules),
+        )
 
-        # Получение курсов валют и цен акций
-        currency_rates = get_currency_rates(user_settings["user_currencies"])
-        stock_prices = get_stock_prices(user_settings["user_stocks"])
+        # Получение курсов валют и цен акций (запросы выполняются параллельно); блок кешируется с собственным TTL
+        if market_data is None:
+            currencies, stocks = user_settings["user_currencies"], user_settings["user_stocks"]
+            with span("market_data"):
+                market_data = memoize(
+                    market_cache,
+                    ("market", tuple(currencies), tuple(stocks)),
+                    lambda: fetch_market_data(currencies, stocks),
+                )
+        currency_rates, stock_prices = market_data
 
         # Формирование JSON-ответа
         response_json: Dict[str, Any] = {
             "greeting": greeting,
-            "cards": cards_summary.to_dict(orient="records"),
-            "top_transactions": top_transactions.to_dict(orient="records"),
+            "cards": cards_summary,
+            "top_transactions": top_transactions,
             "currency_rates": currency_rates,
             "stock_prices": stock_prices,
         }
@@ -70,3 +89,33 @@ def generate_response(date_str: str, user_settings: Dict[str, Any]) -> Dict[str,
         return response_json
 
     return {"error": "Данные о транзакциях недоступны."}
+
+
+def _home_key(
+    dataset: Any, start: datetime, end: datetime, rules: Optional[RuleSet] = None
+) -> Optional[Tuple[Any, ...]]:
+    """Возвращает ключ кеша блоков главной страницы или None, если данные не кешируются."""
+    return None if dataset is None else ("home", dataset, start, end, rules and rules.key)
+
+
+def _transaction_blocks(
+    df: Transactions, start_date: datetime, end_date: datetime, rules: Optional[RuleSet] = None
+) -> Tuple[List[Dict[str, Any]], List[Dict[Hashable, Any]]]:
+    """Вычисляет блоки главной страницы по транзакциям: карты с кешбэком и топ-5 транзакций."""
+    # Обработка карт и кешбэка: для хранилища суммы берутся из куба агрегатов, кешбэк по правилам — по строкам окна
+    with span("cards") as stage:
+        cashback = None if rules is None else card_cashback(select_transactions(df, start_date, end_date), rules)
+        cards_summary = format_cards(window_card_totals(df, start_date, end_date), cashback)
+        stage.rows = len(cards_summary)
+
+    # Топ-5 транзакций с заданием ключей изначально
+    with span("top_transactions") as stage:
+        top_transactions = window_top_transactions(df, start_date, end_date, 5).assign(
+            date=lambda temp_df: temp_df["Дата операции"].dt.strftime("%d.%m.%Y"),
+            amount=lambda temp_df: abs(temp_df["Сумма платежа"]),
+            category=lambda temp_df: temp_df["Категория"],
+            description=lambda temp_df: temp_df["Описание"],
+        )[["date", "amount", "category", "description"]]
+        stage.rows = len(top_transactions)
+
+    return cards_summary, top_transactions.to_dict(orient="records")
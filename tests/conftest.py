@@ -1,9 +1,22 @@
-from typing import Any, Dict
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator
 from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
 import pandas as pd
 import pytest
 
+import src.memo
+import src.report_sink
+import src.utils
+from benchmarks.generator import make_operations
+
+# Курсы заглушки APIlayer: единиц валюты за один рубль (80, 100, 10 и 4 рубля за единицу)
+STUB_RATES = {"USD": 0.0125, "EUR": 0.01, "CNY": 0.1, "TRY": 0.25}
+
 
 @pytest.fixture
 def user_settings() -> Dict[str, Any]:
@@ -40,3 +53,87 @@ def transactions() -> pd.DataFrame:
         "Сумма операции": ["1000,50", "2000,00", "1500,75", "500,25"],
     }
     return pd.DataFrame(data)
+
+
+@pytest.fixture(autouse=True)
+def reset_market_data_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Фикстура, изолирующая кеш общего клиента рыночных данных между тестами."""
+    monkeypatch.setattr(src.utils, "_market_data_client", None)
+
+
+@pytest.fixture(autouse=True)
+def clear_result_caches() -> Iterator[None]:
+    """Фикстура, изолирующая кеши результатов между тестами."""
+    src.memo.clear_caches()
+    yield
+    src.memo.clear_caches()
+
+
+@pytest.fixture(autouse=True)
+def report_sink(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[src.report_sink.ReportSink]:
+    """Фикстура, направляющая фоновую запись отчетов во временный каталог и дожидающаяся ее в конце теста."""
+    sink = src.report_sink.ReportSink(directory=str(tmp_path_factory.mktemp("reports")))
+    monkeypatch.setattr(src.report_sink, "_default_sink", sink)
+    yield sink
+    src.report_sink.get_report_sink().flush()
+    sink.close()
+
+
+class MarketStubHandler(BaseHTTPRequestHandler):
+    """Обработчик локального сервера, подменяющего APIlayer и Marketstack."""
+
+    server: Any
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.requests_log.append((url.path, query))
+        time.sleep(self.server.delay)
+
+        payload: Dict[str, Any]
+        if url.path.endswith("/intraday/latest"):
+            symbols = query["symbols"][0].split(",")[: int(query["limit"][0])]
+            data = [{"symbol": symbol, "last": 100.0 + i} for i, symbol in enumerate(symbols) if symbol != "NONE"]
+            status, payload = self.server.status, {"data": data}
+        elif url.path.endswith("/latest"):
+            status, payload = self.server.status, {"rates": {"USD": 0.011, "EUR": 0.0102}}
+        elif url.path.endswith("/timeseries"):
+            days = pd.date_range(query["start_date"][0], query["end_date"][0], freq="D").strftime("%Y-%m-%d")
+            symbols = query["symbols"][0].split(",")
+            rates = {day: {symbol: STUB_RATES[symbol] for symbol in symbols if symbol in STUB_RATES} for day in days}
+            status, payload = self.server.status, {"timeseries": True, "base": query["base"][0], "rates": rates}
+        else:
+            status, payload = 404, {}
+
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Отключает вывод журнала запросов в консоль."""
+
+
+@pytest.fixture
+def market_stub() -> Iterator[Any]:
+    """Фикстура с локальным HTTP-сервером вместо APIlayer и Marketstack."""
+    server: Any = ThreadingHTTPServer(("127.0.0.1", 0), MarketStubHandler)
+    server.requests_log = []
+    server.delay = 0.0
+    server.status = 200
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def operations() -> pd.DataFrame:
+    """Фикстура с синтетической выгрузкой в схеме operations.xlsx."""
+    return make_operations(5000, seed=42)
@@ -0,0 +1,135 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from benchmarks.generator import write_operations_xlsx
+from src.batch import main, market_data_for, read_manifest, run_batch
+from src.fx import FxRates
+from src.loader import normalize_transactions
+from src.main import load_dataset
+from src.services import investment_bank
+from src.views import generate_response
+
+MARKET_DATA = (
+    [{"currency": "USD", "rate": 80.0}, {"currency": "EUR", "rate": 90.0}],
+    [{"stock": "AAPL", "price": 150.0}, {"stock": "TSLA", "price": 200.0}],
+)
+
+
+@pytest.fixture
+def manifest(tmp_path: Path, operations: pd.DataFrame, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Фикстура с манифестом из двух пользователей и одного задания с отсутствующим файлом."""
+    monkeypatch.setenv("TRANSACTIONS_CACHE_DIR", str(tmp_path / "cache"))
+    write_operations_xlsx(operations.iloc[:300], str(tmp_path / "first.xlsx"))
+    write_operations_xlsx(operations.iloc[300:600], str(tmp_path / "second.xlsx"))
+    (tmp_path / "usd.json").write_text(json.dumps({"user_currencies": ["USD"], "user_stocks": ["AAPL"]}))
+    (tmp_path / "eur.json").write_text(json.dumps({"user_currencies": ["EUR", "USD"], "user_stocks": ["TSLA"]}))
+
+    query = {"home_dates": ["2021-12-20 15:00:00"], "months": ["2021-12"], "categories": ["Фастфуд"]}
+    jobs = [
+        {"id": "first", "transactions": "first.xlsx", "settings": "usd.json", **query},
+        {
+            "id": "second",
+            "transactions": "second.xlsx",
+            "settings": "eur.json",
+            "category_date": "2021-12-31",
+            **query,
+        },
+        {"id": "missing", "transactions": "missing.xlsx", "settings": "usd.json", **query},
+    ]
+    path = tmp_path / "manifest.jsonl"
+    path.write_text("\n".join(json.dumps(job, ensure_ascii=False) for job in jobs) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _by_key(results: List[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+    """Раскладывает результаты по заданию и виду запроса."""
+    return {(result["job"], result.get("kind")): result for result in results}
+
+
+@patch("src.batch.fetch_market_data", return_value=MARKET_DATA)
+def test_run_batch(mock_fetch: Any, manifest: str) -> None:
+    """Тест на пакетный расчет в пуле процессов с однократным получением рыночных данных."""
+    jobs = read_manifest(manifest)
+
+    pooled = _by_key(list(run_batch(jobs, workers=2)))
+    serial = _by_key(list(run_batch(jobs, workers=1)))
+
+    assert pooled == serial
+    assert set(pooled) == {
+        ("first", "home"),
+        ("first", "invest"),
+        ("first", "category"),
+        ("second", "home"),
+        ("second", "invest"),
+        ("second", "category"),
+        ("missing", None),
+    }
+    assert "error" in pooled[("missing", None)]
+    assert pooled[("second", "home")]["result"]["currency_rates"] == [
+        {"currency": "USD", "rate": 80.0},
+        MARKET_DATA[0][1],
+    ]
+    assert pooled[("first", "home")]["result"]["stock_prices"] == [{"stock": "AAPL", "price": 150.0}]
+    assert mock_fetch.call_count == 2
+    mock_fetch.assert_called_with(["EUR", "USD"], ["AAPL", "TSLA"])
+
+
+@patch("src.batch.fetch_market_data", return_value=MARKET_DATA)
+def test_run_batch_spawns_workers(mock_fetch: Any, manifest: str) -> None:
+    """Тест на запуск процессов пула методом spawn, а не копированием родителя с его потоками."""
+    jobs = read_manifest(manifest)[:1]
+
+    with patch("src.batch.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as executor:
+        results = list(run_batch(jobs, workers=2))
+
+    assert executor.call_args.kwargs["mp_context"].get_start_method() == "spawn"
+    assert {result["kind"] for result in results} == {"home", "invest", "category"}
+
+
+@patch("src.batch.fetch_market_data", return_value=MARKET_DATA)
+def test_run_batch_report_currency(mock_fetch: Any, manifest: str, tmp_path: Path, operations: pd.DataFrame) -> None:
+    """Тест на пересчет задания в валюту отчета из настроек, как при загрузке в load_dataset."""
+    df = normalize_transactions(operations.iloc[:300])
+    days = pd.date_range(df["Дата операции"].min().normalize(), df["Дата операции"].max().normalize())
+    currencies = sorted(set(df["Валюта операции"].dropna()) | set(df["Валюта платежа"].dropna()) | {"USD"})
+    rates = FxRates(str(tmp_path / "fx_rates.csv"))
+    rates.add(
+        pd.DataFrame([{"date": day, "currency": currency, "rate": 80.0} for day in days for currency in currencies])
+    )
+    rates.save()
+    settings_path = tmp_path / "usd_report.json"
+    settings = {"user_currencies": ["USD"], "user_stocks": [], "report_currency": "USD", "fx_rates": rates.path}
+    settings_path.write_text(json.dumps(settings))
+    job = {**read_manifest(manifest)[0], "settings": str(settings_path)}
+
+    results = _by_key(list(run_batch([job], workers=1)))
+    store, loaded_settings = load_dataset(job["transactions"], str(settings_path))
+
+    assert results[("first", "home")]["result"] == generate_response(
+        "2021-12-20 15:00:00", loaded_settings, store, market_data_for(loaded_settings, MARKET_DATA)
+    )
+    assert results[("first", "invest")]["result"] == investment_bank("2021-12", store, 50)
+    assert set(store.frame["Валюта операции"].dropna()) == {"USD"}
+
+
+def test_market_data_for() -> None:
+    """Тест на отбор рыночных данных по настройкам пользователя."""
+    assert market_data_for({"user_currencies": ["EUR"], "user_stocks": []}, MARKET_DATA) == ([MARKET_DATA[0][1]], [])
+
+
+@patch("src.batch.fetch_market_data", return_value=MARKET_DATA)
+def test_main_writes_jsonl(mock_fetch: Any, manifest: str, tmp_path: Path) -> None:
+    """Тест на запись результатов пакетного режима в JSONL."""
+    output = tmp_path / "results.jsonl"
+    with patch("sys.argv", ["batch", manifest, "--workers", "1", "--output", str(output)]):
+        main()
+
+    lines = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 7
+    assert lines[0] == {"job": "first", "kind": "home", "query": "2021-12-20 15:00:00", "result": lines[0]["result"]}
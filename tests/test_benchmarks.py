@@ -0,0 +1,39 @@
+from typing import Any
+
+import pandas as pd
+
+from benchmarks.generator import SOURCE_PATH, make_operations
+from benchmarks.suite import compare, run_suite
+
+
+def test_make_operations_schema() -> None:
+    """Тест на совпадение схемы синтетической выгрузки со схемой operations.xlsx и воспроизводимость по seed."""
+    df = make_operations(100, seed=7)
+
+    assert list(df.columns) == list(pd.read_excel(SOURCE_PATH, nrows=0).columns)
+    pd.testing.assert_frame_equal(df, make_operations(100, seed=7))
+
+
+def test_run_suite(tmp_path: Any) -> None:
+    """Тест на замер всех точек входа без обращения к API рыночных данных."""
+    report = run_suite([200], repeat=1, work_dir=str(tmp_path))
+
+    assert set(report["results"]) == {
+        "read_excel_data@200",
+        "read_excel_data (кеш)@200",
+        "generate_response@200",
+        "investment_bank@200",
+        "spending_by_category@200",
+    }
+    for result in report["results"].values():
+        assert result["seconds"] > 0 and result["rows_per_s"] > 0 and result["peak_mb"] > 0
+
+
+def test_compare_reports_regressions() -> None:
+    """Тест на поиск замедлений относительно базовых замеров."""
+    baseline = {"results": {"a@1": {"seconds": 1.0}, "b@1": {"seconds": 1.0}, "c@1": {"seconds": 0.001}}}
+    current = {
+        "results": {"a@1": {"seconds": 1.1}, "b@1": {"seconds": 1.5}, "c@1": {"seconds": 0.002}, "d@1": {"seconds": 9}}
+    }
+
+    assert compare(current, baseline, tolerance=0.25) == ["b@1"]
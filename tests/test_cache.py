@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.cache import load_cached_frame, store_cached_frame
+
+
+def _write_source(path: Path, content: bytes = b"source") -> str:
+    """Создает исходный файл, для которого строится кеш."""
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_cache_round_trip(tmp_path: Path, mock_excel_data: pd.DataFrame) -> None:
+    """Тест на сохранение и чтение DataFrame из кеша без потери данных и типов."""
+    source = _write_source(tmp_path / "operations.xlsx")
+    df = mock_excel_data.copy()
+    df.loc[1, "Номер карты"] = np.nan
+
+    assert load_cached_frame(source, cache_dir=str(tmp_path / "cache")) is None
+    assert store_cached_frame(source, df, cache_dir=str(tmp_path / "cache"))
+
+    cached = load_cached_frame(source, cache_dir=str(tmp_path / "cache"))
+
+    assert cached is not None
+    pd.testing.assert_frame_equal(cached, df)
+
+
+def test_cache_invalidated_on_change(tmp_path: Path, mock_excel_data: pd.DataFrame) -> None:
+    """Тест на устаревание кеша при изменении исходного файла."""
+    source = _write_source(tmp_path / "operations.xlsx")
+    store_cached_frame(source, mock_excel_data, cache_dir=str(tmp_path / "cache"))
+
+    _write_source(tmp_path / "operations.xlsx", b"changed source")
+
+    assert load_cached_frame(source, cache_dir=str(tmp_path / "cache")) is None
+
+
+def test_cache_survives_touch(tmp_path: Path, mock_excel_data: pd.DataFrame) -> None:
+    """Тест на использование кеша, если изменилось только время модификации файла."""
+    source = _write_source(tmp_path / "operations.xlsx")
+    store_cached_frame(source, mock_excel_data, cache_dir=str(tmp_path / "cache"))
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert load_cached_frame(source, cache_dir=str(tmp_path / "cache")) is not None
+
+
+def test_store_missing_source(tmp_path: Path, mock_excel_data: pd.DataFrame) -> None:
+    """Тест на пропуск кеширования для несуществующего файла."""
+    assert not store_cached_frame(str(tmp_path / "missing.xlsx"), mock_excel_data, cache_dir=str(tmp_path))
+
+
+def test_cache_dictionaries_without_pickle(tmp_path: Path, mock_excel_data: pd.DataFrame) -> None:
+    """Тест на хранение словарей строковых столбцов без pickle."""
+    source = _write_source(tmp_path / "operations.xlsx")
+    assert store_cached_frame(source, mock_excel_data, cache_dir=str(tmp_path / "cache"))
+
+    files = list((tmp_path / "cache").glob("*/*.categories.npy"))
+
+    assert files
+    for path in files:
+        assert np.load(path, allow_pickle=False).dtype.kind == "U"
+
+
+def test_store_rejects_mixed_object_column(tmp_path: Path, mock_excel_data: pd.DataFrame) -> None:
+    """Тест на отказ кешировать столбец со смешанными типами значений."""
+    source = _write_source(tmp_path / "operations.xlsx")
+    df = mock_excel_data.assign(mixed=[1] + ["a"] * (len(mock_excel_data) - 1))
+
+    assert not store_cached_frame(source, df, cache_dir=str(tmp_path / "cache"))
+    assert load_cached_frame(source, cache_dir=str(tmp_path / "cache")) is None
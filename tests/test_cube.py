@@ -0,0 +1,118 @@
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cube import AggregateCube, DailyTopIndex, card_totals, format_cards
+from src.loader import normalize_transactions
+from src.store import TransactionStore, select_transactions
+
+WINDOWS = [
+    (datetime(2020, 5, 1, 12, 30), datetime(2020, 5, 20, 15, 0)),
+    (datetime(2020, 5, 1), datetime(2020, 5, 31)),
+    (datetime(2020, 5, 3, 8, 0), datetime(2020, 5, 3, 20, 0)),
+    (datetime(2019, 1, 1), datetime(2021, 12, 31, 23, 59, 59)),
+]
+
+
+def test_cube_matches_groupby(operations: pd.DataFrame) -> None:
+    """Тест на совпадение мер куба с прямой группировкой строк."""
+    df = normalize_transactions(operations)
+    cube = AggregateCube.from_frame(df)
+
+    assert cube.buckets["count"].sum() == df["Дата операции"].notna().sum()
+    assert cube.buckets["sum"].sum() == pytest.approx(df["Сумма операции"].sum())
+    assert cube.buckets["abs_sum"].sum() == pytest.approx(df["Сумма операции"].abs().sum())
+
+
+def test_cube_append_matches_rebuild(operations: pd.DataFrame) -> None:
+    """Тест на то, что дозагрузка строк дает тот же куб, что и полное построение."""
+    df = normalize_transactions(operations)
+    cube = AggregateCube.from_frame(df.iloc[1000:])
+    untouched_day = cube.buckets.index.get_level_values("day").min()
+    untouched = cube.buckets.loc[cube.buckets.index.get_level_values("day") == untouched_day].copy()
+
+    cube.append(df.iloc[:1000])
+    rebuilt = AggregateCube.from_frame(df)
+
+    pd.testing.assert_frame_equal(cube.buckets, rebuilt.buckets, check_exact=False)
+    pd.testing.assert_frame_equal(
+        cube.buckets.loc[cube.buckets.index.get_level_values("day") == untouched_day], untouched
+    )
+
+
+def test_top_index_append_matches_rebuild(operations: pd.DataFrame) -> None:
+    """Тест на то, что дозагрузка платежей дает те же списки дней, что и полное построение."""
+    df = normalize_transactions(operations)
+    index = DailyTopIndex.from_frame(df.iloc[1000:], k=3)
+    index.append(df.iloc[:1000])
+    rebuilt = DailyTopIndex.from_frame(df, k=3)
+
+    for rows, expected in [(index.days, rebuilt.days)] + [
+        (index.cards[card], rebuilt.cards[card]) for card in rebuilt.cards
+    ]:
+        np.testing.assert_array_equal(rows["day"], expected["day"])
+        np.testing.assert_array_equal(rows["Сумма платежа"], expected["Сумма платежа"])
+    assert pd.Series(index.days["day"]).value_counts().max() == 3
+    assert set(index.cards) == set(df["Номер карты"].dropna())
+
+
+@pytest.mark.parametrize("start, end", WINDOWS)
+@pytest.mark.parametrize("n, card", [(1, None), (10, None), (5, "*5091")])
+def test_store_top_transactions_match_rows(operations: pd.DataFrame, start: Any, end: Any, n: int, card: Any) -> None:
+    """Тест на совпадение крупнейших платежей окна из индекса дней с выбором по строкам окна."""
+    store = TransactionStore(operations)
+    rows = select_transactions(operations, start, end, view="successful")
+    if card is not None:
+        rows = rows[rows["Номер карты"] == card]
+
+    top = store.top_transactions(start, end, n, card=card)
+
+    expected = rows.nlargest(n, "Сумма платежа")
+    assert top["Сумма платежа"].tolist() == expected["Сумма платежа"].tolist()
+    assert top["Описание"].tolist() == expected["Описание"].astype(object).tolist()
+
+
+@pytest.mark.parametrize("start, end", WINDOWS)
+def test_store_aggregates_match_rows(operations: pd.DataFrame, start: Any, end: Any) -> None:
+    """Тест на совпадение сумм из куба с суммами по строкам окна, включая неполные дни."""
+    store = TransactionStore(operations)
+    rows = select_transactions(operations, start, end, view="spend")
+
+    pd.testing.assert_series_equal(store.card_totals(start, end), card_totals(rows), check_names=False)
+    assert store.category_total("Фастфуд", start, end) == pytest.approx(
+        rows.loc[rows["Категория"] == "Фастфуд", "Сумма операции"].abs().sum()
+    )
+    assert (
+        store.top_transactions(start, end)["Сумма платежа"].tolist()
+        == (
+            select_transactions(operations, start, end, view="successful").nlargest(5, "Сумма платежа")[
+                "Сумма платежа"
+            ]
+        ).tolist()
+    )
+
+
+def test_store_append_updates_cube(operations: pd.DataFrame) -> None:
+    """Тест на обновление агрегатов хранилища при добавлении транзакций."""
+    store = TransactionStore(operations.iloc[100:])
+    start, end = datetime(2021, 12, 1), datetime(2021, 12, 31, 23, 59, 59)
+    store.card_totals(start, end)
+
+    store.top_transactions(start, end)
+    store.append(operations.iloc[:100])
+
+    assert store.version == 1
+    assert (
+        store.top_transactions(start, end)["Сумма платежа"].tolist()
+        == (
+            select_transactions(operations, start, end, view="successful").nlargest(5, "Сумма платежа")[
+                "Сумма платежа"
+            ]
+        ).tolist()
+    )
+    assert format_cards(store.card_totals(start, end)) == format_cards(
+        card_totals(select_transactions(operations, start, end, view="spend"))
+    )
@@ -0,0 +1,121 @@
+from datetime import date
+from typing import Any
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.fx import FxRates, convert_from_settings, convert_transactions
+from src.market_data import MarketDataClient
+from src.reports import spending_by_category
+
+
+@pytest.fixture
+def client(market_stub: Any) -> MarketDataClient:
+    """Фикстура с клиентом, направленным на локальную заглушку APIlayer."""
+    return MarketDataClient("token", "key", currency_url=market_stub.url, stock_url=market_stub.url)
+
+
+def test_rates_as_of_date() -> None:
+    """Тест на курс последней известной даты, не старше недели, и курс 1 для базовой валюты."""
+    rates = FxRates()
+    rates.add(
+        pd.DataFrame(
+            {
+                "date": ["2024-01-05", "2024-01-08", "2024-01-05"],
+                "currency": ["USD", "USD", "EUR"],
+                "rate": [90, 91, 98],
+            }
+        )
+    )
+    currencies = pd.Series(["USD", "USD", "USD", "EUR", "RUB", "USD", "EUR"])
+    dates = pd.to_datetime(
+        pd.Series(["2024-01-04", "2024-01-06", "2024-01-09", "2024-01-07", None, None, "2024-01-13"])
+    )
+
+    result = rates.rates_for(currencies, dates)
+
+    np.testing.assert_array_equal(result, [np.nan, 90.0, 91.0, 98.0, 1.0, np.nan, np.nan])
+
+
+def test_fetch_once_per_missing_range(market_stub: Any, client: MarketDataClient, tmp_path: Any) -> None:
+    """Тест на один запрос на недостающий диапазон (не длиннее года) и отсутствие запросов при повторе."""
+    path = str(tmp_path / "fx_rates.csv")
+    rates = FxRates(path)
+    rates.add(pd.DataFrame({"date": ["2020-06-01"], "currency": ["USD"], "rate": [70.0]}))
+
+    requests = rates.fetch_missing(client, ["USD", "EUR", "RUB"], date(2019, 1, 1), date(2020, 12, 31))
+
+    # Два года разбиты на запросы по 365 дней; EUR нужен везде, поэтому пропуски USD не дробят диапазон
+    assert requests == 3 == len(market_stub.requests_log)
+    assert [query["symbols"] for _, query in market_stub.requests_log] == [["USD,EUR"]] * 3
+    assert rates.fetch_missing(client, ["USD", "EUR"], date(2019, 1, 1), date(2020, 12, 31)) == 0
+    assert len(market_stub.requests_log) == 3
+    # Таблица сохраняется в файл и читается повторно без обращения к API
+    reloaded = FxRates(path)
+    assert len(reloaded) == len(rates)
+    assert reloaded.rates_for(pd.Series(["EUR"]), pd.Series(pd.to_datetime(["2020-02-29"])))[0] == pytest.approx(100.0)
+
+
+def test_convert_transactions(operations: pd.DataFrame, market_stub: Any, client: MarketDataClient) -> None:
+    """Тест на пересчет выгрузки в рубли и доллары по курсам на дату операции."""
+    rates = FxRates()
+
+    rub = convert_transactions(operations, rates, "RUB", client=client)
+    requests = len(market_stub.requests_log)
+    usd = convert_transactions(operations, rates, "USD", client=client)
+
+    # Курсы загружаются один раз на весь период выгрузки, а не по транзакциям
+    # 2018-2021 — 1461 день, то есть пять запросов не длиннее 365 дней
+    assert requests == 5 and len(market_stub.requests_log) == requests
+    factor = operations["Валюта операции"].map({"RUB": 1.0, "USD": 80.0, "EUR": 100.0, "CNY": 10.0, "TRY": 4.0})
+    np.testing.assert_allclose(rub["Сумма операции"], operations["Сумма операции"] * factor)
+    np.testing.assert_allclose(usd["Сумма операции"], rub["Сумма операции"] / 80.0)
+    assert set(rub["Валюта операции"]) == {"RUB"} and set(usd["Валюта платежа"]) == {"USD"}
+    rub_total = spending_by_category(rub, "Аптеки", "2020-05-31", save_report=False)["total_spent"]
+    usd_total = spending_by_category(usd, "Аптеки", "2020-05-31", save_report=False)["total_spent"]
+    assert usd_total == pytest.approx(rub_total / 80.0, abs=0.01)
+
+
+def test_convert_from_settings(operations: pd.DataFrame, market_stub: Any, monkeypatch: Any, tmp_path: Any) -> None:
+    """Тест на пересчет по ключу report_currency настроек и выгрузку без изменений без него."""
+    monkeypatch.setenv("APILAYER_URL", market_stub.url)
+    path = str(tmp_path / "fx_rates.csv")
+
+    assert convert_from_settings(operations, {}) is operations
+    converted = convert_from_settings(operations, {"report_currency": "EUR", "fx_rates": path})
+
+    assert set(converted["Валюта операции"]) == {"EUR"}
+    assert len(FxRates(path)) > 0
+
+
+def test_fetch_skips_attempted_ranges(market_stub: Any, client: MarketDataClient, tmp_path: Any) -> None:
+    """Тест на то, что диапазон валюты без курсов в ответе APIlayer не запрашивается повторно и после перезагрузки."""
+    path = str(tmp_path / "fx_rates.csv")
+    rates = FxRates(path)
+
+    assert rates.fetch_missing(client, ["USD", "XXX"], date(2020, 1, 1), date(2020, 3, 31)) == 1
+    assert rates.fetch_missing(client, ["USD", "XXX"], date(2020, 1, 1), date(2020, 3, 31)) == 0
+    assert FxRates(path).fetch_missing(client, ["XXX"], date(2020, 1, 1), date(2020, 3, 31)) == 0
+    assert len(market_stub.requests_log) == 1
+    # Соседний диапазон еще не запрашивался
+    assert FxRates(path).missing_ranges(["XXX"], date(2020, 3, 1), date(2020, 4, 30)) == [
+        (date(2020, 4, 1), date(2020, 4, 30), ["XXX"])
+    ]
+
+
+def test_convert_from_settings_offline(operations: pd.DataFrame, monkeypatch: Any, tmp_path: Any) -> None:
+    """Тест на пересчет по локальной таблице курсов без ключей API, если таблица покрывает период выгрузки."""
+    path = str(tmp_path / "fx_rates.csv")
+    days = pd.date_range("2017-12-25", "2022-01-01", freq="D")
+    rates = FxRates(path)
+    for currency, rate in {"USD": 80.0, "EUR": 100.0, "CNY": 10.0, "TRY": 4.0}.items():
+        rates.add(pd.DataFrame({"date": days, "currency": currency, "rate": rate}))
+    rates.save()
+    monkeypatch.setattr("src.fx.get_market_data_client", Mock(side_effect=ValueError("API_TOKEN не установлен")))
+
+    converted = convert_from_settings(operations, {"report_currency": "USD", "fx_rates": path})
+
+    assert set(converted["Валюта операции"]) == {"USD"}
+    assert converted["Сумма операции"].notna().all()
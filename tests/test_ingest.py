@@ -0,0 +1,95 @@
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generator import write_operations_xlsx
+from src.ingest import IngestStore, changed_ranges, row_fingerprints
+from src.loader import normalize_transactions
+from src.store import TransactionStore
+
+
+def test_row_fingerprints_stable(operations: pd.DataFrame) -> None:
+    """Тест на независимость отпечатков от порядка строк, приведения типов и различение повторов."""
+    fingerprints = row_fingerprints(operations.iloc[:100])
+    shuffled = operations.iloc[:100].iloc[::-1]
+    duplicated = pd.concat([operations.iloc[:1], operations.iloc[:1]])
+
+    assert sorted(fingerprints) == sorted(row_fingerprints(shuffled))
+    np.testing.assert_array_equal(fingerprints, row_fingerprints(normalize_transactions(operations.iloc[:100])))
+    assert len(set(row_fingerprints(duplicated))) == 2
+
+
+def test_changed_ranges() -> None:
+    """Тест на свертку дат в диапазоны подряд идущих дней."""
+    dates = pd.to_datetime(
+        pd.Series(["2021-01-03 10:00", "2021-01-01 09:00", "2021-01-02 00:00", "2021-01-10 23:59", None])
+    )
+
+    assert changed_ranges(dates) == [
+        (datetime(2021, 1, 1), datetime(2021, 1, 3)),
+        (datetime(2021, 1, 10), datetime(2021, 1, 10)),
+    ]
+
+
+def test_ingest_appends_only_new_rows(tmp_path: Path, operations: pd.DataFrame) -> None:
+    """Тест на добавление только новых строк из пересекающейся выгрузки и сохранение между запусками."""
+    store = IngestStore(str(tmp_path / "store"))
+    first = store.ingest(operations.iloc[1000:3000])
+    overlap = store.ingest(operations.iloc[995:3000])
+
+    assert (first.new_rows, first.duplicates) == (2000, 0)
+    assert (overlap.new_rows, overlap.duplicates) == (5, 2000)
+    new_days = normalize_transactions(operations.iloc[995:1000])["Дата операции"].dt.normalize()
+    assert overlap.changed_ranges[0][0] == new_days.min()
+    assert overlap.changed_ranges[-1][1] == new_days.max()
+    assert store.ingest(operations.iloc[995:3000]).new_rows == 0
+
+    reopened = IngestStore(str(tmp_path / "store"))
+    loaded = reopened.load()
+    expected = normalize_transactions(operations.iloc[995:3000])
+    assert len(reopened) == len(loaded) == 2005
+    assert sorted(loaded["Сумма операции"]) == pytest.approx(sorted(expected["Сумма операции"]))
+    assert isinstance(loaded["Категория"].dtype, pd.CategoricalDtype)
+
+    reopened.compact()
+    assert len(reopened.manifest["segments"]) == 1
+    assert reopened.ingest(operations.iloc[990:3000]).new_rows == 5
+    assert len(IngestStore(str(tmp_path / "store")).load()) == 2010
+
+
+def test_ingest_recovers_after_crash_before_manifest(tmp_path: Path, operations: pd.DataFrame) -> None:
+    """Тест на повторную загрузку после сбоя между публикацией сегмента и записью описания хранилища."""
+    store = IngestStore(str(tmp_path / "store"))
+    store.ingest(operations.iloc[:100])
+
+    with patch.object(IngestStore, "_write_manifest", side_effect=OSError("сбой")):
+        with pytest.raises(OSError):
+            store.ingest(operations.iloc[:200])
+    assert sorted(p.name for p in (tmp_path / "store" / "segments").iterdir()) == ["000001", "000002"]
+
+    reopened = IngestStore(str(tmp_path / "store"))
+    assert [p.name for p in (tmp_path / "store" / "segments").iterdir()] == ["000001"]
+    assert reopened.ingest(operations.iloc[:200]).new_rows == 100
+    assert len(IngestStore(str(tmp_path / "store")).load()) == 200
+
+
+def test_ingest_file_and_store_append(
+    tmp_path: Path, operations: pd.DataFrame, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Тест на загрузку файла выгрузки и дополнение хранилища транзакций только новыми строками."""
+    monkeypatch.setenv("TRANSACTIONS_CACHE_DIR", str(tmp_path / "cache"))
+    path = str(tmp_path / "operations.xlsx")
+    write_operations_xlsx(operations.iloc[100:300], path)
+    ingest = IngestStore(str(tmp_path / "store"))
+    transactions = TransactionStore(ingest.load())
+    transactions.append(ingest.ingest(path).rows)
+
+    write_operations_xlsx(operations.iloc[:300], path)
+    transactions.append(ingest.ingest(path).rows)
+
+    assert len(transactions) == 300
+    assert transactions.version == 2
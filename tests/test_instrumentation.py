@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+from typing import Any, Iterator
+
+import pandas as pd
+import pytest
+
+from src import instrumentation
+from src.instrumentation import collect, recorder, span
+from src.loader import normalize_transactions
+from src.reports import spending_by_category
+from src.services import investment_bank
+from src.views import generate_response
+
+MARKET_DATA: Any = ([], [])
+
+
+@pytest.fixture
+def enabled() -> Iterator[None]:
+    """Фикстура, включающая запись замеров с учетом памяти на время теста."""
+    recorder.clear()
+    instrumentation.enable(memory=True)
+    yield
+    instrumentation.disable()
+    recorder.clear()
+
+
+def test_span_disabled_is_noop() -> None:
+    """Тест на отсутствие записи замеров, когда они выключены."""
+    with span("stage") as stage:
+        stage.rows = 10
+
+    assert span("stage") is span("other")
+    assert not instrumentation.is_enabled()
+    assert recorder.totals == {}
+
+
+def test_generate_response_timings(operations: pd.DataFrame) -> None:
+    """Тест на блок timings с этапами главной страницы."""
+    response = generate_response("2021-12-20 15:00:00", {}, operations, MARKET_DATA, timings=True)
+    spans = {record["span"]: record for record in response["timings"]}
+
+    assert list(spans)[-1] == "generate_response"
+    assert "generate_response/cards" in spans
+    assert spans["generate_response/top_transactions"]["rows"] == 5
+    assert "generate_response/cards/normalize_transactions/parse_dates" in spans
+    assert all(record["wall_ms"] >= 0 for record in response["timings"])
+    assert "timings" not in generate_response("2021-12-20 15:00:00", {}, operations, MARKET_DATA)
+
+
+def test_spending_by_category_timings(operations: pd.DataFrame) -> None:
+    """Тест на блок timings в отчете по категории."""
+    df = normalize_transactions(operations)
+    report = spending_by_category(df, "Фастфуд", "2021-12-31", timings=True, save_report=False)
+
+    assert [record["span"] for record in report["timings"]] == [
+        "spending_by_category/window_category_total",
+        "spending_by_category",
+    ]
+
+
+def test_recorder_exports(enabled: None, operations: pd.DataFrame, tmp_path: Path) -> None:
+    """Тест на накопление замеров с приростом памяти и выгрузку в JSON и формат Prometheus."""
+    investment_bank("2021-12", operations, 50)
+    investment_bank("2021-11", operations, 50)
+
+    totals = recorder.totals["investment_bank/select"]
+    assert totals["calls"] == 2
+    assert totals["rows"] > 0
+    assert totals["alloc_bytes_max"] > 0
+
+    recorder.export(str(tmp_path / "metrics.json"))
+    recorder.export(str(tmp_path / "metrics.prom"))
+    exported = json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))
+    prometheus = (tmp_path / "metrics.prom").read_text(encoding="utf-8")
+
+    assert exported["spans"]["investment_bank"]["calls"] == 2
+    assert len(exported["records"]) == len(recorder.records)
+    assert "# TYPE transactions_span_seconds_total counter" in prometheus
+    assert 'transactions_span_calls_total{span="investment_bank"} 2' in prometheus
+
+
+def test_collect_is_isolated_from_recorder(operations: pd.DataFrame) -> None:
+    """Тест на сбор замеров запроса без записи в общий накопитель."""
+    with collect() as records:
+        investment_bank("2021-12", operations, 50)
+
+    assert [record["span"] for record in records][-1] == "investment_bank"
+    assert recorder.totals == {}
@@ -0,0 +1,55 @@
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.loader import is_normalized, load_transactions, normalize_transactions
+
+
+def test_normalize_transactions_types(transactions: pd.DataFrame) -> None:
+    """Тест на приведение дат, сумм и текстовых столбцов к типизированным столбцам."""
+    df = normalize_transactions(transactions)
+
+    assert df["Дата операции"].dtype == "datetime64[ns]"
+    assert df["Сумма операции"].dtype == np.float64
+    assert isinstance(df["Категория"].dtype, pd.CategoricalDtype)
+    assert df["Сумма операции"].tolist() == [1000.50, 2000.00, 1500.75, 500.25]
+    assert df["Дата операции"].iloc[2] == pd.Timestamp("2024-10-10 09:00:00")
+
+
+def test_normalize_transactions_does_not_mutate(transactions: pd.DataFrame) -> None:
+    """Тест на то, что исходный DataFrame не изменяется."""
+    original = transactions.copy()
+
+    normalize_transactions(transactions)
+
+    pd.testing.assert_frame_equal(transactions, original)
+    assert not is_normalized(transactions)
+
+
+def test_normalize_transactions_idempotent(mock_excel_data: pd.DataFrame) -> None:
+    """Тест на то, что повторная нормализация возвращает ту же таблицу без копирования."""
+    df = normalize_transactions(mock_excel_data)
+
+    assert normalize_transactions(df) is df
+
+
+def test_normalize_transactions_mixed_date_formats() -> None:
+    """Тест на разбор дат в формате выгрузки и в ISO-формате."""
+    df = normalize_transactions(pd.DataFrame({"Дата операции": ["31.12.2021 16:44:00", "2024-01-05 12:00:00", None]}))
+
+    assert df["Дата операции"].tolist()[:2] == [pd.Timestamp("2021-12-31 16:44:00"), pd.Timestamp("2024-01-05 12:00")]
+    assert pd.isna(df["Дата операции"].iloc[2])
+
+
+def test_load_transactions(transactions: pd.DataFrame) -> None:
+    with patch("src.loader.read_excel_data", return_value=transactions):
+        df: Any = load_transactions("mock_path.xlsx")
+
+    assert is_normalized(df)
+
+
+def test_load_transactions_missing_file() -> None:
+    with patch("src.loader.read_excel_data", return_value=None):
+        assert load_transactions("mock_path.xlsx") is None
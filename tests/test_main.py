@@ -0,0 +1,68 @@
+import json
+from typing import Any, Dict, Iterator, Tuple
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src import main as cli
+from src.reports import spending_by_category
+from src.services import investment_bank
+from src.store import TransactionStore
+
+
+@pytest.fixture
+def dataset(operations: pd.DataFrame, user_settings: Dict[str, Any]) -> Iterator[Tuple[TransactionStore, Any]]:
+    """Фикстура, подменяющая загрузку выгрузки и курсов синтетическими данными."""
+    loaded = (TransactionStore(operations), user_settings)
+    with patch("src.main.load_dataset", return_value=loaded), patch(
+        "src.views.fetch_market_data", return_value=([], [])
+    ):
+        yield loaded
+
+
+def test_subcommands(dataset: Any, operations: pd.DataFrame, capsys: pytest.CaptureFixture) -> None:
+    """Тест на команды invest и category без интерактивного ввода."""
+    cli.main(["invest", "2020-05", "--limit", "100"])
+    invest = json.loads(capsys.readouterr().out)
+    cli.main(["--no-reports", "category", "Аптеки", "--date", "2020-05-31"])
+    category = json.loads(capsys.readouterr().out)
+
+    assert invest == {"month": "2020-05", "investment_bank": investment_bank("2020-05", operations, 100)}
+    assert category == spending_by_category(operations, "Аптеки", "2020-05-31", save_report=False)
+    with pytest.raises(SystemExit):
+        cli.main(["home", "2020-05-31"])
+
+
+def test_queries_file(dataset: Any, tmp_path: Any, capsys: pytest.CaptureFixture) -> None:
+    """Тест на выполнение запросов JSONL по одной выгрузке и вывод ошибок без остановки обработки."""
+    queries = [
+        {"type": "home", "date": "2020-05-20 15:00:00"},
+        {"type": "invest", "month": "2020-05", "limit": 30},
+        {"type": "category", "category": "Аптеки", "date": "2020-05-31"},
+        {"type": "unknown"},
+    ]
+    path = tmp_path / "queries.jsonl"
+    path.write_text("\n".join(json.dumps(query, ensure_ascii=False) for query in queries) + "\n\nnot json\n")
+
+    cli.main(["--queries", str(path), "--no-reports"])
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    assert [record["query"] for record in records] == queries + ["not json"]
+    assert records[0]["result"]["cards"] and records[2]["result"]["category"] == "Аптеки"
+    assert [("error" in record) for record in records] == [False, True, False, True, True]
+    assert records[1]["error"].startswith("ValueError: Недопустимый лимит 30")
+
+
+def test_interactive(dataset: Any, operations: pd.DataFrame, capsys: pytest.CaptureFixture) -> None:
+    """Тест на интерактивный режим с повторным вводом некорректных значений."""
+    answers = ["20.05.2020", "2020-05-20 15:00:00", "2020/05", "2020-05", "30", "50", "Нет такой", "Аптеки", ""]
+
+    with patch("builtins.input", side_effect=answers):
+        cli.main(["--no-reports"])
+    output = capsys.readouterr().out
+
+    assert "Некорректный формат даты и времени" in output
+    assert "Недопустимый лимит" in output and "Категория не найдена" in output
+    assert f"за 2020-05: {investment_bank('2020-05', operations, 50):.2f} ₽" in output
+    assert '"category": "Аптеки"' in output
@@ -0,0 +1,95 @@
+import time
+from typing import Any
+
+from src.market_data import MarketDataClient, TTLCache
+
+
+def _client(market_stub: Any, **kwargs: Any) -> MarketDataClient:
+    """Создает клиент, направленный на локальный сервер-заглушку."""
+    return MarketDataClient("token", "key", currency_url=market_stub.url, stock_url=market_stub.url, **kwargs)
+
+
+def test_currency_rates_cached(market_stub: Any) -> None:
+    """Тест на то, что повторный запрос курсов в пределах TTL не обращается к сети."""
+    client = _client(market_stub)
+
+    first = client.get_currency_rates(["USD", "EUR", "GBP"])
+    second = client.get_currency_rates(["EUR"])
+
+    assert first == [{"currency": "USD", "rate": 0.011}, {"currency": "EUR", "rate": 0.0102}]
+    assert second == [{"currency": "EUR", "rate": 0.0102}]
+    assert len(market_stub.requests_log) == 1
+
+
+def test_stock_prices_batched(market_stub: Any) -> None:
+    """Тест на получение цен всех тикеров одним запросом и их кеширование."""
+    client = _client(market_stub)
+
+    prices = client.get_stock_prices(["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"])
+    client.get_stock_prices(["TSLA", "AAPL"])
+
+    assert [price["stock"] for price in prices] == ["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"]
+    assert len(market_stub.requests_log) == 1
+    assert market_stub.requests_log[0][0].endswith("/intraday/latest")
+    assert market_stub.requests_log[0][1]["symbols"] == ["AAPL,AMZN,GOOGL,MSFT,TSLA"]
+    assert market_stub.requests_log[0][1]["limit"] == ["5"]
+
+
+def test_stock_prices_missing_symbol(market_stub: Any) -> None:
+    """Тест на пропуск тикера, для которого нет данных."""
+    prices = _client(market_stub).get_stock_prices(["AAPL", "NONE"])
+
+    assert prices == [{"stock": "AAPL", "price": 100.0}]
+
+
+def test_batches_fetched_in_parallel(market_stub: Any) -> None:
+    """Тест на параллельную загрузку пакетов тикеров."""
+    market_stub.delay = 0.3
+    client = _client(market_stub, batch_size=1)
+
+    started = time.perf_counter()
+    prices = client.get_stock_prices(["AAPL", "AMZN", "GOOGL", "MSFT"])
+    elapsed = time.perf_counter() - started
+
+    assert len(prices) == 4
+    assert len(market_stub.requests_log) == 4
+    assert elapsed < 1.0
+
+
+def test_fetch_ttl_expired(market_stub: Any) -> None:
+    """Тест на повторный запрос после истечения TTL."""
+    client = _client(market_stub, ttl=0.0)
+
+    client.fetch(["USD"], ["AAPL"])
+    client.fetch(["USD"], ["AAPL"])
+
+    assert len(market_stub.requests_log) == 4
+
+
+def test_server_error(market_stub: Any) -> None:
+    """Тест на пустой результат при ошибке сервера."""
+    market_stub.status = 500
+    client = _client(market_stub)
+
+    assert client.fetch(["USD"], ["AAPL"]) == ([], [])
+
+
+def test_request_timeout(market_stub: Any) -> None:
+    """Тест на пустой результат при превышении таймаута запроса."""
+    market_stub.delay = 0.5
+    client = _client(market_stub, timeout=0.1)
+
+    assert client.get_stock_prices(["AAPL"]) == []
+
+
+def test_ttl_cache() -> None:
+    """Тест на хранение и устаревание значений в TTL-кеше."""
+    cache = TTLCache(ttl=60)
+    cache.set("key", 1)
+
+    assert cache.get("key") == 1
+    assert cache.get("other") is None
+
+    cache.ttl = -1
+    cache.set("key", 2)
+    assert cache.get("key") is None
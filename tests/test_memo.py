@@ -0,0 +1,81 @@
+from typing import Any
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.memo import LRUCache, cache_stats, market_cache, transaction_cache
+from src.reports import spending_by_category
+from src.store import TransactionStore
+from src.views import generate_response
+
+MARKET_DATA = ([{"currency": "USD", "rate": 80.0}], [{"stock": "AAPL", "price": 150.0}])
+
+
+def test_lru_cache_eviction_and_ttl() -> None:
+    """Тест на вытеснение давно не использованных записей, TTL и счетчики кеша."""
+    cache = LRUCache(max_entries=2, ttl=10)
+    with patch("src.memo.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == (True, 1)
+        cache.set("c", 3)
+
+        assert cache.get("b") == (False, None)
+        assert cache.get("c") == (True, 3)
+    with patch("src.memo.time.monotonic", return_value=111.0):
+        assert cache.get("a") == (False, None)
+
+    assert cache.stats() == {
+        "entries": 1,
+        "max_entries": 2,
+        "ttl": 10,
+        "hits": 2,
+        "misses": 2,
+        "evictions": 1,
+    }
+
+
+def test_generate_response_cached_until_store_changes(operations: pd.DataFrame) -> None:
+    """Тест на повторное использование блоков главной страницы до изменения данных хранилища."""
+    store = TransactionStore(operations.iloc[100:])
+    first = generate_response("2021-12-20 15:00:00", {}, store, MARKET_DATA)
+    first["cards"].clear()
+    second = generate_response("2021-12-20 15:00:00", {}, store, MARKET_DATA)
+
+    assert transaction_cache.stats()["hits"] == 1
+    assert second["cards"]
+
+    store.append(operations.iloc[:100])
+    third = generate_response("2021-12-20 15:00:00", {}, store, MARKET_DATA)
+
+    assert transaction_cache.stats()["misses"] == 2
+    assert third == generate_response("2021-12-20 15:00:00", {}, operations, MARKET_DATA)
+
+
+def test_market_block_cached_by_settings(operations: pd.DataFrame) -> None:
+    """Тест на отдельное кеширование курсов валют и цен акций по настройкам пользователя."""
+    settings = {"user_currencies": ["USD"], "user_stocks": ["AAPL"]}
+    with patch("src.views.fetch_market_data", return_value=MARKET_DATA) as mock_fetch:
+        generate_response("2021-12-20 15:00:00", settings, operations)
+        generate_response("2021-11-20 15:00:00", settings, operations)
+        generate_response("2021-11-20 15:00:00", {"user_currencies": ["EUR"], "user_stocks": []}, operations)
+
+    assert mock_fetch.call_count == 2
+    assert market_cache.stats()["hits"] == 1
+    assert transaction_cache.stats()["misses"] == 0
+
+
+@pytest.mark.parametrize("as_store, expected_writes", [(True, 1), (False, 2)])
+def test_spending_by_category_cache_skips_report(
+    operations: pd.DataFrame, as_store: bool, expected_writes: int
+) -> None:
+    """Тест на отсутствие повторной записи отчета при попадании в кеш."""
+    transactions: Any = TransactionStore(operations) if as_store else operations
+    with patch("src.reports.get_report_sink") as mock_sink:
+        first = spending_by_category(transactions, "Фастфуд", "2021-12-31")
+        second = spending_by_category(transactions, "Фастфуд", "2021-12-31")
+
+    assert first == second
+    assert mock_sink.return_value.submit.call_count == expected_writes
+    assert cache_stats()["transactions"]["hits"] == expected_writes % 2
@@ -1,8 +1,17 @@
+import gzip
+import json
+import threading
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Any, Callable, Dict
 from unittest import mock
 
-from src.reports import report_decorator, spending_by_category
+import pandas as pd
+import pytest
+
+from src.report_sink import ReportSink, get_report_sink, set_report_sink
+from src.reports import month_end_dates, report_decorator, spending_by_category, spending_matrix
+from src.store import TransactionStore
 
 
 @mock.patch("builtins.open", new_callable=mock.mock_open)
@@ -13,6 +22,8 @@ def test_report_decorator_success(
     """Тест на успешное сохранение отчета в файл."""
     decorated_function = report_decorator(mock_function)
     result = decorated_function()
+    # Запись выполняется в фоне: дожидаемся ее перед проверками
+    get_report_sink().flush()
 
     # Проверяем, что функция вернула ожидаемый результат
     assert result == {"data": "test report"}
@@ -20,8 +31,8 @@ def test_report_decorator_success(
     # Получаем имя файла, который был вызван в open
     filename = mock_open.call_args[0][0]
 
-    # Проверяем, что имя файла соответствует ожидаемому формату
-    assert filename.startswith("spending_report_") and filename.endswith(".json")
+    # Проверяем, что имя файла в каталоге отчетов соответствует ожидаемому формату
+    assert Path(filename).name.startswith("spending_report_") and filename.endswith(".json")
 
     # Проверяем, что open был вызван с правильными параметрами
     mock_open.assert_called_once_with(filename, "w", encoding="utf-8")
@@ -30,17 +41,24 @@ def test_report_decorator_success(
     mock_logging_info.assert_called_once()
 
 
+class FixedDatetime(datetime):
+    """datetime с текущей датой 30.11.2024 для отчетов без переданной даты."""
+
+    @classmethod
+    def now(cls, tz: Any = None) -> "FixedDatetime":
+        return cls(2024, 11, 30, 12, 0)
+
+
 def test_spending_by_category_with_transactions(transactions: Any) -> None:
     """Тест на наличие транзакций в указанной категории."""
-    result: Dict[str, Any] = spending_by_category(transactions, category="Продукты")
+    result: Dict[str, Any] = spending_by_category(transactions, category="Продукты", date="2024-11-30")
 
     assert result["category"] == "Продукты"
 
     # Приводим к типу float для корректного сравнения
     assert float(result["total_spent"]) == 3500.75
 
-    assert result["date_range"]["start_date"] == (datetime.now() - timedelta(days=90)).strftime("%d.%m.%Y")
-    assert result["date_range"]["end_date"] == datetime.now().strftime("%d.%m.%Y")
+    assert result["date_range"] == {"start_date": "01.09.2024", "end_date": "30.11.2024"}
 
 
 def test_spending_by_category_no_transactions(transactions: Any) -> None:
@@ -55,7 +73,112 @@ def test_spending_by_category_no_transactions(transactions: Any) -> None:
 
 def test_spending_by_category_without_date(transactions: Any) -> None:
     """Тест на использование текущей даты при отсутствии переданной даты."""
-    result: Dict[str, Any] = spending_by_category(transactions, category="Продукты")
+    with mock.patch("src.reports.datetime", FixedDatetime):
+        result: Dict[str, Any] = spending_by_category(transactions, category="Продукты")
 
     assert result["category"] == "Продукты"
     assert result["total_spent"] == 3500.75
+    assert result["date_range"]["end_date"] == "30.11.2024"
+
+
+def test_spending_by_category_does_not_mutate(transactions: Any) -> None:
+    """Тест на то, что отчет не изменяет переданную таблицу транзакций."""
+    original = transactions.copy()
+
+    spending_by_category(transactions, category="Продукты", date="2024-11-30")
+
+    assert transactions.equals(original)
+
+
+def test_report_decorator_does_not_wait_for_io(tmp_path: Path, mock_function: Callable[[], Dict[str, str]]) -> None:
+    """Тест на возврат результата до завершения записи отчета."""
+    sink = ReportSink(directory=str(tmp_path))
+    release = threading.Event()
+    write = sink._write
+    sink._write = lambda *args: (release.wait(), write(*args))  # type: ignore[method-assign, assignment]
+    set_report_sink(sink)
+
+    result = report_decorator(mock_function)()
+
+    assert result == {"data": "test report"}
+    assert list(tmp_path.iterdir()) == []
+    release.set()
+    sink.flush()
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_report_decorator_save_report_off(tmp_path: Path, mock_function: Callable[[], Dict[str, str]]) -> None:
+    """Тест на отключение сохранения отчета для отдельного вызова."""
+    set_report_sink(ReportSink(directory=str(tmp_path)))
+
+    report_decorator(mock_function)(save_report=False)
+    get_report_sink().flush()
+
+    assert list(tmp_path.iterdir()) == []
+    mock_function.assert_called_once_with()  # type: ignore[attr-defined]
+
+
+def test_report_sink_unique_names(tmp_path: Path) -> None:
+    """Тест на уникальные имена файлов при одновременной записи отчетов."""
+    sink = ReportSink(directory=str(tmp_path / "reports"))
+
+    threads = [threading.Thread(target=sink.submit, args=({"n": i},)) for i in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sink.flush()
+
+    files = list((tmp_path / "reports").iterdir())
+    assert len(files) == 50
+    assert sorted(json.loads(f.read_text(encoding="utf-8"))["n"] for f in files) == list(range(50))
+
+
+def test_report_sink_compressed(tmp_path: Path) -> None:
+    """Тест на запись сжатого отчета."""
+    sink = ReportSink(directory=str(tmp_path), compress=True)
+
+    filename = sink.submit({"category": "Продукты"})
+    sink.close()
+
+    assert filename.endswith(".json.gz")
+    with gzip.open(filename, "rt", encoding="utf-8") as f:
+        assert json.load(f) == {"category": "Продукты"}
+
+
+@pytest.mark.parametrize("as_store", [False, True])
+def test_spending_matrix_matches_spending_by_category(operations: pd.DataFrame, as_store: bool) -> None:
+    """Тест на совпадение ячеек матрицы трат с отчетами spending_by_category."""
+    transactions = TransactionStore(operations) if as_store else operations
+    dates = ["2018-01-31", "2019-06-30", "2020-02-29", "2021-12-31"]
+    categories = ["Супермаркеты", "Переводы", "Транспорт", "Нет такой категории"]
+
+    matrix = spending_matrix(transactions, dates, categories)
+
+    assert list(matrix.index) == categories
+    assert list(matrix.columns) == dates
+    for category in categories:
+        for date in dates:
+            expected = spending_by_category(transactions, category, date, save_report=False)["total_spent"]
+            assert matrix.loc[category, date] == expected
+    assert (matrix.loc["Нет такой категории"] == 0).all()
+
+
+def test_spending_matrix_reuses_store_partitions(operations: pd.DataFrame) -> None:
+    """Тест на матрицу трат по разделам хранилища без повторной разметки строк."""
+    store = TransactionStore(operations)
+
+    with mock.patch("src.reports.partition_codes") as partition_codes:
+        matrix = spending_matrix(store, ["2021-12-31"])
+
+    partition_codes.assert_not_called()
+    assert matrix["2021-12-31"].equals(spending_matrix(operations, ["2021-12-31"])["2021-12-31"])
+
+
+def test_spending_matrix_defaults(operations: pd.DataFrame) -> None:
+    """Тест на матрицу по всем категориям и концам месяцев выгрузки."""
+    matrix = spending_matrix(operations)
+
+    assert list(matrix.columns) == month_end_dates(operations)
+    assert matrix.columns[0] == "2018-01-31" and matrix.columns[-1] == "2021-12-31"
+    assert list(matrix.index) == sorted(operations["Категория"].dropna().unique())
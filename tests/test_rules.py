@@ -0,0 +1,123 @@
+import os
+from typing import Any, Dict
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.rules import (
+    CASHBACK_COLUMN,
+    ROUNDING_COLUMN,
+    RuleSet,
+    discrepancies,
+    discrepancy_summary,
+    rules_from_settings,
+)
+from src.views import generate_response
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cashback_rules.json")
+
+
+@pytest.fixture
+def rules() -> RuleSet:
+    """Фикстура с правилами: повышенный кешбэк с лимитом по категории и отдельное правило MCC."""
+    return RuleSet(
+        {
+            "default": {"cashback_rate": 0.01},
+            "categories": {"Супермаркеты": {"cashback_rate": 0.05, "cap": 10, "rounding_limit": 50}},
+            "mcc": {"5912": {"cashback_rate": 0.1}},
+        }
+    )
+
+
+@pytest.fixture
+def rows() -> pd.DataFrame:
+    """Фикстура с операциями одной карты за два месяца."""
+    return pd.DataFrame(
+        {
+            "Дата операции": [
+                "01.05.2024 10:00:00",
+                "02.05.2024 10:00:00",
+                "03.05.2024 10:00:00",
+                "04.05.2024 10:00:00",
+                "05.05.2024 10:00:00",
+                "01.06.2024 10:00:00",
+                "06.05.2024 10:00:00",
+            ],
+            "Номер карты": ["*1"] * 7,
+            "Статус": ["OK", "OK", "OK", "FAILED", "OK", "OK", "OK"],
+            "Сумма операции": [-120.0, -130.0, -99.0, -500.0, 300.0, -100.0, -950.0],
+            "Сумма платежа": [-120.0, -130.0, -99.0, -500.0, 300.0, -100.0, -950.0],
+            "Категория": ["Супермаркеты", "Супермаркеты", "Аптеки", "Аптеки", "Пополнения", "Супермаркеты", "Прочее"],
+            "MCC": [5411.0, 5411.0, 5912.0, 5912.0, None, 5411.0, 5999.0],
+            "Описание": ["Магнит", "Магнит", "Ригла", "Ригла", "Пополнение", "Магнит", "Ozon.ru"],
+            "Кэшбэк": [6.0, 4.0, 9.0, None, None, 5.0, 1.0],
+            "Округление на инвесткопилку": [30.0, 20.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+        }
+    )
+
+
+def test_apply_rules(rules: RuleSet, rows: pd.DataFrame) -> None:
+    """Тест на выбор правила по MCC и категории, лимит за месяц и начисление только по успешным списаниям."""
+    result = rules.apply(rows)
+
+    # 5% от 120 и 130 = 6 и 6.5→6, но лимит категории 10 в мае оставляет на вторую покупку 4
+    assert result[CASHBACK_COLUMN].tolist() == [6.0, 4.0, 9.0, 0.0, 0.0, 5.0, 9.0]
+    assert result[ROUNDING_COLUMN].tolist() == [30.0, 20.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+
+
+def test_apply_rules_uses_spend_partition(rules: RuleSet, rows: pd.DataFrame) -> None:
+    """Тест на начисление по тем же строкам, что входят в траты карты: ожидающая операция и знак суммы платежа."""
+    changed = rows.head(3).copy()
+    changed["Статус"] = ["PENDING", "OK", "OK"]
+    changed["Сумма операции"] = [-120.0, 130.0, -99.0]
+    changed["Сумма платежа"] = [-120.0, -130.0, 99.0]
+
+    result = rules.apply(changed)
+
+    assert result[CASHBACK_COLUMN].tolist() == [0.0, 6.0, 0.0]
+    assert result[ROUNDING_COLUMN].tolist() == [0.0, 20.0, 0.0]
+
+
+def test_discrepancies(rules: RuleSet, rows: pd.DataFrame) -> None:
+    """Тест на отчет о расхождениях с начислениями банка."""
+    found = discrepancies(rows, rules)
+
+    assert found["Категория"].astype(object).tolist() == ["Прочее"]
+    assert found[[CASHBACK_COLUMN, "Кэшбэк"]].values.tolist() == [[9.0, 1.0]]
+    assert discrepancy_summary(rows, rules) == [
+        {
+            "category": "Прочее",
+            "rows": 1,
+            "computed_cashback": 9.0,
+            "reported_cashback": 1.0,
+            "computed_rounding": 0.0,
+            "reported_rounding": 0.0,
+        }
+    ]
+
+
+def test_rules_file_matches_export(operations: pd.DataFrame) -> None:
+    """Тест на применение правил из файла проекта ко всей синтетической выгрузке."""
+    rules = rules_from_settings({"cashback_rules": RULES_PATH})
+    assert rules is not None
+
+    result = rules.apply(operations)
+
+    assert len(result) == len(operations)
+    assert (result[CASHBACK_COLUMN] >= 0).all()
+    assert rules_from_settings({}) is None
+
+
+def test_generate_response_uses_rules(rows: pd.DataFrame, user_settings: Dict[str, Any], rules: RuleSet) -> None:
+    """Тест на кешбэк главной страницы по правилам из настроек пользователя."""
+    settings = {**user_settings, "cashback_rules": rules.config}
+
+    with patch("src.views.fetch_market_data", return_value=([], [])):
+        default = generate_response("2024-05-31 12:00:00", user_settings, rows)
+        response = generate_response("2024-05-31 12:00:00", settings, rows)
+
+    # Окно начинается 1 мая в 12:00, поэтому первая покупка в него не попадает; неуспешная покупка
+    # и пополнение в траты карты не входят
+    assert default["cards"] == [{"last_digits": "*1", "total_spent": 1179.0, "cashback": 11.79}]
+    assert response["cards"] == [{"last_digits": "*1", "total_spent": 1179.0, "cashback": 24.0}]
@@ -0,0 +1,157 @@
+import json
+import threading
+from pathlib import Path
+from typing import Any, Tuple
+from unittest.mock import patch
+from urllib.request import urlopen
+
+import pandas as pd
+import pytest
+
+from benchmarks.generator import write_operations_xlsx
+from src.server import Dataset, MarketDataRefresher, TransactionsApp, create_server
+
+MARKET_DATA = ([{"currency": "USD", "rate": 0.011}], [{"stock": "AAPL", "price": 150.0}])
+
+
+@pytest.fixture
+def data_files(tmp_path: Path, operations: pd.DataFrame, monkeypatch: pytest.MonkeyPatch) -> Tuple[str, str]:
+    """Фикстура с файлами выгрузки и настроек пользователя."""
+    monkeypatch.setenv("TRANSACTIONS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    transactions_path = str(tmp_path / "operations.xlsx")
+    settings_path = str(tmp_path / "user_settings.json")
+    write_operations_xlsx(operations.iloc[:300], transactions_path)
+    Path(settings_path).write_text(json.dumps({"user_currencies": ["USD"], "user_stocks": ["AAPL"]}))
+    return transactions_path, settings_path
+
+
+@pytest.fixture
+def app(data_files: Tuple[str, str]) -> TransactionsApp:
+    """Фикстура с приложением на загруженных данных и готовыми рыночными данными."""
+    dataset = Dataset(*data_files)
+    dataset.load()
+    refresher = MarketDataRefresher(dataset, interval=60)
+    with patch("src.server.fetch_market_data", return_value=MARKET_DATA):
+        refresher.refresh()
+    return TransactionsApp(dataset, refresher)
+
+
+def test_home(app: TransactionsApp) -> None:
+    """Тест на главную страницу без обращения к файлу и внешним API."""
+    with (
+        patch("src.server.load_transactions") as mock_load,
+        patch("src.views.fetch_market_data") as mock_fetch,
+    ):
+        status, payload = app.handle("/home", {"date": "2021-12-20 15:00:00"})
+
+    assert status == 200
+    assert payload["greeting"] == "Добрый день"
+    assert (payload["currency_rates"], payload["stock_prices"]) == MARKET_DATA
+    mock_load.assert_not_called()
+    mock_fetch.assert_not_called()
+
+
+def test_invest(app: TransactionsApp) -> None:
+    """Тест на Инвесткопилку за месяц и по всем месяцам."""
+    status, month = app.handle("/invest", {"month": "2021-12", "limit": "50"})
+    _, months = app.handle("/invest", {"limit": "50"})
+
+    assert status == 200
+    assert month["saved"] == pytest.approx(months["months"]["2021-12"])
+
+
+def test_category(app: TransactionsApp) -> None:
+    """Тест на отчет по категории."""
+    status, payload = app.handle("/category", {"category": "Фастфуд", "date": "2021-12-31"})
+
+    assert status == 200
+    assert payload["category"] == "Фастфуд"
+
+
+def test_timings_and_metrics(app: TransactionsApp) -> None:
+    """Тест на замеры этапов по запросу и метрики в формате Prometheus."""
+    _, home = app.handle("/home", {"date": "2021-12-20 15:00:00", "timings": "1"})
+    _, invest = app.handle("/invest", {"month": "2021-12", "timings": "1"})
+    status, metrics = app.handle("/metrics", {})
+
+    assert home["timings"][-1]["span"] == "generate_response"
+    assert invest["timings"][-1]["span"] == "investment_bank"
+    assert "timings" not in app.handle("/invest", {"month": "2021-12"})[1]
+    assert status == 200
+    assert "# TYPE transactions_span_calls_total counter" in metrics
+
+
+@pytest.mark.parametrize(
+    "path, query, expected_status",
+    [
+        ("/home", {"date": "20.12.2021"}, 400),
+        ("/invest", {"month": "2021-13"}, 400),
+        ("/invest", {"limit": "30"}, 400),
+        ("/invest", {"month": "2021-12", "limit": "abc"}, 400),
+        ("/category", {"category": "Фастфуд", "date": "31.12.2021"}, 400),
+        ("/category", {}, 400),
+        ("/unknown", {}, 404),
+    ],
+)
+def test_bad_requests(app: TransactionsApp, path: str, query: Any, expected_status: int) -> None:
+    """Тест на ответы с ошибкой для некорректных запросов."""
+    status, payload = app.handle(path, query)
+
+    assert status == expected_status
+    assert "error" in payload
+
+
+def test_category_without_report_file(app: TransactionsApp) -> None:
+    """Тест на отсутствие файлов отчетов в режиме сервера."""
+    with patch("src.reports.get_report_sink") as sink:
+        status, _ = app.handle("/category", {"category": "Супермаркеты", "date": "2021-12-31"})
+
+    assert status == 200
+    sink.assert_not_called()
+
+
+def test_internal_error(app: TransactionsApp) -> None:
+    """Тест на ответ 500 с JSON при непредвиденной ошибке."""
+    with patch("src.server.investment_bank_by_month", side_effect=KeyError("boom")):
+        status, payload = app.handle("/invest", {})
+
+    assert status == 500
+    assert "error" in payload
+
+
+def test_reload_if_changed(app: TransactionsApp, data_files: Tuple[str, str], operations: pd.DataFrame) -> None:
+    """Тест на перезагрузку данных после изменения файла выгрузки."""
+    assert not app.dataset.reload_if_changed()
+
+    write_operations_xlsx(operations.iloc[:500], data_files[0])
+
+    assert app.dataset.reload_if_changed()
+    assert app.handle("/health", {})[1]["rows"] == 500
+    assert app.dataset.version == 2
+
+
+@patch("src.server.fetch_market_data", return_value=MARKET_DATA)
+def test_http_server(mock_fetch: Any, data_files: Tuple[str, str]) -> None:
+    """Тест на обслуживание параллельных HTTP-запросов."""
+    server = create_server("127.0.0.1", 0, *data_files, poll_interval=60, market_interval=60)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    results = []
+
+    def request() -> None:
+        with urlopen(f"{url}/invest?month=2021-12&limit=100") as response:
+            results.append(json.loads(response.read()))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+    server.stop_background()
+    server.server_close()
+
+    assert len(results) == 8
+    assert all(result == results[0] for result in results)
@@ -1,6 +1,16 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
 from typing import Any, Dict, List
 
-from src.services import investment_bank
+import pandas as pd
+import pytest
+
+from src.services import investment_bank, investment_bank_by_month
+from src.sqlite_store import SQLiteStore
+from src.store import TransactionStore
+from src.utils import PROJECT_ROOT
 
 
 def test_investment_bank() -> None:
@@ -31,3 +41,71 @@ def test_investment_bank_with_different_format() -> None:
 
     expected_saved: float = 5 + 16
     assert result == expected_saved
+
+
+def test_investment_bank_with_dataframe(transactions: pd.DataFrame) -> None:
+    """Тестирует функцию investment_bank с DataFrame в формате выгрузки."""
+    result: float = investment_bank("2024-09", transactions, 100)
+
+    assert round(result, 2) == round(99.50 + 100.00, 2)
+
+
+def test_investment_bank_empty_month() -> None:
+    """Тестирует функцию investment_bank для месяца без транзакций."""
+    assert investment_bank("2024-03", [{"Дата операции": "2024-01-05 12:00:00", "Сумма операции": 1712}], 50) == 0.0
+
+
+def test_investment_bank_by_month(transactions: pd.DataFrame) -> None:
+    """Тестирует расчет Инвесткопилки сразу по всем месяцам."""
+    result: Dict[str, float] = investment_bank_by_month(transactions, 100)
+
+    assert list(result) == ["2024-09", "2024-10", "2024-11"]
+    for month, saved in result.items():
+        assert saved == investment_bank(month, transactions, 100)
+
+
+def test_investment_bank_by_month_list() -> None:
+    """Тестирует расчет Инвесткопилки по всем месяцам для списка транзакций-словарей."""
+    transactions: List[Dict[str, Any]] = [
+        {"Дата операции": "20.01.2022 10:00:00", "Сумма операции": "1234,00"},
+        {"Дата операции": "31.12.2021 16:44:00", "Сумма операции": 1712},
+        {"Дата операции": None, "Сумма операции": 100},
+        {"Дата операции": "15.01.2022 15:30:00", "Сумма операции": 845},
+    ]
+
+    assert investment_bank_by_month(transactions, 50) == {"2021-12": 38.0, "2022-01": 21.0}
+
+
+def test_investment_bank_rounds_only_spend(tmp_path: Path) -> None:
+    """Тестирует, что неуспешная операция и пополнение не округляются ни в одном представлении данных."""
+    transactions: List[Dict[str, Any]] = [
+        {"Дата операции": "05.01.2024 12:00:00", "Статус": "OK", "Сумма операции": -1712.0, "Сумма платежа": -1712.0},
+        {
+            "Дата операции": "10.01.2024 12:00:00",
+            "Статус": "FAILED",
+            "Сумма операции": -845.0,
+            "Сумма платежа": -845.0,
+        },
+        {"Дата операции": "15.01.2024 12:00:00", "Статус": "OK", "Сумма операции": 5010.0, "Сумма платежа": 5010.0},
+        {"Дата операции": "20.01.2024 12:00:00", "Статус": "OK", "Сумма операции": -1234.0, "Сумма платежа": -1234.0},
+    ]
+    df = pd.DataFrame(transactions)
+
+    for data in (transactions, df, TransactionStore(df), SQLiteStore.from_frame(df, str(tmp_path / "t.db"))):
+        assert investment_bank("2024-01", data, 50) == 38 + 16
+        assert investment_bank_by_month(data, 50) == {"2024-01": 38 + 16}
+
+
+@pytest.mark.parametrize("module", ["src.services", "src.utils", "src.main"])
+def test_import_without_pandas_and_credentials(module: str) -> None:
+    """Тестирует, что импорт точки входа и Инвесткопилка по списку не загружают pandas и не требуют ключей API."""
+    code = (
+        f"import sys, {module}; from src.services import investment_bank; "
+        "assert investment_bank('2024-01', [{'Дата операции': '2024-01-05 12:00:00', 'Сумма операции': 1712}], 50) "
+        "== 38; print(*[name in sys.modules for name in ('pandas', 'requests')])"
+    )
+    env = {key: value for key, value in os.environ.items() if key not in ("API_TOKEN", "API_KEY")}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=PROJECT_ROOT, env=env)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["False", "False"]
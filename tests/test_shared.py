@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+from typing import Any, Dict, Iterator
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_category
+from src.services import investment_bank
+from src.shared import SharedDataset
+from src.views import generate_response
+
+
+@pytest.fixture
+def published(operations: pd.DataFrame) -> Iterator[SharedDataset]:
+    """Фикстура с синтетической выгрузкой, опубликованной в разделяемой памяти."""
+    with SharedDataset.publish(operations, f"test_shared_{os.getpid()}") as dataset:
+        yield dataset
+
+
+def _spending_in_child(name: str, queue: Any) -> None:
+    """Считает отчет по категории в отдельном процессе по подключенному сегменту."""
+    dataset = SharedDataset.attach(name)
+    queue.put(spending_by_category(dataset.store, "Аптеки", "2020-05-31", save_report=False))
+
+
+def test_attach_is_zero_copy_and_read_only(published: SharedDataset) -> None:
+    """Тест на то, что столбцы подключенной таблицы ссылаются на сегмент и не изменяются."""
+    dataset = SharedDataset.attach(published.name)
+    frame = dataset.frame
+    segment = np.frombuffer(dataset.segment.memory, dtype=np.uint8)
+
+    assert np.shares_memory(frame["Сумма операции"].to_numpy(), segment)
+    assert np.shares_memory(frame["Категория"].cat.codes.to_numpy(), segment)
+    assert dataset.store.frame is frame
+    with pytest.raises(ValueError):
+        frame["Сумма операции"].to_numpy()[0] = 0.0
+
+
+def test_reports_same_for_shared(
+    operations: pd.DataFrame, published: SharedDataset, user_settings: Dict[str, Any]
+) -> None:
+    """Тест на одинаковые результаты отчетов для DataFrame и подключенной разделяемой таблицы."""
+    store = SharedDataset.attach(published.name).store
+
+    assert investment_bank("2020-05", store, 50) == pytest.approx(investment_bank("2020-05", operations, 50))
+    assert spending_by_category(store, "Аптеки", "2020-05-31", save_report=False) == spending_by_category(
+        operations, "Аптеки", "2020-05-31", save_report=False
+    )
+    with patch("src.views.fetch_market_data", return_value=([], [])):
+        assert generate_response("2020-05-20 15:00:00", user_settings, store) == generate_response(
+            "2020-05-20 15:00:00", user_settings, operations
+        )
+
+
+def test_attach_from_other_process(operations: pd.DataFrame, published: SharedDataset) -> None:
+    """Тест на подключение к сегменту из другого процесса без удаления сегмента при его завершении."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_spending_in_child, args=(published.name, queue))
+    process.start()
+    result = queue.get(timeout=60)
+    process.join()
+
+    assert result == spending_by_category(operations, "Аптеки", "2020-05-31", save_report=False)
+    # Сегмент остается доступным после завершения подключившегося процесса
+    assert len(SharedDataset.attach(published.name).frame) == len(operations)
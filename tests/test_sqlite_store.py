@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import Any, Dict, Tuple
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cube import TOP_COLUMNS
+from src.memo import dataset_key
+from src.reports import spending_by_category
+from src.services import investment_bank, investment_bank_by_month
+from src.sqlite_store import SQLiteStore
+from src.store import TransactionStore, window_card_totals, window_top_transactions
+from src.views import generate_response
+
+
+@pytest.fixture(scope="module")
+def database(operations: pd.DataFrame, tmp_path_factory: pytest.TempPathFactory) -> SQLiteStore:
+    """Фикстура с базой SQLite синтетических транзакций."""
+    return SQLiteStore.from_frame(operations, str(tmp_path_factory.mktemp("sqlite") / "transactions.db"))
+
+
+def test_select_matches_store(operations: pd.DataFrame, database: SQLiteStore) -> None:
+    """Тест на совпадение выборки из базы с выборкой из хранилища в памяти."""
+    store = TransactionStore(operations)
+    start, end = datetime(2019, 1, 1), datetime(2019, 6, 30)
+
+    cases: Tuple[Dict[str, Any], ...] = (
+        {},
+        {"category": "Фастфуд"},
+        {"category": "Фастфуд", "card": "*7197"},
+        {"view": "spend"},
+        {"view": "income"},
+        {"card": "*7197", "view": "failed"},
+    )
+    for kwargs in cases:
+        expected = store.select(start, end, **kwargs)
+        result = database.select(start, end, **kwargs)
+        assert sorted(result["Сумма операции"]) == sorted(expected["Сумма операции"])
+    assert len(database) == len(store)
+
+
+def test_window_aggregates_match(operations: pd.DataFrame, database: SQLiteStore) -> None:
+    """Тест на совпадение агрегатов окна, посчитанных запросами SQL, с расчетом по DataFrame."""
+    start, end = datetime(2020, 5, 1), datetime(2020, 5, 20, 15, 0)
+
+    expected_cards = window_card_totals(operations, start, end)
+    pd.testing.assert_series_equal(
+        window_card_totals(database, start, end), expected_cards, check_names=False, check_index_type=False
+    )
+    expected_top = window_top_transactions(operations, start, end)
+    assert window_top_transactions(database, start, end)["Сумма платежа"].tolist() == pytest.approx(
+        expected_top["Сумма платежа"].tolist()
+    )
+
+
+def test_top_transactions_missing_values(operations: pd.DataFrame, tmp_path: Any) -> None:
+    """Тест на одинаковые пропуски карты и категории в крупнейших платежах хранилища, DataFrame и базы SQLite."""
+    start, end = datetime(2020, 5, 1), datetime(2020, 5, 20, 15, 0)
+    df = operations.copy()
+    df.loc[window_top_transactions(df, start, end).index[:2], ["Номер карты", "Категория"]] = np.nan
+    database = SQLiteStore.from_frame(df, str(tmp_path / "transactions.db"))
+
+    results = [
+        window_top_transactions(source, start, end)[TOP_COLUMNS].reset_index(drop=True)
+        for source in (df, TransactionStore(df), database)
+    ]
+
+    expected = results[0].astype(object)
+    assert expected["Номер карты"].isna().sum() == 2
+    for result in results[1:]:
+        pd.testing.assert_frame_equal(result.astype(object), expected)
+
+
+def test_reports_same_for_database(
+    operations: pd.DataFrame, database: SQLiteStore, user_settings: Dict[str, Any]
+) -> None:
+    """Тест на одинаковые результаты отчетов для DataFrame и базы SQLite."""
+    assert investment_bank("2020-05", database, 50) == pytest.approx(investment_bank("2020-05", operations, 50))
+    assert investment_bank_by_month(database, 100) == pytest.approx(investment_bank_by_month(operations, 100))
+    assert spending_by_category(database, "Аптеки", "2020-05-31", save_report=False) == spending_by_category(
+        operations, "Аптеки", "2020-05-31", save_report=False
+    )
+
+    with patch("src.views.fetch_market_data", return_value=([], [])):
+        assert generate_response("2020-05-20 15:00:00", user_settings, database) == generate_response(
+            "2020-05-20 15:00:00", user_settings, operations
+        )
+
+
+def test_append_changes_version(tmp_path: Any) -> None:
+    """Тест на смену версии и ключа кеша при добавлении строк в базу."""
+    rows = pd.DataFrame(
+        {
+            "Дата операции": ["01.01.2024 10:00:00", None],
+            "Сумма операции": [-120.5, 7.0],
+            "Категория": ["Супермаркеты", "Супермаркеты"],
+            "Номер карты": ["*1", None],
+        }
+    )
+    database = SQLiteStore(str(tmp_path / "transactions.db"))
+    key = dataset_key(database)
+    database.append(rows)
+
+    assert dataset_key(database) != key
+    assert len(database) == 2
+    # Операции без даты в выборки окна не попадают
+    assert database.select()["Сумма операции"].tolist() == [-120.5]
+    assert database.frame["Сумма операции"].tolist() == [-120.5, 7.0]
+    assert database.category_total("Супермаркеты", datetime(2024, 1, 1), datetime(2024, 1, 2)) == 120.5
+    # Повторное открытие файла видит те же данные
+    assert len(SQLiteStore(database.path)) == 2
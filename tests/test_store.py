@@ -0,0 +1,150 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.loader import FAILED, INCOME, NO_AMOUNT, SPEND, VIEWS, normalize_transactions, partition_codes
+from src.reports import spending_by_category
+from src.services import investment_bank
+from src.store import TransactionStore, select_transactions
+from src.views import generate_response
+
+
+@pytest.fixture(scope="module")
+def store(operations: pd.DataFrame) -> TransactionStore:
+    """Фикстура с хранилищем синтетических транзакций."""
+    return TransactionStore(operations)
+
+
+@pytest.mark.parametrize(
+    "start, end, include_end",
+    [
+        (datetime(2020, 3, 1), datetime(2020, 3, 31, 23, 59, 59), True),
+        (datetime(2020, 3, 1), datetime(2020, 4, 1), False),
+        (None, datetime(2018, 2, 1), True),
+        (datetime(2021, 12, 1), None, True),
+        (datetime(2030, 1, 1), datetime(2030, 2, 1), True),
+    ],
+)
+def test_select_matches_mask(
+    operations: pd.DataFrame, store: TransactionStore, start: Any, end: Any, include_end: bool
+) -> None:
+    """Тест на совпадение выборки по индексу с выборкой маской."""
+    expected = select_transactions(operations, start, end, include_end=include_end)
+    result = store.select(start, end, include_end=include_end)
+
+    assert sorted(result["Сумма операции"]) == sorted(expected["Сумма операции"])
+
+
+def test_select_boundaries() -> None:
+    """Тест на включение границ окна и пропуск операций без даты."""
+    store = TransactionStore(
+        pd.DataFrame(
+            {
+                "Дата операции": ["02.01.2024 00:00:00", None, "01.01.2024 00:00:00", "03.01.2024 00:00:00"],
+                "Сумма операции": [2.0, 9.0, 1.0, 3.0],
+                "Категория": ["A", "A", "B", "A"],
+                "Номер карты": ["*1", "*1", "*1", "*2"],
+            }
+        )
+    )
+
+    assert store.select(datetime(2024, 1, 1), datetime(2024, 1, 2))["Сумма операции"].tolist() == [1.0, 2.0]
+    assert store.select(datetime(2024, 1, 1), datetime(2024, 1, 2), include_end=False)["Сумма операции"].tolist() == [
+        1.0
+    ]
+    assert store.select(category="A")["Сумма операции"].tolist() == [2.0, 3.0]
+    assert store.select(card="*1")["Сумма операции"].tolist() == [1.0, 2.0]
+    assert store.select(category="A", card="*1")["Сумма операции"].tolist() == [2.0]
+    assert store.select(category="C").empty
+
+
+def test_select_by_category_and_card(operations: pd.DataFrame, store: TransactionStore) -> None:
+    """Тест на выборку по категории и карте внутри окна дат."""
+    df = normalize_transactions(operations)
+    start, end = datetime(2019, 1, 1), datetime(2019, 6, 30)
+    mask = (df["Дата операции"] >= start) & (df["Дата операции"] <= end) & (df["Категория"] == "Фастфуд")
+
+    by_category = store.select(start, end, category="Фастфуд")
+    by_card = store.select(start, end, category="Фастфуд", card="*7197")
+
+    assert len(by_category) == mask.sum()
+    assert len(by_card) == (mask & (df["Номер карты"] == "*7197")).sum()
+
+
+def test_partition_boundaries(operations: pd.DataFrame) -> None:
+    """Тест на границы разделов: нулевая сумма, пропуск суммы платежа, пустой и неуспешный статус."""
+    df = operations.head(11).copy()
+    df["Статус"] = ["OK", "OK", "OK", "OK", None, "FAILED", "FAILED", None, None, None, "FAILED"]
+    df["Сумма платежа"] = [-0.01, 0.0, None, None, -5.0, -5.0, 5.0, 5.0, None, None, None]
+    df["Сумма операции"] = [-0.01, 0.0, -3.0, None, -5.0, -5.0, 5.0, 5.0, 7.0, None, None]
+    codes = partition_codes(normalize_transactions(df))
+
+    assert codes.tolist() == [
+        SPEND,
+        INCOME,
+        SPEND,
+        NO_AMOUNT,
+        SPEND,
+        FAILED,
+        FAILED,
+        INCOME,
+        SPEND,
+        NO_AMOUNT,
+        FAILED,
+    ]
+    # Упрощенная запись без статуса и суммы платежа: сумма без знака — трата
+    assert partition_codes(pd.DataFrame({"Сумма операции": [500.25, -3.0]})).tolist() == [SPEND, SPEND]
+
+
+def test_partitions_computed_once(operations: pd.DataFrame) -> None:
+    """Тест на разметку разделов при нормализации и отбор по представлению без повторной разметки."""
+    df = normalize_transactions(operations)
+
+    with patch("src.loader._classify") as classify:
+        spend = select_transactions(df, view="spend")
+
+    classify.assert_not_called()
+    assert (spend["Раздел"] == SPEND).all() and len(spend)
+
+
+@pytest.mark.parametrize("start, end", [(None, None), (datetime(2020, 1, 1, 12, 30), datetime(2020, 12, 20, 15, 0))])
+def test_views_partition_dataset(operations: pd.DataFrame, start: Optional[datetime], end: Optional[datetime]) -> None:
+    """Тест на то, что представления разбивают окно без пересечений и совпадают с отбором маской."""
+    # Часть строк без сумм: проведенные попадают только в no_amount, непроведенные — в failed
+    df = operations.copy()
+    df.loc[df.index[1000:1400], ["Сумма платежа", "Сумма операции"]] = None
+    store = TransactionStore(df)
+    window = select_transactions(df, start, end)
+    views = {view: store.select(start, end, view=view) for view in ("spend", "income", "failed", "no_amount")}
+
+    assert sum(len(rows) for rows in views.values()) == len(window)
+    assert (views["spend"]["Сумма платежа"] < 0).all() and (views["spend"]["Статус"] == "OK").all()
+    assert (views["income"]["Сумма платежа"] >= 0).all() and (views["income"]["Статус"] == "OK").all()
+    assert (views["failed"]["Статус"] != "OK").all() and len(views["failed"])
+    assert views["no_amount"]["Сумма операции"].isna().all() and (views["no_amount"]["Статус"] == "OK").all()
+    assert len(views["no_amount"])
+    for view in VIEWS:
+        expected = select_transactions(df, start, end, view=view)
+        assert len(store.select(start, end, view=view)) == len(expected)
+        by_category = store.select(start, end, category="Фастфуд", view=view)
+        assert sorted(by_category["Сумма операции"].fillna(0.0)) == sorted(
+            expected.loc[expected["Категория"] == "Фастфуд", "Сумма операции"].fillna(0.0)
+        )
+
+
+def test_reports_same_for_store(
+    operations: pd.DataFrame, store: TransactionStore, user_settings: Dict[str, Any]
+) -> None:
+    """Тест на одинаковые результаты отчетов для DataFrame и хранилища."""
+    assert investment_bank("2020-05", store, 50) == pytest.approx(investment_bank("2020-05", operations, 50))
+    assert spending_by_category(store, "Аптеки", "2020-05-31") == spending_by_category(
+        operations, "Аптеки", "2020-05-31"
+    )
+
+    with patch("src.views.fetch_market_data", return_value=([], [])):
+        assert generate_response("2020-05-20 15:00:00", user_settings, store) == generate_response(
+            "2020-05-20 15:00:00", user_settings, operations
+        )
@@ -0,0 +1,58 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pytest
+
+from benchmarks.generator import write_operations_xlsx
+from src.cube import card_totals, format_cards
+from src.services import investment_bank_by_month
+from src.store import select_transactions, window_category_total
+from src.streaming import (
+    CardSummaryReducer,
+    CategorySpendingReducer,
+    InvestmentBankReducer,
+    iter_batches,
+    reduce_batches,
+)
+
+
+@pytest.fixture(params=["csv", "xlsx"])
+def export_path(request: Any, tmp_path: Path, operations: pd.DataFrame) -> str:
+    """Фикстура с выгрузкой в формате CSV или XLSX."""
+    path = tmp_path / f"operations.{request.param}"
+    if request.param == "csv":
+        operations.to_csv(path, index=False)
+    else:
+        write_operations_xlsx(operations, str(path))
+    return str(path)
+
+
+def test_iter_batches(export_path: str, operations: pd.DataFrame) -> None:
+    """Тест на разбиение выгрузки на типизированные пакеты ограниченного размера."""
+    batches = list(iter_batches(export_path, batch_size=700))
+
+    assert [len(batch) for batch in batches[:-1]] == [700] * (len(batches) - 1)
+    assert sum(len(batch) for batch in batches) == len(operations)
+    assert batches[0]["Дата операции"].dtype == "datetime64[ns]"
+
+
+def test_reducers_match_full_load(export_path: str, operations: pd.DataFrame) -> None:
+    """Тест на совпадение потоковых результатов с расчетом по полной таблице."""
+    start, end = datetime(2021, 6, 1), datetime(2021, 6, 30, 23, 59, 59)
+
+    invest, category, cards = reduce_batches(
+        iter_batches(export_path, batch_size=700),
+        InvestmentBankReducer(50),
+        CategorySpendingReducer("Фастфуд", "2021-06-30"),
+        CardSummaryReducer(start, end),
+    )
+
+    expected_invest = investment_bank_by_month(operations, 50)
+    assert list(invest) == list(expected_invest)
+    assert list(invest.values()) == pytest.approx(list(expected_invest.values()))
+    assert category["total_spent"] == round(
+        window_category_total(operations, "Фастфуд", datetime(2021, 4, 1), datetime(2021, 6, 30)), 2
+    )
+    assert cards == format_cards(card_totals(select_transactions(operations, start, end, view="spend")))
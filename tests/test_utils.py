@@ -2,8 +2,9 @@ from typing import Any, Dict, List, Optional
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
+import pytest
 
-from src.utils import get_currency_rates, get_stock_prices, read_excel_data
+from src.utils import fetch_market_data, get_currency_rates, get_market_data_client, get_stock_prices, read_excel_data
 
 
 def test_read_excel_data(mock_excel_data: pd.DataFrame) -> None:
@@ -13,7 +14,7 @@ def test_read_excel_data(mock_excel_data: pd.DataFrame) -> None:
         assert df.shape[0] == 3  # Проверяем количество строк
 
 
-@patch("src.utils.requests.get")
+@patch("src.market_data.requests.Session.get")
 def test_get_currency_rates(mock_requests: MagicMock) -> None:
     mock_requests.return_value.status_code = 200
     mock_requests.return_value.json.return_value = {"rates": {"USD": 1.0, "EUR": 0.85}}
@@ -25,7 +26,7 @@ def test_get_currency_rates(mock_requests: MagicMock) -> None:
     assert rates[1]["currency"] == "EUR"
 
 
-@patch("src.utils.requests.get")
+@patch("src.market_data.requests.Session.get")
 def test_get_stock_prices(mock_requests: MagicMock) -> None:
     mock_requests.return_value.status_code = 200
     mock_requests.return_value.json.return_value = {"data": [{"last": 150}]}
@@ -34,3 +35,35 @@ def test_get_stock_prices(mock_requests: MagicMock) -> None:
 
     assert len(prices) == 1
     assert prices[0]["stock"] == "AAPL"
+
+
+def test_read_excel_data_uses_cache(tmp_path: Any, mock_excel_data: pd.DataFrame, monkeypatch: Any) -> None:
+    source = tmp_path / "operations.xlsx"
+    source.write_bytes(b"xlsx")
+    monkeypatch.setenv("TRANSACTIONS_CACHE_DIR", str(tmp_path / "cache"))
+
+    with patch("pandas.read_excel", return_value=mock_excel_data) as mock_read:
+        first = read_excel_data(str(source))
+        second = read_excel_data(str(source))
+
+    assert mock_read.call_count == 1  # Повторное чтение идет из кеша
+    assert first is not None and second is not None
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_fetch_market_data(market_stub: Any, monkeypatch: Any) -> None:
+    monkeypatch.setenv("APILAYER_URL", market_stub.url)
+    monkeypatch.setenv("MARKETSTACK_URL", market_stub.url)
+
+    rates, prices = fetch_market_data(["USD"], ["AAPL", "MSFT"])
+
+    assert rates == [{"currency": "USD", "rate": 0.011}]
+    assert prices == [{"stock": "AAPL", "price": 100.0}, {"stock": "MSFT", "price": 101.0}]
+
+
+def test_missing_credentials_raise_on_market_data_call(monkeypatch: Any) -> None:
+    """Тест на проверку API_TOKEN при обращении к рыночным данным, а не при импорте модуля."""
+    monkeypatch.delenv("API_TOKEN", raising=False)
+
+    with patch("dotenv.load_dotenv"), pytest.raises(ValueError, match="API_TOKEN"):
+        get_market_data_client()
@@ -13,3 +13,22 @@ def test_generate_response(mock_excel_data: pd.DataFrame, user_settings: Dict[st
         assert response["greeting"] == "Добрый день"
         assert len(response["cards"]) == 1
         assert len(response["top_transactions"]) == 1
+
+
+def test_generate_response_with_loaded_transactions(
+    mock_excel_data: pd.DataFrame, user_settings: Dict[str, Any]
+) -> None:
+    with (
+        patch("src.views.read_excel_data") as mock_read,
+        patch("src.views.fetch_market_data", return_value=([], [])),
+    ):
+        response: Dict[str, Any] = generate_response("2024-01-31 12:00:00", user_settings, mock_excel_data)
+
+    mock_read.assert_not_called()
+    assert [card["last_digits"] for card in response["cards"]] == ["1234", "5678"]
+    assert response["top_transactions"][0] == {
+        "date": "15.01.2024",
+        "amount": 150.0,
+        "category": "Транспорт",
+        "description": "Такси",
+    }